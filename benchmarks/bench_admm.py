@@ -0,0 +1,152 @@
+"""
+ADMM consensus benchmarks: one full engine round across dimensions, each
+robust aggregator (up to 256 peers at dim 64 and 4096), update codecs (latency and wire size), the batched
+mesh simulator, rounds to tolerance with fixed vs residual-balanced ρ and
+over-relaxation, and large-dimension engines: the in-place local + dual
+step (with the bytes it allocates, which must not grow with the dimension)
+and a full round with the update streamed in chunks.
+"""
+import tracemalloc
+
+import numpy as np
+
+from harness import Results, main_for, measure
+from leo_core.brain.admm_engine import ADMMEngine
+from leo_core.brain.batched_admm import BatchedADMMEngine
+from leo_core.brain.robust_aggregation import AGGREGATORS, aggregate
+from leo_core.brain.update_codec import UpdateCodec
+
+
+def bench_round(dim: int, n_peers: int, repeat: int) -> dict:
+    """local_step + buffering every peer's update + median aggregation + dual update."""
+    rng = np.random.default_rng(0)
+    engine = ADMMEngine(dimension=dim)
+    target = rng.random(dim)
+    peer_updates = rng.random((n_peers - 1, dim))
+
+    def step():
+        engine.local_step(target)
+        engine.submit_update("self", engine.theta + engine.u)
+        for j, update in enumerate(peer_updates):
+            engine.submit_update(f"peer{j}", update)
+        engine.aggregate_round()
+        engine.dual_update()
+
+    return measure(step, repeat=repeat)
+
+
+def allocated_bytes(fn) -> float:
+    """Peak memory `fn` allocates above what was live before it (after one warm-up call)."""
+    fn()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        return float(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_inplace_step(dim: int, dtype: str, repeat: int) -> dict:
+    """local_step + dual_update. alloc_bytes stays at the few hundred bytes of Python
+    objects the chunk loop creates: no array is allocated, whatever the dimension."""
+    engine = ADMMEngine(dimension=dim, dtype=dtype)
+    target = np.random.default_rng(0).random(dim, dtype=dtype)
+
+    def step():
+        engine.local_step(target)
+        engine.dual_update()
+
+    stats = measure(step, repeat=repeat)
+    stats["alloc_bytes"] = allocated_bytes(step)
+    return stats
+
+
+def bench_chunked_round(dim: int, n_peers: int, dtype: str, repeat: int) -> dict:
+    """A round with the update encoded and submitted chunk by chunk, as HybridBrain streams it."""
+    rng = np.random.default_rng(0)
+    engine = ADMMEngine(dimension=dim, dtype=dtype)
+    codec = UpdateCodec(dtype)
+    target = rng.random(dim, dtype=dtype)
+    peer_update = rng.random(dim, dtype=dtype)
+
+    def step():
+        engine.local_step(target)
+        for payload in engine.iter_update_chunks(codec):
+            offset = payload["offset"]
+            engine.submit_chunk("self", offset, engine.reference[offset:offset + payload["dim"]])
+            for j in range(n_peers - 1):
+                engine.submit_chunk(f"peer{j}", offset, peer_update[offset:offset + payload["dim"]])
+        engine.aggregate_round()
+        engine.dual_update()
+
+    stats = measure(step, repeat=repeat, warmup=1)
+    # Dominated by the peers' buffered updates, which the round has to hold
+    stats["alloc_bytes"] = allocated_bytes(step)
+    return stats
+
+
+PENALTY_VARIANTS = {
+    "fixed": {},
+    "relaxed": dict(relaxation=1.6),
+    "adaptive": dict(adaptive_rho=True),
+    "adaptive+relaxed": dict(adaptive_rho=True, relaxation=1.6),
+}
+
+
+def bench_rounds_to_tolerance(agents: int, rho: float, options: dict, repeat: int) -> dict:
+    """BatchedADMMEngine.run to the standard stopping tolerance; `rounds` is what costs network time."""
+    targets = np.random.default_rng(4).random((agents, 64))
+    outcome = {}
+
+    def solve():
+        outcome.update(BatchedADMMEngine(agents, dimension=64, rho=rho, **options).run(targets, max_iter=2000))
+
+    stats = measure(solve, repeat=repeat, warmup=1)
+    stats["rounds"] = float(outcome["iterations"])
+    return stats
+
+
+def run(quick: bool = False) -> Results:
+    repeat = 10 if quick else 50
+    dims = [64, 1024] if quick else [64, 1024, 16384, 131072]
+    results: Results = {}
+    for dim in dims:
+        results[f"round/dim={dim}/peers=8"] = bench_round(dim, 8, repeat)
+
+    for n_peers, dim in [(32, 4096), (256, 64), (256, 4096)]:
+        X = np.random.default_rng(1).standard_normal((n_peers, dim))
+        for method in AGGREGATORS:
+            results[f"aggregate/{method}/dim={dim}/peers={n_peers}"] = measure(
+                lambda: aggregate(method, X), repeat=repeat)
+
+    vec = np.random.default_rng(2).standard_normal(65536)
+    for spec in ["float64", "float16+zlib", "int8+topk0.1+zlib"]:
+        codec = UpdateCodec(spec, seed=0)
+        stats = measure(lambda: codec.decode(codec.encode(vec)), repeat=repeat)
+        stats["wire_bytes"] = float(codec.last_wire_bytes)
+        results[f"codec/{spec}/dim=65536"] = stats
+
+    agents = 1000 if quick else 10000
+    mesh = BatchedADMMEngine(agents, dimension=64)
+    targets = np.random.default_rng(3).random((agents, 64))
+    results[f"batched_step/agents={agents}/dim=64"] = measure(lambda: mesh.step(targets), repeat=repeat)
+
+    agents = 200 if quick else 1000
+    for rho in (0.01, 0.25, 20.0):
+        for name, options in PENALTY_VARIANTS.items():
+            results[f"rounds_to_tol/{name}/rho={rho}/agents={agents}"] = bench_rounds_to_tolerance(
+                agents, rho, options, 2 if quick else 5)
+
+    large = [1_000_000] if quick else [1_000_000, 10_000_000]
+    for dim in large:
+        for dtype in ("float64", "float32"):
+            results[f"inplace_step/dim={dim}/{dtype}"] = bench_inplace_step(dim, dtype, repeat)
+    results[f"chunked_round/dim={large[-1]}/peers=4/float32"] = bench_chunked_round(
+        large[-1], 4, "float32", 3 if quick else 5)
+    return results
+
+
+if __name__ == "__main__":
+    main_for("admm", run, __doc__)
@@ -0,0 +1,115 @@
+"""
+Gossip scaling: per-node messages and bytes per round (with ten broadcasts
+a round), broadcast coverage and membership discovery as the mesh grows. Nodes run the real GossipNode
+protocol in one process over an in-memory hub, driven round by round, so
+hundreds or thousands of nodes fit on one machine.
+"""
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from harness import Results, main_for
+from leo_core.network.gossip import GossipNode
+from leo_core.network.wire import encode_message, frame_size
+
+
+class Hub:
+    """Delivers frames between HubTransports in FIFO order."""
+
+    def __init__(self):
+        self.transports = {}
+        self.queue = deque()
+
+    def run(self):
+        while self.queue:
+            dst, message, src = self.queue.popleft()
+            transport = self.transports.get(dst)
+            if transport is not None and transport.on_message_received:
+                transport.on_message_received(message, src)
+
+
+class HubTransport:
+    """P2PNode surface over the hub; counts what it sends."""
+
+    def __init__(self, hub: Hub, port: int):
+        self.hub = hub
+        self.host = "127.0.0.1"
+        self.port = port
+        self.on_message_received = None
+        self.messages = 0
+        self.bytes = 0
+        hub.transports[(self.host, port)] = self
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def send_to_peer(self, host: str, port: int, message: dict):
+        self.messages += 1
+        self.bytes += frame_size(encode_message(message))
+        self.hub.queue.append(((host, port), message, (self.host, self.port)))
+
+
+def simulate(n: int, rounds: int, fanout: int = 3, ttl: Optional[int] = None, senders: int = 10,
+             dim: int = 64) -> dict:
+    hub = Hub()
+    nodes = []
+    for i in range(n):
+        node = GossipNode(HubTransport(hub, 7000 + i), fanout=fanout, ttl=ttl, seed=i)
+        node.start(protocol_thread=False)
+        nodes.append(node)
+    measured = rounds // 2
+    delivered = [0]  # Deliveries of the broadcasts made in the measured rounds
+
+    def on_message(message, address):
+        if message["round"] >= rounds - measured:
+            delivered[0] += 1
+
+    for node in nodes:
+        node.on_message_received = on_message
+    # Everyone joins through node 0 and discovers the rest
+    for node in nodes[1:]:
+        node.connect_to_peer("127.0.0.1", 7000)
+        hub.run()
+
+    # `senders` random nodes broadcast an update every round
+    rng = np.random.default_rng(0)
+    theta = rng.random(dim)
+    now = time.monotonic()
+    # The extra periods only let anti-entropy recover the last rounds' misses
+    settle = nodes[0].history_periods
+    for r in range(rounds + settle):
+        if r == rounds - measured:
+            base_msgs = sum(node.transport.messages for node in nodes)
+            base_bytes = sum(node.transport.bytes for node in nodes)
+        now += nodes[0].protocol_period
+        for node in nodes:
+            node.tick(now)
+        if r < rounds:
+            for i in rng.choice(n, senders, replace=False):
+                nodes[i].broadcast({"type": "ADMM_UPDATE", "round": r, "theta": theta})
+        hub.run()
+    msgs = sum(node.transport.messages for node in nodes) - base_msgs
+    wire = sum(node.transport.bytes for node in nodes) - base_bytes
+    reach = delivered[0] / (senders * measured)
+    assert reach >= 0.99 * (n - 1), f"Broadcasts reached {reach:.1f} of {n - 1} nodes"
+    return {
+        "node_round_messages": msgs / (n * measured),
+        "node_round_wire_bytes": wire / (n * measured),
+        "broadcast_reach_nodes": reach,
+        "membership_fraction": float(np.mean([len(node.peers) for node in nodes])) / (n - 1),
+    }
+
+
+def run(quick: bool = False) -> Results:
+    sizes = [50, 200] if quick else [50, 200, 1000]
+    rounds = 10 if quick else 20
+    return {f"nodes={n}/fanout=3/senders=10": simulate(n, rounds) for n in sizes}
+
+
+if __name__ == "__main__":
+    main_for("gossip", run, __doc__)
@@ -0,0 +1,98 @@
+"""
+Project LEO: LTM backend benchmark.
+
+Loads the same synthetic corpus into each VectorMemory backend and reports
+insert throughput, query latency percentiles and recall@k against exact
+search, as JSON:
+
+    python benchmarks/bench_ltm_backends.py --n 20000 --queries 200
+
+Embeddings come from a deterministic synthetic model (clustered random
+vectors keyed by the document text), so the comparison measures storage
+and search only and runs without downloading the ONNX model.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from harness import Results, SyntheticEmbedding, add_report_arguments, finish, report
+from leo_core.memory.vector_memory import VectorMemory
+from leo_core.memory.ltm_backends import ChromaBackend, NumpyBackend
+
+
+def percentiles(samples_ms):
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def bench_backend(backend, docs, queries, k, batch):
+    memory = VectorMemory(backend=backend)
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch):
+        memory.add_memories(docs[i:i + batch])
+    insert_s = time.perf_counter() - start
+    memory.query_memories(queries[:1], k)  # Warm-up (IVF trains here)
+    latencies, results = [], []
+    for q in queries:
+        t = time.perf_counter()
+        results.append(memory.query_memories([q], k)[0])
+        latencies.append((time.perf_counter() - t) * 1000.0)
+    stats = {"inserts_per_s": len(docs) / insert_s, **percentiles(latencies)}
+    return stats, results
+
+
+def run(quick: bool = False, n: int = None, n_queries: int = None, k: int = 3,
+        batch: int = 1000, dim: int = 384, skip_chroma: bool = False) -> Results:
+    n = n or (5000 if quick else 20000)
+    n_queries = n_queries or (50 if quick else 200)
+    embed = SyntheticEmbedding(dim)
+    docs = [f"memory {i}" for i in range(n)]
+    queries = [f"memory {i}" for i in np.random.default_rng(1).choice(n, n_queries, replace=False)]
+    results: Results = {}
+
+    with tempfile.TemporaryDirectory() as root:
+        backends = {
+            "numpy_flat": NumpyBackend(os.path.join(root, "flat"), embed, index="flat"),
+            "numpy_ivf": NumpyBackend(os.path.join(root, "ivf"), embed, index="ivf",
+                                      n_lists=max(16, int(np.sqrt(n))), n_probe=8),
+        }
+        if not skip_chroma:
+            try:
+                import chromadb  # noqa: F401
+                backends["chroma"] = ChromaBackend(os.path.join(root, "chroma"), embed)
+            except ImportError:
+                print("[Bench] chromadb not installed; skipping the Chroma backend", file=sys.stderr)
+
+        exact = None
+        for name, backend in backends.items():
+            result, found = bench_backend(backend, docs, queries, k, batch)
+            if name == "numpy_flat":
+                exact = found
+            elif exact is not None:
+                result["recall"] = float(np.mean([
+                    len(set(a) & set(b)) / k for a, b in zip(exact, found)
+                ]))
+            results[f"{name}/n={n}"] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_report_arguments(parser)
+    parser.add_argument("--n", type=int, help="Corpus size")
+    parser.add_argument("--queries", type=int)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=1000, help="Documents per add_memories call")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+    results = run(args.quick, args.n, args.queries, args.k, args.batch, args.dim, args.skip_chroma)
+    sys.exit(finish(report({"ltm_backends": results}, args.quick), args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+P2P benchmarks between two local nodes, for both networking layers:
+one-way message throughput (small ADMM-sized and large payloads) and
+request/reply round-trip latency.
+"""
+import threading
+import time
+
+import numpy as np
+
+from harness import Results, main_for
+from leo_core.network.async_node import AsyncP2PNode
+from leo_core.network.p2p_node import P2PNode
+
+HOST = "127.0.0.1"
+
+
+def make_node(mode: str, port: int, queue_size: int):
+    if mode == "asyncio":
+        return AsyncP2PNode(host=HOST, port=port, queue_size=queue_size)
+    return P2PNode(host=HOST, port=port)
+
+
+def bench_throughput(mode: str, port: int, payload_dim: int, n_messages: int) -> dict:
+    received = 0
+    done = threading.Event()
+
+    def on_message(message, address):
+        nonlocal received
+        received += 1
+        if received == n_messages:
+            done.set()
+
+    receiver = make_node(mode, port, n_messages)
+    receiver.on_message_received = on_message
+    receiver.start()
+    sender = make_node(mode, port + 1, n_messages)
+    sender.start()
+    sender.connect_to_peer(HOST, port)
+    payload = {"type": "ADMM_UPDATE", "theta": np.random.default_rng(0).random(payload_dim)}
+    try:
+        # Warm the connection so setup is not timed
+        sender.send_to_peer(HOST, port, {"type": "PING"})
+        time.sleep(0.2)
+        received = 0
+        start = time.perf_counter()
+        for _ in range(n_messages):
+            sender.broadcast(payload)
+        completed = done.wait(60)
+        elapsed = time.perf_counter() - start
+    finally:
+        sender.stop()
+        receiver.stop()
+    if not completed:
+        return {"delivered": float(received), "error": 1.0}
+    return {
+        "messages_per_s": n_messages / elapsed,
+        "payload_mb_per_s": n_messages * payload_dim * 8 / elapsed / 1e6,
+    }
+
+
+def bench_round_trip(mode: str, port: int, n_pings: int) -> dict:
+    replies = threading.Semaphore(0)
+    a = make_node(mode, port, 64)
+    b = make_node(mode, port + 1, 64)
+    a.on_message_received = lambda message, address: replies.release()
+    b.on_message_received = lambda message, address: b.send_to_peer(HOST, port, {"type": "PONG"})
+    a.start()
+    b.start()
+    a.connect_to_peer(HOST, port + 1)
+    b.connect_to_peer(HOST, port)
+    samples = []
+    try:
+        for i in range(n_pings + 3):
+            start = time.perf_counter()
+            a.send_to_peer(HOST, port + 1, {"type": "PING", "seq": i})
+            if not replies.acquire(timeout=5):
+                return {"error": 1.0}
+            if i >= 3:  # The first pings open the connections
+                samples.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        a.stop()
+        b.stop()
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"rtt_p50_ms": float(p50), "rtt_p95_ms": float(p95), "rtt_p99_ms": float(p99)}
+
+
+def run(quick: bool = False, base_port: int = 5700) -> Results:
+    n_small = 500 if quick else 5000
+    n_large = 20 if quick else 100
+    results: Results = {}
+    port = base_port
+    for mode in ("thread", "asyncio"):
+        results[f"{mode}/throughput/dim=64"] = bench_throughput(mode, port, 64, n_small)
+        results[f"{mode}/throughput/dim=1048576"] = bench_throughput(mode, port + 2, 1 << 20, n_large)
+        results[f"{mode}/round_trip"] = bench_round_trip(mode, port + 4, 50 if quick else 500)
+        port += 10
+    return results
+
+
+if __name__ == "__main__":
+    main_for("p2p", run, __doc__)
@@ -0,0 +1,107 @@
+"""
+Project LEO: cold-start benchmark.
+
+Each scenario runs in a fresh interpreter so module imports, model loading
+and socket binding are all measured from a cold process. Results are
+printed as JSON (and optionally written to a file):
+
+    python benchmarks/bench_startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from harness import ROOT, Results, add_report_arguments, finish, report
+
+# Each snippet runs after `_t0 = time.perf_counter()` and must leave the node ready.
+SCENARIOS = {
+    # Verifier-only node: no memory, no network
+    "zkf_verifier": """
+import numpy as np
+from leo_core.brain.zkf_layer import ZKFLayer
+zkf = ZKFLayer(node_id="bench")
+state = np.zeros(64)
+assert zkf.verify_fragment(zkf.generate_fragment(state, state + 0.1, 0.9), state + 0.1)
+""",
+    # Consensus-capable brain; the vector store and sockets stay unopened
+    "consensus_node": """
+from leo_core.brain.hybrid_brain import HybridBrain
+from leo_core.memory.memory_manager import MemoryManager
+brain = HybridBrain(memory=MemoryManager(), p2p_port={port})
+brain.admm.local_step(brain.admm.theta)
+brain.admm.aggregate_round()
+""",
+    # Listening node, as main.py starts it
+    "network_node": """
+from leo_core.brain.hybrid_brain import HybridBrain
+from leo_core.memory.memory_manager import MemoryManager
+brain = HybridBrain(memory=MemoryManager(), p2p_port={port})
+brain.start_network()
+""",
+    # Full node with its long-term memory opened
+    "ltm_node": """
+from leo_core.brain.hybrid_brain import HybridBrain
+from leo_core.memory.memory_manager import MemoryManager
+from leo_core.memory.vector_memory import VectorMemory
+memory = MemoryManager(ltm=VectorMemory(db_path={db_path!r}))
+brain = HybridBrain(memory=memory, p2p_port={port})
+memory.ltm.backend.count()
+""",
+}
+
+_CHILD = """
+import time
+_t0 = time.perf_counter()
+{body}
+print("READY_MS", (time.perf_counter() - _t0) * 1000.0)
+"""
+
+
+def run_scenario(name: str, port: int, db_path: str) -> dict:
+    body = SCENARIOS[name].format(port=port, db_path=db_path)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(body=body)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000.0
+    if proc.returncode != 0:
+        return {"ok": False, "error": proc.stderr.strip().splitlines()[-1:]}
+    ready = [line for line in proc.stdout.splitlines() if line.startswith("READY_MS")]
+    return {"ok": True, "ready_ms": float(ready[-1].split()[1]), "process_ms": wall_ms}
+
+
+def run(quick: bool = False, repeat: int = None, scenarios: List[str] = None) -> Results:
+    repeat = repeat or (1 if quick else 3)
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as db_path:
+        for i, name in enumerate(scenarios or SCENARIOS):
+            runs = [run_scenario(name, 5600 + i, db_path) for _ in range(repeat)]
+            ok = [r for r in runs if r["ok"]]
+            if not ok:
+                print(f"[Bench] Startup scenario {name} failed: {runs[-1]['error']}", file=sys.stderr)
+                continue
+            results[name] = {
+                "ready_ms": statistics.median(r["ready_ms"] for r in ok),
+                "process_ms": statistics.median(r["process_ms"] for r in ok),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_report_arguments(parser)
+    parser.add_argument("--repeat", type=int, help="Cold starts per scenario (median is reported)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable); all by default")
+    args = parser.parse_args()
+    results = run(args.quick, args.repeat, args.scenario)
+    sys.exit(finish(report({"startup": results}, args.quick), args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+VectorMemory benchmarks: add_memories and query_memory latency as the store
+grows, for each LTM backend. Uses the harness's synthetic embedding model,
+so only storage and search are measured.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from harness import Results, SyntheticEmbedding, main_for, measure
+from leo_core.memory.ltm_backends import ChromaBackend, NumpyBackend
+from leo_core.memory.vector_memory import VectorMemory
+
+
+def backends(root: str, embed: SyntheticEmbedding):
+    yield "numpy_flat", NumpyBackend(os.path.join(root, "flat"), embed, index="flat")
+    yield "numpy_ivf", NumpyBackend(os.path.join(root, "ivf"), embed, index="ivf", n_lists=128, n_probe=8)
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        return
+    yield "chroma", ChromaBackend(os.path.join(root, "chroma"), embed)
+
+
+def run(quick: bool = False) -> Results:
+    sizes = [1000, 5000] if quick else [1000, 10000, 50000]
+    repeat = 20 if quick else 100
+    embed = SyntheticEmbedding(dim=384)
+    rng = np.random.default_rng(0)
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for name, backend in backends(root, embed):
+            memory = VectorMemory(backend=backend)
+            stored = 0
+            for size in sizes:
+                while stored < size:
+                    batch = min(1000, size - stored)
+                    memory.add_memories([f"memory {stored + i}" for i in range(batch)])
+                    stored += batch
+                counter = iter(range(10 ** 9))
+                add = measure(lambda: memory.add_memories([f"extra {size} {next(counter)}" for _ in range(10)]),
+                              repeat=max(5, repeat // 5), warmup=1)
+                stored += 10 * (max(5, repeat // 5) + 1)
+                queries = iter(f"memory {i}" for i in rng.integers(0, size, size=repeat + 3))
+                query = measure(lambda: memory.query_memory(next(queries), n_results=3), repeat=repeat)
+                results[f"{name}/size={size}"] = {
+                    "add10_p50_ms": add["p50_ms"],
+                    "add10_p99_ms": add["p99_ms"],
+                    "query_p50_ms": query["p50_ms"],
+                    "query_p99_ms": query["p99_ms"],
+                }
+    return results
+
+
+if __name__ == "__main__":
+    main_for("vector_memory", run, __doc__)
@@ -0,0 +1,72 @@
+"""
+ZKF benchmarks: generate_fragment / verify_fragment latency and throughput
+across state dimensions, batched verification, and incremental Merkle
+commitments, plus attestation ledger appends and windowed queries.
+"""
+import tempfile
+import time
+
+import numpy as np
+
+from harness import Results, main_for, measure
+from leo_core.brain.attestation_ledger import AttestationLedger
+from leo_core.brain.zkf_layer import ZKFLayer
+
+
+def run(quick: bool = False) -> Results:
+    repeat = 20 if quick else 100
+    dims = [64, 4096] if quick else [64, 4096, 65536]
+    rng = np.random.default_rng(0)
+    zkf = ZKFLayer(node_id="bench")
+    results: Results = {}
+    for dim in dims:
+        state = rng.random(dim)
+        transformed = state + 0.01
+        fragment = zkf.generate_fragment(state, transformed, 0.95)
+        results[f"generate/dim={dim}"] = measure(lambda: zkf.generate_fragment(state, transformed, 0.95), repeat=repeat)
+        results[f"verify/dim={dim}"] = measure(lambda: zkf.verify_fragment(fragment, transformed), repeat=repeat)
+
+    n = 500 if quick else 5000
+    states = rng.random((n, 64))
+    fragments = [zkf.generate_fragment(s, s + 0.01, 0.95) for s in states]
+    batch = measure(lambda: zkf.verify_batch(fragments, states + 0.01), repeat=max(3, repeat // 10), warmup=1)
+    batch["fragments_per_s"] = n * batch["ops_per_s"]
+    results[f"verify_batch/n={n}/dim=64"] = batch
+
+    dim = 65536 if quick else 1 << 20
+    merkle = ZKFLayer(node_id="bench", commitment="merkle", merkle_chunk_size=1024)
+    state = rng.random(dim)
+    merkle.generate_fragment(state, state, 0.95)  # Full tree build
+
+    def touch_one_chunk():
+        state[7] += 1e-3
+        merkle.generate_fragment(state, state, 0.95)
+
+    results[f"merkle_incremental/dim={dim}"] = measure(touch_one_chunk, repeat=repeat)
+    results.update(_bench_ledger(fragments[:1000], quick))
+    return results
+
+
+def _bench_ledger(fragments, quick: bool) -> Results:
+    """Appends a long history, then compares a recent-window query against a full-history one."""
+    history = 50_000 if quick else 500_000
+    nodes = [f"peer-{i % 16}" for i in range(len(fragments))]
+    valid = np.ones(len(fragments), dtype=bool)
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as path:
+        ledger = AttestationLedger(path, segment_records=65536)
+        append = measure(lambda: ledger.append_many(fragments, valid, nodes), repeat=history // len(fragments) - 1,
+                         warmup=1)
+        append["records_per_s"] = len(fragments) * append["ops_per_s"]
+        results[f"ledger_append/batch={len(fragments)}"] = append
+        time.sleep(0.2)
+        ledger.append_many(fragments, valid, nodes)  # The only records in the recent window
+        results[f"ledger_rates_recent/history={history}"] = measure(lambda: ledger.attestation_rates(0.1), repeat=20)
+        results[f"ledger_rates_all/history={history}"] = measure(lambda: ledger.attestation_rates(3600.0), repeat=20)
+        results[f"ledger_node_history/history={history}"] = measure(lambda: ledger.node_history("peer-3"), repeat=20)
+        ledger.close()
+    return results
+
+
+if __name__ == "__main__":
+    main_for("zkf", run, __doc__)
@@ -0,0 +1,171 @@
+"""
+Project LEO: shared benchmark harness.
+
+Every benchmark module exposes run(quick: bool) -> Dict[str, Dict[str, float]],
+mapping case names (e.g. "step/dim=1024") to metrics. Metric names carry
+their direction: *_ms and *_bytes are lower-is-better, *_per_s
+higher-is-better; anything else is reported but never compared.
+
+Reports are JSON:
+    {"meta": {...}, "results": {"<benchmark>": {"<case>": {"<metric>": value}}}}
+and compare() checks one report against a baseline with a relative
+regression threshold.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+Results = Dict[str, Dict[str, float]]
+
+
+def measure(fn: Callable[[], Any], repeat: int = 50, warmup: int = 3, number: int = 1) -> Dict[str, float]:
+    """
+    Times `fn`: `repeat` samples of `number` calls each, after `warmup`
+    untimed calls. Returns per-call latency percentiles and throughput.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples[i] = (time.perf_counter() - start) / number
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000.0
+    return {
+        "mean_ms": float(samples.mean() * 1000.0),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "ops_per_s": float(1.0 / samples.mean()),
+    }
+
+
+class SyntheticEmbedding:
+    """
+    Deterministic stand-in for the embedding model: each text maps to one of
+    `n_clusters` fixed centres plus noise, both derived from the text's hash.
+    Benchmarks then measure storage and search, not model inference, and
+    run without downloading the ONNX model.
+    """
+
+    def __init__(self, dim: int = 384, n_clusters: int = 256, seed: int = 0):
+        self.dim = dim
+        self.centres = np.random.default_rng(seed).standard_normal((n_clusters, dim)).astype(np.float32)
+
+    def __call__(self, input):
+        out = []
+        for text in input:
+            h = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            rng = np.random.default_rng(h)
+            centre = self.centres[h % len(self.centres)]
+            out.append(centre + 0.5 * rng.standard_normal(self.dim).astype(np.float32))
+        return out
+
+    def embed_query(self, input):
+        return self(input)
+
+    # Attributes chromadb reads from an embedding function
+    @staticmethod
+    def name() -> str:
+        return "leo_synthetic"
+
+    def get_config(self):
+        return {}
+
+    def is_legacy(self) -> bool:
+        return True
+
+
+def metric_direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if not compared."""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith("_ms") or metric.endswith("_bytes"):
+        return -1
+    return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Returns the metrics of `current` that are worse than `baseline` by more
+    than `threshold` (relative). Benchmarks, cases or metrics missing from
+    either report are skipped.
+    """
+    regressions = []
+    for bench, cases in current.get("results", {}).items():
+        for case, metrics in cases.items():
+            base_metrics = baseline.get("results", {}).get(bench, {}).get(case, {})
+            for metric, value in metrics.items():
+                direction = metric_direction(metric)
+                base = base_metrics.get(metric)
+                if direction is None or base is None or base == 0:
+                    continue
+                change = (value - base) / abs(base)
+                if -direction * change > threshold:
+                    regressions.append({
+                        "benchmark": bench, "case": case, "metric": metric,
+                        "baseline": base, "current": value, "change": change,
+                    })
+    return regressions
+
+
+def report(results: Dict[str, Results], quick: bool) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def add_report_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and fewer repeats")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative regression that fails the comparison (default 0.10)")
+
+
+def finish(current: Dict[str, Any], args: argparse.Namespace) -> int:
+    """Prints/writes the report and compares it with the baseline; returns the exit code."""
+    text = json.dumps(current, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    for r in regressions:
+        print(f"[Bench] REGRESSION {r['benchmark']} {r['case']} {r['metric']}: "
+              f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.1%})", file=sys.stderr)
+    if not regressions:
+        print(f"[Bench] No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main_for(name: str, run: Callable[[bool], Results], description: str = None):
+    """Command-line entry point for a single benchmark module."""
+    parser = argparse.ArgumentParser(description=description)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    sys.exit(finish(report({name: run(args.quick)}, args.quick), args))
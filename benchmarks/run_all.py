@@ -0,0 +1,53 @@
+"""
+Project LEO: benchmark suite runner.
+
+Runs the selected benchmarks and writes one JSON report. With --baseline,
+every *_ms / *_bytes / *_per_s metric is compared against the baseline
+report and the run fails (exit code 1) if any regressed by more than
+--threshold:
+
+    python benchmarks/run_all.py --output baseline.json
+    python benchmarks/run_all.py --baseline baseline.json --threshold 0.15
+
+Compare reports taken on the same machine; absolute numbers do not
+transfer between hosts.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import add_report_arguments, finish, report  # noqa: E402
+
+# Benchmark name -> module; each module exposes run(quick) -> results
+BENCHMARKS = {
+    "admm": "bench_admm",
+    "zkf": "bench_zkf",
+    "p2p": "bench_p2p",
+    "cluster": "bench_cluster",
+    "gossip": "bench_gossip",
+    "vector_memory": "bench_vector_memory",
+    "ltm_backends": "bench_ltm_backends",
+    "startup": "bench_startup",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_report_arguments(parser)
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="Benchmark to run (repeatable); all by default")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"[Bench] Running {name}...", file=sys.stderr)
+        module = importlib.import_module(BENCHMARKS[name])
+        results[name] = module.run(args.quick)
+    sys.exit(finish(report(results, args.quick), args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows of the state matrix, in file order
+STATE_ROWS = ("theta", "w", "u", "reference")
+
+
+class ADMMCheckpoint:
+    """
+    Warm-restart checkpoints of an ADMMEngine.
+
+    The vectors (θ, w, u and the reference peers hold of
+    the node's update) are written as one matrix in
+    the engine's dtype to a new generation file `state.<generation>.f64`
+    (.f32 for float32 engines), flushed, and only then committed by
+    atomically replacing meta.json, which names the generation and dtype and
+    holds the scalars (round, rho, alpha, per-peer weights).
+    A crash mid-save therefore leaves the previous checkpoint intact.
+
+    restore() maps the committed generation copy-on-write: the engine's
+    arrays are views of the page cache and nothing is copied until the
+    engine writes to them, which never reaches the file. A checkpoint in
+    another dtype is converted (and therefore copied) on restore.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._meta_path = os.path.join(path, "meta.json")
+        self.generation = 0
+        self.saves = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _data_path(self, generation: int, dtype) -> str:
+        dtype = np.dtype(dtype)
+        return os.path.join(self.path, f"state.{generation}.{dtype.kind}{8 * dtype.itemsize}")
+
+    def _read_meta(self) -> Optional[dict]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path, "r") as f:
+            return json.load(f)
+
+    def save(self, engine) -> int:
+        """Writes the engine's state as a new generation and commits it. Returns the generation."""
+        meta = self._read_meta()
+        previous = meta["generation"] if meta else None
+        generation = max(self.generation, previous if previous is not None else 0) + 1
+        data_path = self._data_path(generation, engine.dtype)
+        matrix = np.memmap(data_path, dtype=engine.dtype, mode="w+", shape=(len(STATE_ROWS), engine.dim))
+        for i, name in enumerate(STATE_ROWS):
+            matrix[i] = getattr(engine, name)
+        matrix.flush()
+        del matrix
+
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "generation": generation,
+                "dim": engine.dim,
+                "dtype": engine.dtype.name,
+                "rows": list(STATE_ROWS),
+                "round": engine.round,
+                "rho": engine.rho,
+                "alpha": engine.alpha,
+                "peer_alpha": engine.peer_alpha,
+                "saved_at": time.time(),
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._meta_path)  # Commit point
+
+        # A restored engine may still map the old generation; POSIX keeps it alive until unmapped
+        if previous is not None:
+            previous_path = self._data_path(previous, meta.get("dtype", "float64"))
+            if os.path.exists(previous_path):
+                os.remove(previous_path)
+        self.generation = generation
+        self.saves += 1
+        return generation
+
+    def restore(self, engine) -> bool:
+        """
+        Loads the committed checkpoint into `engine` without copying the
+        vectors. Returns False (leaving the engine untouched) if there is no
+        usable checkpoint for its dimension.
+        """
+        meta = self._read_meta()
+        if meta is None:
+            return False
+        if meta["dim"] != engine.dim:
+            logger.warning("Ignoring checkpoint in %s: dimension %d != %d", self.path, meta["dim"], engine.dim)
+            return False
+        rows = meta.get("rows", ["theta", "w", "u", "residual"])  # Before delta-encoded updates
+        if tuple(rows) != STATE_ROWS:
+            logger.warning("Ignoring checkpoint in %s: state rows %s != %s", self.path, rows, list(STATE_ROWS))
+            return False
+        dtype = np.dtype(meta.get("dtype", "float64"))  # Checkpoints before dtype support are float64
+        data_path = self._data_path(meta["generation"], dtype)
+        if not os.path.exists(data_path):
+            logger.warning("Ignoring checkpoint in %s: missing %s", self.path, os.path.basename(data_path))
+            return False
+        matrix = np.memmap(data_path, dtype=dtype, mode="c", shape=(len(STATE_ROWS), engine.dim))
+        for i, name in enumerate(STATE_ROWS):
+            setattr(engine, name, matrix[i] if dtype == engine.dtype else matrix[i].astype(engine.dtype))
+        engine.round = meta["round"]
+        engine.rho = meta["rho"]
+        engine.alpha = meta["alpha"]
+        engine.peer_alpha = dict(meta["peer_alpha"])
+        engine.round_started = time.monotonic()
+        self.generation = meta["generation"]
+        logger.info("Restored consensus state at round %d from %s", engine.round, self.path)
+        return True
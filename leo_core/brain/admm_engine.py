@@ -1,40 +1,415 @@
+import time
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Tuple
+from .prox import ProxOperator, SquaredLoss, soft_threshold
+from .robust_aggregation import COORDINATE_WISE, aggregate
+from ..telemetry.metrics import REGISTRY
+
+_STEP_SECONDS = REGISTRY.histogram("leo_admm_step_seconds", "Time spent in each ADMM step", ["step"])
+_PRIMAL_RESIDUAL = REGISTRY.gauge("leo_admm_primal_residual", "||θ - w|| after the last aggregated round")
+_DUAL_RESIDUAL = REGISTRY.gauge("leo_admm_dual_residual", "ρ·√N·||w - w_prev|| after the last aggregated round")
+_RHO = REGISTRY.gauge("leo_admm_rho", "Current ADMM penalty parameter ρ")
+_ROUND = REGISTRY.gauge("leo_admm_round", "Current consensus round")
+_STALE_UPDATES = REGISTRY.counter("leo_admm_stale_updates_total", "Late peer updates, by outcome", ["outcome"])
+
+def residual_balanced_rho(rho: float, primal: float, dual: float, mu: float = 10.0, tau: float = 2.0,
+                          rho_min: float = 1e-4, rho_max: float = 1e4) -> float:
+    """
+    Residual balancing (Boyd et al. §3.4.1): ρ·τ when the primal residual
+    exceeds mu times the dual one, ρ/τ in the opposite case, else ρ.
+    """
+    if not (np.isfinite(primal) and np.isfinite(dual)):
+        return rho
+    if primal > mu * dual:
+        return min(rho * tau, rho_max)
+    if dual > mu * primal:
+        return max(rho / tau, rho_min)
+    return rho
+
 
 class ADMMEngine:
     """
     Project LEO: Decentralized Consensus Engine.
     Implements the Byzantine-Resilient ADMM optimization protocol.
     Based on the LEO Whitepaper:
-    minimize Σ α_i f_i(θ_i) + Γ Ω(w) + λ Σ ||θ_i - w||_1
+    minimize Σ α_i f_i(θ_i) + Γ Ω(w) + λ Σ ||θ_i - w||_1   s.t. w ∈ C
+
+    f_i (`local_objective`), Ω (`regularizer`) and C (`constraint`) are
+    ProxOperators from .prox; λ is `l1_coupling`. The default f_i is the
+    squared loss (4/2)||θ - target||², which at ρ = 1 is the original
+    0.8·target + 0.2·(w - u) blend. `relaxation` in (0, 2) over-relaxes the
+    local decision before it is shared (values around 1.5 usually cut the
+    rounds needed), and `adaptive_rho` rebalances ρ from the residuals
+    after each round. `alpha` remains this node's reliability weight.
+
+    With adaptive ρ every node tunes its own penalty, so ρ travels with the
+    updates: a peer's update is weighted by the ρ_j it was computed with
+    (`set_peer_rho`), which keeps w = Σ ρ_j d_j / Σ ρ_j the consensus
+    w-update for node-specific penalties. Peers whose ρ is unknown are
+    assumed to share this node's.
+
+    The state vectors are allocated once, in `dtype` (float32 halves memory
+    and bandwidth for large shared states), and every step updates them in
+    place. Steps walk the vectors in blocks of `chunk_size` coordinates
+    through one preallocated scratch block, so each block stays in cache
+    across the step's arithmetic and no step allocates anything of the
+    state's size. Updates can be sent and received in the same blocks
+    (iter_update_chunks / submit_chunk), which keeps message frames bounded
+    for very large dimensions.
     """
     
-    def __init__(self, dimension: int = 128):
+    def __init__(self, dimension: int = 128, aggregator: str = "median",
+                 staleness_bound: Optional[int] = None, staleness_decay: float = 1.0,
+                 dtype=np.float64, chunk_size: int = 65536,
+                 local_objective: Optional[ProxOperator] = None,
+                 regularizer: Optional[ProxOperator] = None, gamma: float = 1.0,
+                 constraint: Optional[ProxOperator] = None, l1_coupling: float = 0.0,
+                 relaxation: float = 1.0, adaptive_rho: bool = False):
         self.dim = dimension
-        self.theta = np.zeros(dimension) # Local decision
-        self.w = np.zeros(dimension)     # Global consensus state
-        self.u = np.zeros(dimension)     # Dual variable
+        self.dtype = np.dtype(dtype)
+        if self.dtype.kind != "f":
+            raise ValueError(f"ADMM state must be floating point, got {self.dtype}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if not 0.0 < relaxation < 2.0:
+            raise ValueError(f"relaxation must be in (0, 2), got {relaxation}")
+        self.chunk_size = chunk_size
+        self.theta = np.zeros(dimension, dtype=self.dtype) # Local decision
+        self.w = np.zeros(dimension, dtype=self.dtype)     # Global consensus state
+        self.u = np.zeros(dimension, dtype=self.dtype)     # Dual variable
         self.rho = 1.0                   # Penalty parameter
         self.alpha = 1.0                 # Reliability weight
-        
-    def local_step(self, target_vector: np.ndarray):
+        # What peers have reconstructed of this node's update: updates are sent as
+        # deltas against it, so whatever a lossy codec drops is resent next round
+        self.reference = np.zeros(dimension, dtype=self.dtype)
+        # Every keyframe_every-th transmission of a chunk is sent whole (dense, without
+        # top-k), so a receiver that lost a delta is back in sync within that many rounds
+        self.keyframe_every = 10
+        self._sent_versions: Dict[int, int] = {} # chunk offset -> transmissions so far
+        self.last_wire_bytes = 0
+        # Receiving side: each peer's update as reconstructed from its deltas, and
+        # per chunk offset the version last applied
+        self.peer_state: Dict[str, np.ndarray] = {}
+        self.peer_versions: Dict[str, Dict[int, int]] = {}
+        self.desynced_chunks = 0
+        # Terms of the objective
+        self.local_objective = local_objective if local_objective is not None else SquaredLoss(weight=4.0)
+        self.regularizer = regularizer
+        self.gamma = gamma               # Γ, weight of the regularizer
+        self.constraint = constraint
+        self.l1_coupling = l1_coupling   # λ
+        # Over-relaxation: θ̂ = r·θ + (1 - r)·w replaces θ in the update and the dual step
+        self.relaxation = relaxation
+        self._relaxed: Optional[np.ndarray] = None
+        # Residual balancing: ρ is scaled by rho_tau whenever one residual exceeds
+        # rho_mu times the other, within [rho_min, rho_max]
+        self.adaptive_rho = adaptive_rho
+        self.rho_mu = 10.0
+        self.rho_tau = 2.0
+        self.rho_min = 1e-4
+        self.rho_max = 1e4
+        self.primal_residual = np.inf    # ||θ - w|| after the last aggregated round
+        self.dual_residual = np.inf      # ρ·√N·||w - w_prev|| after the last aggregated round
+        self.participants = 1            # N: updates aggregated in the last round
+        self.peer_rho: Dict[str, float] = {} # ρ_j each peer's latest update was computed with
+        # A claimed ρ_j is clipped to within rho_spread of this node's ρ, so a peer cannot
+        # buy itself more than that factor of weight in the aggregation
+        self.rho_spread = 10.0
+        # One block of working memory shared by all steps, and the (peers, block)
+        # matrix a coordinate-wise aggregation stacks each block of updates into
+        self._scratch = np.empty(min(chunk_size, max(dimension, 1)), dtype=self.dtype)
+        self._stack = np.empty((0, 0), dtype=self.dtype)
+        # Abyz: per-round buffer of peer updates, reduced by a robust aggregator
+        self.round = 0
+        self.aggregator = aggregator
+        self.update_buffer: Dict[int, Dict[str, np.ndarray]] = {}
+        self.peer_alpha: Dict[str, float] = {} # Per-peer reliability weights (default 1.0)
+        # Bounded staleness: updates more than `staleness_bound` rounds old are dropped,
+        # younger stale ones are weighted by staleness_decay ** rounds_late
+        self.staleness_bound = staleness_bound
+        self.staleness_decay = staleness_decay
+        self.update_rounds: Dict[int, Dict[str, int]] = {} # Round each buffered update was produced for
+        self.last_update: Dict[str, tuple] = {} # peer -> (round, update): stands in when the peer misses a round
+        # Updates arriving in chunks: (round, peer) -> [buffer, coordinates received (mask), how many]
+        self.partial_updates: Dict[Tuple[int, str], list] = {}
+        self.round_started = time.monotonic()
+        self.stale_accepted = 0
+        self.stale_dropped = 0
+        self._local_time = _STEP_SECONDS.labels("local")
+        self._aggregate_time = _STEP_SECONDS.labels("aggregate")
+        self._dual_time = _STEP_SECONDS.labels("dual")
+
+    def local_step(self, target_vector: Optional[np.ndarray] = None):
         """
         Step 1: Local Computation.
-        Updates θ_i based on local context and current global state.
-        In this implementation, we move θ toward the target_vector while regularizing by w and u.
+        θ_i = argmin α f_i(θ) + λ||θ - w||_1 + (ρ/2)||θ - w + u||²: the prox of
+        α f_i / ρ at w - u, then the L1 coupling's shrinkage toward w (exact
+        for quadratic f_i). target_vector is this round's local data, the
+        center of the default squared loss.
         """
-        # Simplified proximal update
-        self.theta = 0.8 * target_vector + 0.2 * (self.w - self.u)
+        with self._local_time.time():
+            objective = self.local_objective
+            objective.set_target(target_vector)
+            step = self.alpha / self.rho
+            threshold = self.l1_coupling / (self.rho + self.alpha * objective.curvature)
+            relaxed = self._relaxed_buffer()
+            for lo, hi in self._chunks() if objective.separable else [(0, self.dim)]:
+                s = self._work(hi - lo)
+                theta = self.theta[lo:hi]
+                w = self.w[lo:hi]
+                np.subtract(w, self.u[lo:hi], out=s)
+                # The objective reads its target block before writing θ's, so the target may alias θ
+                objective.prox(s, step, out=theta, block=slice(lo, hi))
+                if self.l1_coupling > 0.0:
+                    np.subtract(theta, w, out=s)
+                    soft_threshold(s, threshold, out=theta)
+                    theta += w
+                if relaxed is not None:
+                    np.multiply(w, 1.0 - self.relaxation, out=s)
+                    np.multiply(theta, self.relaxation, out=relaxed[lo:hi])
+                    relaxed[lo:hi] += s
         return self.theta
 
+    @property
+    def theta_hat(self) -> np.ndarray:
+        """The over-relaxed local decision θ̂ (θ itself without over-relaxation)."""
+        if self.relaxation != 1.0 and self._relaxed is not None:
+            return self._relaxed
+        return self.theta
+
+    def _relaxed_buffer(self) -> Optional[np.ndarray]:
+        if self.relaxation == 1.0:
+            return None
+        if self._relaxed is None:
+            self._relaxed = np.zeros(self.dim, dtype=self.dtype)
+        return self._relaxed
+
+    def _work(self, n: int) -> np.ndarray:
+        """n coordinates of working memory: the scratch block, unless a step needs the whole vector."""
+        return self._scratch[:n] if n <= self._scratch.size else np.empty(n, dtype=self.dtype)
+
+    def _chunks(self, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """[start, end) bounds of the chunk_size blocks covering coordinates lo..hi."""
+        hi = self.dim if hi is None else hi
+        for start in range(lo, hi, self.chunk_size):
+            yield start, min(start + self.chunk_size, hi)
+
     def global_update(self, aggregated_deltas: np.ndarray):
         """
         Step 3: Global Consensus.
         Updates the global state w based on aggregated data from the mesh.
         """
-        # w^{k+1} = Π_C (Abyz({T_i d_i^{k+1}}) - (Γ/ρ) ∇Ω(w^k))
-        # Simplified for single node/initial test
-        self.w = aggregated_deltas
+        # w^{k+1} = Π_C(prox_{ΓΩ/ρ}(Abyz({T_i d_i^{k+1}})))
+        self._apply_global(0, self.dim, self._regularize(np.array(aggregated_deltas, dtype=np.float64)))
+        return self.w
+
+    def _regularize(self, block: np.ndarray, lo: int = 0, hi: Optional[int] = None,
+                    weight: Optional[float] = None) -> np.ndarray:
+        """
+        Applies Ω and C to the aggregate of coordinates lo..hi in place. With
+        `weight` the total penalty weight of the aggregated updates (Σ ρ_j
+        times their reliability weights; ρ for a single update), the prox step
+        is Γ/weight, as in the w-update of consensus ADMM. Projecting after
+        the prox is exact for the operators in .prox.
+        """
+        block_slice = slice(lo, self.dim if hi is None else hi)
+        if self.regularizer is not None:
+            weight = self.rho if weight is None else weight
+            self.regularizer.prox(block, self.gamma / weight, out=block, block=block_slice)
+        if self.constraint is not None:
+            self.constraint.prox(block, out=block, block=block_slice)
+        return block
+
+    def _apply_global(self, lo: int, hi: int, block: np.ndarray) -> Tuple[float, float]:
+        """
+        Writes the aggregate for coordinates lo..hi into w in place. Returns
+        the block's squared contributions to ||w - w_prev|| and ||θ - w||.
+        """
+        dual_sq = primal_sq = 0.0
+        for a, b in self._chunks(lo, hi):
+            s = self._scratch[:b - a]
+            w = self.w[a:b]
+            np.subtract(block[a - lo:b - lo], w, out=s)
+            dual_sq += float(np.dot(s, s))
+            w[...] = block[a - lo:b - lo]
+            np.subtract(self.theta[a:b], w, out=s)
+            primal_sq += float(np.dot(s, s))
+        return dual_sq, primal_sq
+
+    def submit_update(self, peer_id: str, update: np.ndarray, round_id: Optional[int] = None) -> bool:
+        """
+        Buffers a peer's update d_j for aggregation. Each peer contributes at most
+        one update per round; a later submission for the same round replaces it.
+        Updates for a round that has already been aggregated are carried into the
+        current round unless they exceed the staleness bound or that peer has
+        already submitted a fresher one. Returns whether the update was buffered.
+        """
+        update = np.array(update, dtype=self.dtype)  # Owned: callers may reuse their array
+        if update.shape != (self.dim,):
+            raise ValueError(f"Expected an update of dimension {self.dim}, got shape {update.shape}")
+        return self._buffer_update(peer_id, update, self.round if round_id is None else round_id)
+
+    def _buffer_update(self, peer_id: str, update: np.ndarray, origin: int) -> bool:
+        """submit_update for an array the engine owns."""
+        target = max(origin, self.round)
+        if origin < self.round:
+            if self.staleness_bound is not None and self.round - origin > self.staleness_bound:
+                self.stale_dropped += 1
+                _STALE_UPDATES.labels("dropped").inc()
+                return False
+            if self.update_rounds.get(target, {}).get(peer_id, -1) >= origin:
+                return False
+            self.stale_accepted += 1
+            _STALE_UPDATES.labels("accepted").inc()
+        self.update_buffer.setdefault(target, {})[peer_id] = update
+        self.update_rounds.setdefault(target, {})[peer_id] = origin
+        if self.staleness_bound is not None and origin >= self.last_update.get(peer_id, (-1,))[0]:
+            self.last_update[peer_id] = (origin, update)
+        return True
+
+    def submit_chunk(self, peer_id: str, offset: int, values: np.ndarray,
+                     round_id: Optional[int] = None) -> bool:
+        """
+        Buffers coordinates offset..offset+len(values) of a peer's update. The
+        update is submitted (as by submit_update) once every coordinate has
+        arrived. A chunk whose coordinates have all arrived already is a
+        repeat and ignored; one that overlaps them only in part raises
+        ValueError. Returns whether the chunk completed the update and it was
+        buffered.
+        """
+        values = np.asarray(values)
+        end = offset + values.size
+        if offset < 0 or end > self.dim:
+            raise ValueError(f"Chunk [{offset}, {end}) is outside dimension {self.dim}")
+        if offset == 0 and end == self.dim:
+            return self.submit_update(peer_id, values, round_id)
+        origin = self.round if round_id is None else round_id
+        key = (origin, peer_id)
+        partial = self.partial_updates.get(key)
+        if partial is None:
+            partial = self.partial_updates[key] = [np.empty(self.dim, dtype=self.dtype),
+                                                   np.zeros(self.dim, dtype=bool), 0]
+        buffer, received, _ = partial
+        seen = np.count_nonzero(received[offset:end])
+        if seen == values.size:
+            return False
+        if seen:
+            raise ValueError(f"Chunk [{offset}, {end}) overlaps coordinates already received from {peer_id}")
+        np.copyto(buffer[offset:end], values, casting="same_kind")
+        received[offset:end] = True
+        partial[2] += values.size
+        if partial[2] < self.dim:
+            return False
+        del self.partial_updates[key]
+        return self._buffer_update(peer_id, buffer, origin)
+
+    def receive_chunk(self, peer_id: str, offset: int, values: np.ndarray, seq: int, base: int,
+                      round_id: Optional[int] = None) -> bool:
+        """
+        Applies one chunk a peer sent with iter_update_chunks to this node's
+        reconstruction of the peer's update, then submits the reconstructed
+        chunk (see submit_chunk). A keyframe (base -1) replaces the chunk; a
+        delta is added if it builds on the version last applied. A delta that
+        does not (one before it was lost) is ignored, and the chunk stays out
+        of sync until the peer's next keyframe.
+        """
+        values = np.asarray(values)
+        end = offset + values.size
+        if offset < 0 or end > self.dim:
+            raise ValueError(f"Chunk [{offset}, {end}) is outside dimension {self.dim}")
+        state = self.peer_state.get(peer_id)
+        if state is None:
+            state = self.peer_state[peer_id] = np.zeros(self.dim, dtype=self.dtype)
+            self.peer_versions[peer_id] = {}
+        versions = self.peer_versions[peer_id]
+        if versions.get(offset) == seq:
+            return False  # Duplicate delivery
+        if base < 0:
+            np.copyto(state[offset:end], values, casting="same_kind")
+        elif versions.get(offset) == base:
+            state[offset:end] += values
+        else:
+            self.desynced_chunks += 1
+            return False
+        versions[offset] = seq
+        return self.submit_chunk(peer_id, offset, state[offset:end], round_id)
+
+    def fresh_updates(self) -> int:
+        """Number of buffered updates produced for the current round (stale carry-overs excluded)."""
+        return sum(1 for r in self.update_rounds.get(self.round, {}).values() if r == self.round)
+
+    def aggregate_round(self, method: Optional[str] = None, **kwargs) -> np.ndarray:
+        """
+        Step 3 over the buffered round: w^{k+1} = Abyz({d_j}), with every peer
+        weighted by its reliability α_j and its penalty ρ_j, discounted for
+        staleness. Advances the round counter.
+        With a staleness bound, a peer missing from the round is represented by
+        its most recent update if that is within the bound (bounded-delay ADMM),
+        so every node aggregates over the same peers even when rounds close
+        before all of them have reported.
+        """
+        updates = self.update_buffer.pop(self.round, None)
+        origins = self.update_rounds.pop(self.round, {})
+        if not updates:
+            return self.w
+        start = time.perf_counter()
+        if self.staleness_bound is not None:
+            for peer, (origin, update) in list(self.last_update.items()):
+                if self.round - origin > self.staleness_bound:
+                    del self.last_update[peer]
+                elif peer not in updates:
+                    updates[peer] = update
+                    origins[peer] = origin
+        peers = list(updates)
+        weights = np.array([
+            self.peer_alpha.get(p, 1.0) * self.peer_rho.get(p, self.rho)
+            * self.staleness_decay ** (self.round - origins.get(p, self.round))
+            for p in peers
+        ])
+        method = method or self.aggregator
+        weight = float(weights.sum())
+        dual_sq = primal_sq = 0.0
+        separable = all(op.separable for op in (self.regularizer, self.constraint) if op is not None)
+        if method in COORDINATE_WISE:
+            # Separable per coordinate: aggregate block by block through one reused stack
+            if self._stack.shape != (len(peers), self._scratch.size):
+                self._stack = np.empty((len(peers), self._scratch.size), dtype=self.dtype)
+            full = None if separable else np.empty(self.dim)
+            for lo, hi in self._chunks():
+                stacked = np.stack([updates[p][lo:hi] for p in peers], out=self._stack[:, :hi - lo])
+                block = aggregate(method, stacked, weights, **kwargs)
+                if full is not None:
+                    full[lo:hi] = block
+                    continue
+                block_dual, block_primal = self._apply_global(lo, hi, self._regularize(block, lo, hi, weight))
+                dual_sq += block_dual
+                primal_sq += block_primal
+            if full is not None:
+                # Ω or C couples coordinates (e.g. the simplex): apply it to the whole aggregate
+                dual_sq, primal_sq = self._apply_global(0, self.dim, self._regularize(full, weight=weight))
+        else:
+            # Krum and the geometric median compare whole update vectors
+            stacked = np.stack([updates[p] for p in peers])
+            full = aggregate(method, stacked, weights, **kwargs)
+            dual_sq, primal_sq = self._apply_global(0, self.dim, self._regularize(full, weight=weight))
+        # The dual residual stacks every participant's ρ·(w - w_prev), as in BatchedADMMEngine
+        self.participants = len(peers)
+        self.primal_residual = float(np.sqrt(primal_sq))
+        self.dual_residual = float(self.rho * np.sqrt(self.participants * dual_sq))
+        self.round += 1
+        self.round_started = time.monotonic()
+        # Anything older than the new round can no longer be aggregated
+        for buffer in (self.update_buffer, self.update_rounds):
+            for r in [r for r in buffer if r < self.round]:
+                del buffer[r]
+        # Incomplete chunked updates that could no longer be accepted once complete
+        horizon = self.round - (self.staleness_bound if self.staleness_bound is not None else 1)
+        for key in [key for key in self.partial_updates if key[0] < horizon]:
+            del self.partial_updates[key]
+        self._aggregate_time.observe(time.perf_counter() - start)
+        _PRIMAL_RESIDUAL.set(self.primal_residual)
+        _DUAL_RESIDUAL.set(self.dual_residual)
+        _ROUND.set(self.round)
         return self.w
 
     def dual_update(self):
@@ -42,8 +417,87 @@ class ADMMEngine:
         Step 4: Dual Variable Update.
         u_i^{k+1} = u_i^k + θ_i^{k+1} - w^{k+1}
         """
-        self.u = self.u + self.theta - self.w
+        theta = self.theta_hat
+        with self._dual_time.time():
+            for lo, hi in self._chunks():
+                u = self.u[lo:hi]
+                u += theta[lo:hi]
+                u -= self.w[lo:hi]
+        if self.adaptive_rho:
+            self.balance_rho()
         return self.u
 
+    def balance_rho(self) -> float:
+        """
+        Residual balancing: raises ρ when the primal residual dominates the
+        dual one by more than rho_mu, lowers it in the opposite case. u is the
+        scaled dual (y/ρ), so it is rescaled to keep y unchanged. Each node
+        balances its own ρ; peers weight its updates by the new value once it
+        is sent with them. A node only sees its own primal residual, which
+        for N alike participants is the stacked one divided by √N, so it is
+        scaled up to match the dual residual. Returns the new ρ.
+        """
+        primal = self.primal_residual * np.sqrt(self.participants)
+        rho = residual_balanced_rho(self.rho, primal, self.dual_residual,
+                                    self.rho_mu, self.rho_tau, self.rho_min, self.rho_max)
+        if rho != self.rho:
+            self.u *= self.rho / rho
+            self.rho = rho
+            _RHO.set(rho)
+        return self.rho
+
+    def set_peer_rho(self, peer_id: str, rho: float) -> float:
+        """Records the ρ a peer's updates are computed with; returns the value used."""
+        rho = float(rho)
+        if not np.isfinite(rho) or rho <= 0.0:
+            raise ValueError(f"Penalty parameter must be positive and finite, got {rho}")
+        rho = min(max(rho, self.rho / self.rho_spread), self.rho * self.rho_spread)
+        self.peer_rho[peer_id] = rho
+        return rho
+
+    def encode_update(self, codec, offset: int = 0, size: Optional[int] = None,
+                      keyframe: bool = False) -> Dict[str, Any]:
+        """
+        Step 2: Secure Communication.
+        d_i^{k+1} = S(Q(θ̂_i^{k+1} + u_i^k))
+        Sent as a delta against `reference`, what peers have reconstructed so
+        far, which then advances by the decoded delta. Whatever the codec
+        loses (quantization error, dropped top-k coordinates) therefore stays
+        in the next delta, and a receiver that adds up the deltas tracks the
+        update itself. A keyframe sends the update whole, without top-k.
+        Encodes coordinates offset..offset+size (the whole vector by default).
+        """
+        end = self.dim if size is None else min(self.dim, offset + size)
+        message = self._work(end - offset)
+        np.add(self.theta_hat[offset:end], self.u[offset:end], out=message)
+        reference = self.reference[offset:end]
+        if not keyframe:
+            message -= reference
+        payload = codec.encode(message, sparsify=not keyframe)
+        decoded = codec.decode(payload)
+        if keyframe:
+            np.copyto(reference, decoded, casting="same_kind")
+        else:
+            reference += decoded
+        self.last_wire_bytes = codec.last_wire_bytes
+        return payload
+
+    def iter_update_chunks(self, codec) -> Iterator[Dict[str, Any]]:
+        """
+        Step 2 in chunk_size blocks: yields one payload per block for a
+        receiver's receive_chunk, tagged with its "offset", its version "seq"
+        and the version it builds on, "base" (-1 for a keyframe). Top-k
+        sparsification is applied within each block.
+        """
+        for lo, hi in self._chunks():
+            version = self._sent_versions.get(lo, 0)
+            keyframe = version % self.keyframe_every == 0
+            payload = self.encode_update(codec, lo, hi - lo, keyframe=keyframe)
+            payload["offset"] = lo
+            payload["seq"] = version
+            payload["base"] = -1 if keyframe else version - 1
+            self._sent_versions[lo] = version + 1
+            yield payload
+
     def get_consensus_state(self) -> np.ndarray:
         return self.w
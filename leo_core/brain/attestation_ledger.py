@@ -0,0 +1,277 @@
+import bisect
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# One fixed-width little-endian record per attested fragment. `logged_at` is
+# non-decreasing within the ledger, so every segment is sorted by it; `com`
+# is the raw 32-byte commitment digest (SHA-256 or Merkle root).
+RECORD_DTYPE = np.dtype([
+    ("logged_at", "<f8"),   # When the ledger recorded the fragment
+    ("timestamp", "<f8"),   # The fragment's own timestamp
+    ("node", "<u4"),        # Row in the ledger's node table
+    ("round", "<i4"),       # Consensus round, -1 if unknown
+    ("slmcs", "<f4"),
+    ("noise_norm", "<f4"),
+    ("lcs", "u1"),
+    ("valid", "u1"),        # Verification outcome
+    ("scheme", "u1"),       # COM_SCHEMES index
+    ("_pad", "V5"),
+    ("com", "V32"),
+])
+# Sealed segments are indexed by (node, row), sorted; rows of a node stay in time order
+INDEX_DTYPE = np.dtype([("node", "<u4"), ("row", "<u4")])
+COM_SCHEMES = ("sha256", "merkle")
+
+
+def _digest(com: Any) -> bytes:
+    """Hex commitment -> raw 32 bytes; anything malformed is stored as zeros."""
+    try:
+        raw = bytes.fromhex(com)
+    except (TypeError, ValueError):
+        return bytes(32)
+    return raw if len(raw) == 32 else bytes(32)
+
+
+class _Segment:
+    def __init__(self, path: str, number: int):
+        self.number = number
+        self.log_path = os.path.join(path, f"segment.{number:06d}.log")
+        self.index_path = os.path.join(path, f"segment.{number:06d}.idx")
+        self.count = 0
+        self._records: Optional[np.memmap] = None
+        self._mapped = 0
+        self._index: Optional[np.memmap] = None
+
+    def records(self) -> np.ndarray:
+        """The segment's records, mapped read-only (re-mapped when the segment has grown)."""
+        if self.count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        if self._records is None or self._mapped != self.count:
+            self._records = np.memmap(self.log_path, dtype=RECORD_DTYPE, mode="r", shape=(self.count,))
+            self._mapped = self.count
+        return self._records
+
+    def index(self) -> Optional[np.memmap]:
+        if self._index is None and os.path.exists(self.index_path):
+            n = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+            if n:
+                self._index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(n,))
+        return self._index
+
+    def build_index(self):
+        records = self.records()
+        order = np.argsort(records["node"], kind="stable")
+        index = np.empty(order.size, dtype=INDEX_DTYPE)
+        index["node"] = records["node"][order]
+        index["row"] = order
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(index.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.index_path)
+
+    def time_range(self, since: float, until: float):
+        """Row range [lo, hi) with since <= logged_at < until, by bisection on the mapped column."""
+        times = self.records()["logged_at"]
+        return bisect.bisect_left(times, since), bisect.bisect_left(times, until)
+
+    def release(self):
+        self._records = self._index = None
+
+
+class AttestationLedger:
+    """
+    Append-only log of verified ZKF fragments, for auditing and for scoring
+    peers over time windows.
+
+    Records are fixed-width binary (RECORD_DTYPE) appended to the active
+    segment; once it holds `segment_records` records it is sealed, given a
+    (node, row) index file, and a new segment starts. Node ids are interned
+    in an append-only `nodes.txt`. Segments are memory-mapped for queries:
+    a time window is located by bisection on the sorted logged_at column and
+    a node's history through the sealed segments' index, so queries only
+    touch the records they return. `max_segments` bounds retention by
+    deleting the oldest sealed segments.
+    """
+
+    def __init__(self, path: str, segment_records: int = 65536,
+                 max_segments: Optional[int] = None, fsync: bool = False):
+        self.path = path
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        self._nodes_path = os.path.join(path, "nodes.txt")
+        self.nodes: List[str] = []
+        if os.path.exists(self._nodes_path):
+            with open(self._nodes_path, "r", encoding="utf-8") as f:
+                self.nodes = [line.rstrip("\n") for line in f if line.endswith("\n")]
+        self._node_ids = {node: i for i, node in enumerate(self.nodes)}
+
+        numbers = sorted(int(name.split(".")[1]) for name in os.listdir(path)
+                         if name.startswith("segment.") and name.endswith(".log"))
+        self.segments = [_Segment(path, n) for n in numbers] or [_Segment(path, 0)]
+        for segment in self.segments:
+            if os.path.exists(segment.log_path):
+                size = os.path.getsize(segment.log_path)
+                if size % RECORD_DTYPE.itemsize:
+                    # Torn final record from a crash mid-append
+                    with open(segment.log_path, "r+b") as f:
+                        f.truncate(size - size % RECORD_DTYPE.itemsize)
+                segment.count = size // RECORD_DTYPE.itemsize
+        for segment in self.segments[:-1]:
+            if segment.index() is None and segment.count:
+                segment.build_index()
+        active = self.segments[-1]
+        self._last_logged = float(active.records()["logged_at"][-1]) if active.count else 0.0
+        self._log = open(active.log_path, "ab")
+
+    def __len__(self) -> int:
+        return sum(s.count for s in self.segments)
+
+    def _intern(self, node: str) -> int:
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            with open(self._nodes_path, "a", encoding="utf-8") as f:
+                f.write(node.replace("\n", " ") + "\n")
+            node_id = self._node_ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return node_id
+
+    def append(self, fragment: Dict[str, Any], valid: bool, node: Optional[str] = None,
+               round_id: int = -1):
+        self.append_many([fragment], [valid], [node], [round_id])
+
+    def append_many(self, fragments: List[Dict[str, Any]], valid, nodes: Optional[List[Optional[str]]] = None,
+                    rounds: Optional[List[int]] = None):
+        """
+        Records a batch of verified fragments (e.g. one verify_batch call) in
+        a single write. `nodes` names who sent each fragment; the fragment's
+        own node_id is used where it is None.
+        """
+        n = len(fragments)
+        if n == 0:
+            return
+        records = np.zeros(n, dtype=RECORD_DTYPE)
+        records["timestamp"] = [f.get("timestamp", 0.0) for f in fragments]
+        records["round"] = rounds if rounds is not None else -1
+        records["slmcs"] = [f.get("slmcs", 0.0) for f in fragments]
+        records["noise_norm"] = [np.linalg.norm(np.asarray(f.get("noise", []), dtype=np.float64))
+                                 for f in fragments]
+        records["lcs"] = [f.get("lcs") == 1 for f in fragments]
+        records["valid"] = np.asarray(valid, dtype=bool)
+        records["scheme"] = [COM_SCHEMES.index(f.get("com_scheme", "sha256")) for f in fragments]
+        records["com"] = np.frombuffer(b"".join(_digest(f.get("com")) for f in fragments), dtype="V32")
+        with self._lock:
+            records["node"] = [
+                self._intern(str((nodes[i] if nodes is not None else None) or f.get("node_id", "")))
+                for i, f in enumerate(fragments)
+            ]
+            self._last_logged = max(self._last_logged, time.time())
+            records["logged_at"] = self._last_logged
+            start = 0
+            while start < n:
+                active = self.segments[-1]
+                take = min(n - start, self.segment_records - active.count)
+                self._log.write(records[start:start + take].tobytes())
+                self._log.flush()
+                if self.fsync:
+                    os.fsync(self._log.fileno())
+                active.count += take
+                start += take
+                if active.count >= self.segment_records:
+                    self._rotate()
+
+    def _rotate(self):
+        """Seals the active segment with its node index and opens the next one."""
+        self._log.close()
+        sealed = self.segments[-1]
+        sealed.build_index()
+        self.segments.append(_Segment(self.path, sealed.number + 1))
+        self._log = open(self.segments[-1].log_path, "ab")
+        if self.max_segments is not None:
+            while len(self.segments) > max(1, self.max_segments):
+                oldest = self.segments.pop(0)
+                oldest.release()
+                for path in (oldest.log_path, oldest.index_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def _overlapping(self, since: float, until: float):
+        """(segment, lo, hi) for every segment with records in [since, until)."""
+        for segment in self.segments:
+            if segment.count == 0:
+                continue
+            records = segment.records()
+            if records["logged_at"][-1] < since or records["logged_at"][0] >= until:
+                continue
+            lo, hi = segment.time_range(since, until)
+            if hi > lo:
+                yield segment, lo, hi
+
+    def window(self, since: float, until: Optional[float] = None) -> np.ndarray:
+        """Copies of the records logged in [since, until)."""
+        until = np.inf if until is None else until
+        with self._lock:
+            parts = [np.array(s.records()[lo:hi]) for s, lo, hi in self._overlapping(since, until)]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+
+    def node_history(self, node: str, since: float = 0.0, until: Optional[float] = None) -> np.ndarray:
+        """A node's records logged in [since, until), through the sealed segments' indexes."""
+        until = np.inf if until is None else until
+        with self._lock:
+            node_id = self._node_ids.get(node)
+            if node_id is None:
+                return np.zeros(0, dtype=RECORD_DTYPE)
+            parts = []
+            for segment, lo, hi in self._overlapping(since, until):
+                records = segment.records()
+                index = segment.index()
+                if index is None:
+                    # Active segment: bounded by segment_records, filter the window directly
+                    rows = lo + np.flatnonzero(records["node"][lo:hi] == node_id)
+                else:
+                    nodes = index["node"]
+                    a, b = bisect.bisect_left(nodes, node_id), bisect.bisect_right(nodes, node_id)
+                    rows = np.asarray(index["row"][a:b], dtype=np.int64)
+                    rows = rows[(rows >= lo) & (rows < hi)]
+                parts.append(np.array(records[rows]))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+
+    def attestation_rates(self, window_s: float, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Per-node attestation counts over the last `window_s` seconds:
+        attestations, valid ones, their ratio and attestations per minute.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            n_nodes = len(self.nodes)
+            total = np.zeros(n_nodes)
+            valid = np.zeros(n_nodes)
+            for segment, lo, hi in self._overlapping(now - window_s, np.inf):
+                records = segment.records()[lo:hi]
+                total += np.bincount(records["node"], minlength=n_nodes)
+                valid += np.bincount(records["node"], weights=records["valid"], minlength=n_nodes)
+            nodes = list(self.nodes)
+        return {
+            nodes[i]: {
+                "attestations": int(total[i]),
+                "valid": int(valid[i]),
+                "valid_ratio": float(valid[i] / total[i]),
+                "per_minute": float(total[i] * 60.0 / window_s),
+            }
+            for i in np.flatnonzero(total)
+        }
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+            for segment in self.segments:
+                segment.release()
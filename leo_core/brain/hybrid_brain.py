@@ -1,32 +1,175 @@
 import os
 import json
+import logging
+import math
+import threading
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import numpy as np
 from .admm_engine import ADMMEngine
+from .admm_checkpoint import ADMMCheckpoint
+from .attestation_ledger import AttestationLedger
+from .selc import OperatorRegistry, CircuitPlanner
 from .zkf_layer import ZKFLayer
-from ..network.p2p_node import P2PNode
+from .update_codec import DEFAULT_PREFERENCES, UpdateCodec, local_capabilities, negotiate_codec
+from ..telemetry.metrics import REGISTRY
+from ..telemetry.tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_SECONDS = REGISTRY.histogram("leo_brain_request_seconds", "End-to-end pipeline latency per tick")
+_REQUESTS = REGISTRY.counter("leo_brain_requests_total", "Requests run through the cognitive pipeline")
+_ROUND_CLOSES = REGISTRY.counter("leo_brain_round_closes_total", "Consensus rounds closed, by trigger", ["reason"])
+_UPDATES_RECEIVED = REGISTRY.counter("leo_brain_updates_received_total", "ADMM updates received from peers")
 
 class HybridBrain:
     """
     Project LEO: Layered Emergent Organism
     A Decentralized Cognitive Architecture.
     """
+
+    # State produced by the consensus operator, shared across a micro-batch
+    _CONSENSUS_KEYS = ("local_theta", "consensus_state", "consensus_value", "update_codec", "update_bytes")
     
-    def __init__(self, memory, p2p_port: int = 5000):
+    def __init__(self, memory, p2p_port: int = 5000, network_mode: str = "thread",
+                 gossip: bool = False, gossip_fanout: int = 3,
+                 checkpoint_path: Optional[str] = None, checkpoint_every: int = 20,
+                 ledger_path: Optional[str] = None,
+                 admm_dimension: int = 64, admm_dtype: str = "float64",
+                 admm_options: Optional[Dict[str, Any]] = None):
         self.memory = memory
+        # Guards the ADMM state against network callbacks and the round timer. It is held
+        # only while the state changes, so a tick never stalls the network event loop;
+        # ticks are serialized among themselves by the pipeline lock.
+        self._lock = threading.RLock()
+        self._pipeline_lock = threading.Lock()
         self.identity = self._load_identity()
         self.cognitive_load = 0.0
         self.risk_threshold = 0.7
-        self.admm = ADMMEngine(dimension=64) # Consensus engine
-        self.zkf = ZKFLayer(node_id=self.identity.get("name", "LEO-Node")) # ZKF Layer
-        self.p2p = P2PNode(port=p2p_port) # Networking layer
-        self.p2p.on_message_received = self._handle_network_message
-        self.p2p.start()
+        # Consensus engine; large shared states are stepped and broadcast in chunks.
+        # admm_options are passed on to it (objective terms, relaxation, adaptive_rho, ...)
+        self.admm = ADMMEngine(dimension=admm_dimension, staleness_bound=2, dtype=admm_dtype,
+                               **(admm_options or {}))
+        # Round protocol: a round closes once a quorum of the participants (this node and
+        # the peers whose updates reach it) has sent a fresh update for it, or when its
+        # deadline passes. Requests never wait for it. One round is open at a time.
+        self.round_quorum = 2 / 3
+        self.round_deadline_ms = 200.0
+        self._contributed_round = -1
+        self.round_closes = {"quorum": 0, "deadline": 0}
+        self._heard_round: Dict[str, int] = {}  # Peer -> open round when its last update arrived
+        # Deadlines are enforced by a timer thread while the network runs, not only when
+        # a request or message happens to arrive
+        self._round_timer: Optional[threading.Thread] = None
+        self._round_timer_stop = threading.Event()
+        # Warm restart: the engine state is checkpointed every `checkpoint_every` rounds and
+        # when the network stops, and restored here so a restarted node resumes where it was
+        self.checkpoint = ADMMCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = checkpoint_every
+        if self.checkpoint is not None:
+            self.checkpoint.restore(self.admm)
+        # Local objective for the consensus step; None draws a fresh random target each round
+        self.consensus_target: Optional[np.ndarray] = None
+        # ZKF Layer; with a ledger, every attestation is logged and peers' recent valid
+        # ratios become their reliability weights in the aggregation
+        self.zkf = ZKFLayer(node_id=self.identity.get("name", "LEO-Node"),
+                            ledger=AttestationLedger(ledger_path) if ledger_path else None)
+        self.reliability_window_s = 300.0
+        # Networking layer: "thread" (one socket thread per peer) or "asyncio" (single event loop).
+        # The node is bound on first use (see the p2p property) or by start_network().
+        self.network_mode = network_mode
+        # Gossip overlay: epidemic broadcast with discovered membership instead of a static peer list
+        self.gossip = gossip
+        self.gossip_fanout = gossip_fanout
+        self.p2p_host = '127.0.0.1'
+        self.p2p_port = p2p_port
+        self._p2p = None
+        self.node_address = f"{self.p2p_host}:{self.p2p_port}"
+
+        # Update codec negotiation: first preference every known peer can decode wins
+        lossless = "float32" if self.admm.dtype == np.float32 else "float64"
+        self.codec_preferences = [spec if spec != "float64" else lossless for spec in DEFAULT_PREFERENCES]
+        self.peer_capabilities: Dict[str, set] = {}
+        self._codecs: Dict[str, UpdateCodec] = {}
         
         # SELC: Self-Evolving Local Circuits
         # Default circuit: Encoding -> Memory -> Planning -> Safety -> Consensus -> ZKF
         self.current_circuit = ["ENC", "MEM", "PLAN", "SAFETY", "CONS", "ZKF"]
+        self.latency_budget_ms: Optional[float] = None
+        # Every operator is timed on each call; the planner prunes optional
+        # operators from measured costs when a latency budget is set.
+        self.selc = OperatorRegistry()
+        self.selc.register("ENC", self._op_encode, required=True)
+        self.selc.register("MEM", self._op_memory_reconciliation, priority=30)
+        self.selc.register("PLAN", self._op_predictive_planning, priority=10)
+        self.selc.register("SAFETY", self._op_safety_filter, required=True)
+        self.selc.register("CONS", self._op_admm_consensus, priority=40)
+        self.selc.register("ZKF", self._op_zkf_verification, priority=20)
+        self.planner = CircuitPlanner(self.selc)
+
+    @property
+    def p2p(self):
+        """The networking layer, started on first access."""
+        if self._p2p is None:
+            self.start_network()
+        return self._p2p
+
+    @property
+    def network_started(self) -> bool:
+        return self._p2p is not None
+
+    def start_network(self, node=None):
+        """
+        Binds the P2P node now instead of on first use (e.g. for a node that must accept peers).
+        `node` replaces the layer selected by network_mode with a pre-built, not yet
+        started one exposing the same surface (e.g. the cluster simulator's fault injector).
+        With gossip enabled, either one is wrapped in a GossipNode.
+        """
+        with self._lock:
+            if self._p2p is not None:
+                return
+            if node is None and self.network_mode == "asyncio":
+                from ..network.async_node import AsyncP2PNode
+                node = AsyncP2PNode(host=self.p2p_host, port=self.p2p_port)
+            elif node is None:
+                from ..network.p2p_node import P2PNode
+                node = P2PNode(host=self.p2p_host, port=self.p2p_port)
+            if self.gossip:
+                from ..network.gossip import GossipNode
+                # Codec capabilities travel with the membership records
+                node = GossipNode(node, fanout=self.gossip_fanout,
+                                  metadata={"caps": sorted(local_capabilities())})
+                node.on_member_update = self._handle_member_update
+            node.on_message_received = self._handle_network_message
+            node.start()
+            self._p2p = node
+            self._round_timer_stop.clear()
+            self._round_timer = threading.Thread(target=self._run_round_timer, daemon=True)
+            self._round_timer.start()
+
+    def stop_network(self):
+        if self._round_timer is not None:
+            self._round_timer_stop.set()
+            self._round_timer.join(timeout=5)
+            self._round_timer = None
+        if self._p2p is not None:
+            self._p2p.stop()
+            self._p2p = None
+        self.save_checkpoint()
+
+    def _run_round_timer(self):
+        # A quarter of the deadline: a round closes at most that late
+        while not self._round_timer_stop.wait(self.round_deadline_ms / 4000.0):
+            with self._lock:
+                self._maybe_close_round()
+
+    def save_checkpoint(self) -> bool:
+        """Checkpoints the consensus state now, if checkpointing is enabled."""
+        if self.checkpoint is None:
+            return False
+        with self._lock:
+            self.checkpoint.save(self.admm)
+        return True
 
     def _load_identity(self) -> Dict[str, Any]:
         identity_path = "data/identity.json"
@@ -35,44 +178,70 @@ class HybridBrain:
                 return json.load(f)
         return {"name": "LEO", "org": "Kadropic Labs"}
 
-    def process_request(self, request: str) -> str:
+    def process_request(self, request: str, latency_budget_ms: Optional[float] = None) -> str:
         """
         Executes the cognitive pipeline defined by the current SELC circuit.
+        With a latency budget (per call, or set through update_circuit), the
+        circuit is first pruned to fit the operators' measured costs.
         """
-        # Dynamic context retrieval based on the request
-        state = {"input": request, "context": self.memory.get_context(query=request)}
-        
-        # Add to STM
-        self.memory.add_to_stm("user", request)
-        
-        print(f"[SELC] Executing Circuit: {' -> '.join(self.current_circuit)}")
-        
-        for op in self.current_circuit:
-            state = self._execute_op(op, state)
+        return self.process_batch([request], latency_budget_ms)[0]
+
+    def process_batch(self, requests: List[str], latency_budget_ms: Optional[float] = None) -> List[str]:
+        """
+        Runs the circuit for several in-flight requests as one tick.
+        Context retrieval is a single batched LTM query and the consensus
+        operator runs one ADMM step shared by the whole batch; the remaining
+        operators run per request.
+        """
+        with self._pipeline_lock, TRACER.span("brain.tick", batch_size=len(requests)) as tick:
+            start = time.perf_counter()
+            # Dynamic context retrieval based on the requests
+            with TRACER.span("memory.get_contexts"):
+                contexts = self.memory.get_contexts(requests)
             
-        # Add response to STM
-        response = state.get("response", "Internal Processing Error")
-        self.memory.add_to_stm("leo", response)
-        
-        return response
+            budget = latency_budget_ms if latency_budget_ms is not None else self.latency_budget_ms
+            circuit = self.planner.plan(self.current_circuit, budget)
+            tick.set("circuit", circuit)
+            tick.set("round", self.admm.round)
+            
+            responses = []
+            shared_consensus = None
+            for request, context in zip(requests, contexts):
+                with TRACER.span("brain.request"):
+                    state = {"input": request, "context": context}
+                    # Add to STM
+                    self.memory.add_to_stm("user", request)
+                    
+                    for op in circuit:
+                        if op == "CONS" and shared_consensus is not None:
+                            state.update(shared_consensus)
+                            continue
+                        state = self._execute_op(op, state)
+                        if op == "CONS":
+                            shared_consensus = {k: state[k] for k in self._CONSENSUS_KEYS if k in state}
+                        
+                    # Add response to STM
+                    response = state.get("response") or self._compose_response(state, "SKIPPED")
+                    self.memory.add_to_stm("leo", response)
+                    responses.append(response)
+            
+            elapsed = time.perf_counter() - start
+            for _ in requests:
+                self.selc.record_circuit(circuit, elapsed * 1000.0)
+            _REQUEST_SECONDS.observe(elapsed)
+            _REQUESTS.inc(len(requests))
+        return responses
 
     def _execute_op(self, op: str, state: Dict) -> Dict:
         """
         Mapping SELC operators to cognitive functions.
         """
-        if op == "ENC":
-            return self._op_encode(state)
-        elif op == "MEM":
-            return self._op_memory_reconciliation(state)
-        elif op == "PLAN":
-            return self._op_predictive_planning(state)
-        elif op == "SAFETY":
-            return self._op_safety_filter(state)
-        elif op == "CONS":
-            return self._op_admm_consensus(state)
-        elif op == "ZKF":
-            return self._op_zkf_verification(state)
-        return state
+        with TRACER.span(f"op.{op}"):
+            return self.selc.execute(op, state)
+
+    def get_selc_telemetry(self) -> Dict[str, Any]:
+        """Per-operator latency percentiles, end-to-end latency and circuit usage."""
+        return self.selc.telemetry()
 
     def _op_encode(self, state: Dict) -> Dict:
         # Transforming raw input into internal representation
@@ -82,6 +251,8 @@ class HybridBrain:
     def _op_memory_reconciliation(self, state: Dict) -> Dict:
         # STM ⇄ LTM Interaction
         state["reconciled_context"] = self.memory.get_context()
+        # Hebbian recall: memories associated with the request through the graph
+        state["associations"] = self.memory.reconcile(state["input"])
         return state
 
     def _op_predictive_planning(self, state: Dict) -> Dict:
@@ -96,68 +267,257 @@ class HybridBrain:
             state["response"] = "[SAFETY BLOCK] Action violates ethical protocols."
         return state
 
+    def connect_to_peer(self, host: str, port: int):
+        """Connects to a peer and advertises the codecs this node can decode."""
+        self.p2p.connect_to_peer(host, port)
+        self.p2p.send_to_peer(host, port, {
+            "type": "CODEC_HELLO",
+            "sender": self.node_address,
+            "caps": sorted(local_capabilities()),
+            "reply": True
+        })
+
+    def _get_codec(self, spec: str) -> UpdateCodec:
+        """
+        Codec for a negotiated or received spec. Raises ValueError for specs
+        outside the capabilities this node advertises in CODEC_HELLO. Only
+        the specs this node itself negotiates are cached, so peers cannot
+        grow the cache.
+        """
+        codec = self._codecs.get(spec)
+        if codec is not None:
+            return codec
+        codec = UpdateCodec(spec)
+        if not codec.components <= local_capabilities():
+            raise ValueError(f"Codec '{spec}' is not among this node's capabilities")
+        if spec == "float64" or spec in self.codec_preferences:
+            self._codecs[spec] = codec
+        return codec
+
+    def _select_codec(self) -> UpdateCodec:
+        """Negotiates the codec for the next broadcast from the peers' advertised capabilities."""
+        # Peers we have not heard from yet are assumed to decode only float64
+        peer_caps = [
+            self.peer_capabilities.get(f"{host}:{port}", {"float64"})
+            for host, port in self.p2p.peers
+        ]
+        return self._get_codec(negotiate_codec(self.codec_preferences, peer_caps))
+
+    def _handle_member_update(self, address: str, status: str, metadata: Dict):
+        """Gossip membership callback: learns the codecs of members we never exchanged hellos with."""
+        if "caps" in metadata:
+            self.peer_capabilities[address] = set(metadata["caps"])
+
     def _handle_network_message(self, message: Dict, address: tuple):
         """Callback for processing incoming consensus updates from peers."""
-        if message.get("type") == "ADMM_UPDATE":
-            remote_theta = np.array(message.get("theta"))
-            # Update global consensus state based on peer data
-            self.admm.global_update(remote_theta)
-            print(f"[Network] Received consensus update from {address}")
+        sender = message.get("sender")
+        if "caps" in message and sender:
+            self.peer_capabilities[sender] = set(message["caps"])
+
+        if message.get("type") == "CODEC_HELLO":
+            if message.get("reply") and sender:
+                host, port = sender.rsplit(":", 1)
+                self.p2p.send_to_peer(host, int(port), {
+                    "type": "CODEC_HELLO",
+                    "sender": self.node_address,
+                    "caps": sorted(local_capabilities()),
+                    "reply": False
+                })
+        elif message.get("type") == "ADMM_UPDATE":
+            payload = message.get("update")
+            try:
+                remote_update = self._get_codec(payload["codec"]).decode(payload)
+            except Exception as e:
+                # Unknown or unadvertised codec, missing fields or corrupt compressed data
+                logger.warning("Dropping undecodable update from %s: %s", address, e)
+                return
+            # Buffer for robust aggregation (large updates arrive in chunks);
+            # a completed update may complete the round's quorum
+            with self._lock:
+                try:
+                    if "rho" in message:
+                        # Adaptive ρ is per node: the update is weighted by the sender's
+                        self.admm.set_peer_rho(sender or str(address), message["rho"])
+                    if "seq" in payload:
+                        # A delta against what this node has reconstructed of the sender's update
+                        self.admm.receive_chunk(sender or str(address), payload["offset"], remote_update,
+                                                payload["seq"], payload["base"], message.get("round"))
+                    else:
+                        self.admm.submit_chunk(sender or str(address), payload.get("offset", 0),
+                                               remote_update, message.get("round"))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning("Dropping malformed update from %s: %s", address, e)
+                    return
+                self._heard_round[sender or str(address)] = self.admm.round
+                self._maybe_close_round()
+            _UPDATES_RECEIVED.inc()
+            logger.debug("Received consensus update from %s", address)
 
     def _op_admm_consensus(self, state: Dict) -> Dict:
-        # Byzantine-Resilient ADMM Consensus
-        target = np.random.rand(64) 
-        
-        # 1. Local Computation
-        local_theta = self.admm.local_step(target)
-        state["local_theta"] = local_theta
-        
-        # 2. Broadcast local update to peers
-        self.p2p.broadcast({
-            "type": "ADMM_UPDATE",
-            "theta": local_theta.tolist()
-        })
+        with self._lock:
+            return self._consensus_step(state)
+
+    def _consensus_step(self, state: Dict) -> Dict:
+        # Byzantine-Resilient ADMM Consensus over numbered rounds
+        round_id = self.admm.round
+        if self._contributed_round != round_id:
+            target = self.consensus_target if self.consensus_target is not None else np.random.rand(self.admm.dim)
+            
+            # 1. Local Computation
+            self.admm.local_step(target)
+            
+            # 2. Quantize/compress and broadcast the local update for this round to peers,
+            #    one message per chunk so no frame grows with the state dimension
+            codec = self._select_codec()
+            caps = sorted(local_capabilities())
+            update_bytes = 0
+            for payload in self.admm.iter_update_chunks(codec):
+                self.p2p.broadcast({
+                    "type": "ADMM_UPDATE",
+                    "sender": self.node_address,
+                    "caps": caps,
+                    "round": round_id,
+                    "rho": self.admm.rho,
+                    "update": payload
+                })
+                # Peers see the reconstruction, not the exact update, so the node aggregates it too
+                lo = payload["offset"]
+                self.admm.submit_chunk(self.node_address, lo, self.admm.reference[lo:lo + payload["dim"]], round_id)
+                update_bytes += self.admm.last_wire_bytes
+            self._contributed_round = round_id
+            state["update_codec"] = codec.spec
+            state["update_bytes"] = update_bytes
+        else:
+            # Already contributed to the open round: serve the latest consensus state
+            state["update_bytes"] = 0
+        # Snapshots: network callbacks keep updating the engine once the lock is released
+        state["local_theta"] = self.admm.theta.copy()
+        state["consensus_state"] = self.admm.w.copy()
         
-        # 3. Global update & Dual update
-        self.admm.global_update(local_theta) # Self-update
-        self.admm.dual_update()
+        # 3. Robust global update & dual update, once the round has its quorum or deadline
+        self._maybe_close_round()
         
         consensus_val = np.mean(self.admm.get_consensus_state())
         state["consensus_value"] = consensus_val
         return state
 
+    def active_senders(self) -> List[str]:
+        """
+        Peers whose updates have reached this node within the engine's
+        staleness bound (in rounds). Only they count toward the quorum: with
+        gossip or a sparse topology, most known members never send to this
+        node directly, and counting them would leave every round to its
+        deadline.
+        """
+        window = self.admm.staleness_bound or 0
+        return [peer for peer, heard in self._heard_round.items() if self.admm.round - heard <= window]
+
+    def _maybe_close_round(self) -> bool:
+        """
+        Closes the open round when a quorum of participants (this node and the
+        active senders) has sent fresh updates for it, or when its deadline has
+        passed with at least one update buffered. Stragglers' updates land in
+        a later round, within the engine's staleness bound.
+        """
+        participants = len(self.active_senders()) + 1
+        needed = max(1, math.ceil(self.round_quorum * participants))
+        if self.admm.fresh_updates() >= needed:
+            reason = "quorum"
+        elif (self.admm.update_buffer.get(self.admm.round)
+              and (time.monotonic() - self.admm.round_started) * 1000.0 >= self.round_deadline_ms):
+            reason = "deadline"
+        else:
+            return False
+        closing = self.admm.round
+        self.admm.aggregate_round()
+        # The dual variable tracks this node's own θ; skip it for rounds it sat out
+        if self._contributed_round == closing:
+            self.admm.dual_update()
+        self.round_closes[reason] += 1
+        _ROUND_CLOSES.labels(reason).inc()
+        if self.zkf.ledger is not None:
+            self.update_peer_reliability()
+        if self.checkpoint is not None and self.admm.round % self.checkpoint_every == 0:
+            self.checkpoint.save(self.admm)
+        return True
+
+    def get_round_telemetry(self) -> Dict[str, Any]:
+        """Round protocol counters: how rounds closed and how stale updates were handled."""
+        with self._lock:
+            return {
+                "round": self.admm.round,
+                "rho": self.admm.rho,
+                "quorum": self.round_quorum,
+                "participants": len(self.active_senders()) + 1,
+                "deadline_ms": self.round_deadline_ms,
+                "closed_by_quorum": self.round_closes["quorum"],
+                "closed_by_deadline": self.round_closes["deadline"],
+                "buffered": len(self.admm.update_buffer.get(self.admm.round, {})),
+                "stale_accepted": self.admm.stale_accepted,
+                "stale_dropped": self.admm.stale_dropped,
+            }
+
+    def update_peer_reliability(self, window_s: Optional[float] = None):
+        """Sets each attesting peer's α_j to its share of valid fragments over the recent window."""
+        rates = self.zkf.ledger.attestation_rates(window_s or self.reliability_window_s)
+        for node, rate in rates.items():
+            if node != self.node_address:
+                self.admm.peer_alpha[node] = rate["valid_ratio"]
+
+    def get_attestation_telemetry(self) -> Dict[str, Any]:
+        """Per-node attestation rates over the reliability window (empty without a ledger)."""
+        if self.zkf.ledger is None:
+            return {}
+        return {
+            "window_s": self.reliability_window_s,
+            "records": len(self.zkf.ledger),
+            "nodes": self.zkf.ledger.attestation_rates(self.reliability_window_s),
+        }
+
     def _op_zkf_verification(self, state: Dict) -> Dict:
         """
         ZKF Verification: Generates and verifies micro-attestations for the consensus step.
         """
-        local_theta = state.get("local_theta", np.zeros(64))
+        local_theta = state.get("local_theta", np.zeros(self.admm.dim, dtype=self.admm.dtype))
+        local_state = state.get("consensus_state")
+        if local_state is None:
+            with self._lock:
+                local_state = self.admm.w.copy()
         # Simulate a semantic score from a Small-LM
         semantic_score = 0.95 
         
         # Generate ZKF Fragment
         fragment = self.zkf.generate_fragment(
-            local_state=self.admm.w, 
+            local_state=local_state,
             transformed_state=local_theta,
             semantic_score=semantic_score
         )
         
-        # Verify Fragment
-        is_valid = self.zkf.verify_fragment(fragment)
+        # Verify Fragment (and log it when a ledger is configured)
+        is_valid = self.zkf.attest(fragment, node=self.node_address, round_id=self._contributed_round)
         
         verification_status = "VERIFIED" if is_valid else "FAILED"
+        state["response"] = self._compose_response(state, verification_status)
+        return state
+
+    def _compose_response(self, state: Dict, verification_status: str) -> str:
         consensus_val = state.get("consensus_value", 0.0)
-        
-        state["response"] = (
+        return (
             f"LEO Decentralized Consensus (Value: {consensus_val:.4f}) | "
             f"ZKF Status: {verification_status} | "
-            f"Plan: {state["best_plan"]}"
+            f"Plan: {state.get('best_plan', 'N/A')}"
         )
-        return state
 
     def update_circuit(self, task_signature: Dict):
         """
         SELC: Dynamically reconfigures the circuit based on task complexity.
+        A "latency_budget_ms" entry makes later requests cost-aware: the planner
+        prunes the chosen circuit to fit that budget using measured latencies.
         """
+        if "latency_budget_ms" in task_signature:
+            self.latency_budget_ms = task_signature["latency_budget_ms"]
+            if "complexity" not in task_signature:
+                return
         if task_signature.get("complexity") == "low":
             self.current_circuit = ["ENC", "MEM", "CONS"] # Fast Path
         else:
@@ -0,0 +1,162 @@
+import hashlib
+import numpy as np
+from typing import List, Optional
+
+# Domain separation between leaves and interior nodes prevents a leaf from
+# being passed off as an interior node (second-preimage attack).
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+
+def _hash_leaf(chunk: np.ndarray) -> bytes:
+    h = hashlib.sha256(_LEAF)
+    h.update(memoryview(chunk).cast("B"))
+    return h.digest()
+
+
+def _hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def _build_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Builds every tree level bottom-up; an odd last node is promoted unchanged."""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        prev = levels[-1]
+        level = [_hash_node(prev[i], prev[i + 1]) for i in range(0, len(prev) - 1, 2)]
+        if len(prev) % 2:
+            level.append(prev[-1])
+        levels.append(level)
+    return levels
+
+
+def _chunks(state: np.ndarray, chunk_size: int) -> List[np.ndarray]:
+    return [state[i:i + chunk_size] for i in range(0, max(state.size, 1), chunk_size)]
+
+
+def merkle_root(state: np.ndarray, chunk_size: int) -> str:
+    """Stateless Merkle root of a state vector split into fixed-size chunks."""
+    state = np.ascontiguousarray(state).ravel()
+    return _build_levels([_hash_leaf(c) for c in _chunks(state, chunk_size)])[-1][0].hex()
+
+
+def verify_chunk_proof(root: str, index: int, chunk: np.ndarray,
+                       proof: List[str], n_chunks: int) -> bool:
+    """
+    Checks that `chunk` is the index-th of `n_chunks` chunks of the state
+    committed to by `root`, using the O(log n) sibling path returned by
+    MerkleCommitment.prove. The sides are derived from the index, so a proof
+    cannot be replayed for a different position.
+    """
+    if not 0 <= index < n_chunks:
+        return False
+    node = _hash_leaf(np.ascontiguousarray(chunk))
+    siblings = iter(proof)
+    width = n_chunks
+    while width > 1:
+        if index ^ 1 < width:
+            sibling_hex = next(siblings, None)
+            if sibling_hex is None:
+                return False
+            sibling = bytes.fromhex(sibling_hex)
+            node = _hash_node(sibling, node) if index % 2 else _hash_node(node, sibling)
+        # Otherwise this node was promoted unchanged to the next level
+        index //= 2
+        width = (width + 1) // 2
+    if next(siblings, None) is not None:
+        return False
+    return node.hex() == root
+
+
+class MerkleCommitment:
+    """
+    Project LEO: Incremental Merkle commitment over a state vector.
+    The state is cut into `chunk_size`-element chunks, each hashed into a
+    leaf. The tree and a copy of the last committed state are cached, so the
+    next commit re-hashes only the chunks that changed plus their O(log n)
+    ancestors. Commitment cost therefore tracks the size of the change
+    rather than the dimension of the state.
+    """
+
+    def __init__(self, chunk_size: int = 1024):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = chunk_size
+        self._state: Optional[np.ndarray] = None
+        self._levels: List[List[bytes]] = []
+        self.last_rehashed_chunks = 0
+
+    @property
+    def root(self) -> Optional[str]:
+        return self._levels[-1][0].hex() if self._levels else None
+
+    def commit(self, state: np.ndarray, changed: Optional[np.ndarray] = None) -> str:
+        """
+        Commits to `state` and returns the root hex digest.
+        `changed` may list the coordinates modified since the previous commit;
+        otherwise they are found by comparing against the cached copy.
+        """
+        state = np.ascontiguousarray(state).ravel()
+        if (self._state is None or self._state.shape != state.shape
+                or self._state.dtype != state.dtype):
+            self._state = state.copy()
+            self._levels = _build_levels([_hash_leaf(c) for c in _chunks(self._state, self.chunk_size)])
+            self.last_rehashed_chunks = len(self._levels[0])
+            return self.root
+
+        if changed is None:
+            dirty = self._changed_chunks(state)
+        else:
+            dirty = np.unique(np.asarray(changed, dtype=np.int64) // self.chunk_size)
+        self.last_rehashed_chunks = int(dirty.size)
+        if dirty.size == 0:
+            return self.root
+
+        leaves = self._levels[0]
+        for c in dirty:
+            lo = c * self.chunk_size
+            hi = lo + self.chunk_size
+            self._state[lo:hi] = state[lo:hi]
+            leaves[c] = _hash_leaf(self._state[lo:hi])
+
+        # Walk only the dirty paths up to the root
+        for depth in range(1, len(self._levels)):
+            below, level = self._levels[depth - 1], self._levels[depth]
+            dirty = np.unique(dirty // 2)
+            for p in dirty:
+                left = 2 * p
+                level[p] = _hash_node(below[left], below[left + 1]) if left + 1 < len(below) else below[left]
+        return self.root
+
+    def _changed_chunks(self, state: np.ndarray) -> np.ndarray:
+        """Indices of chunks that differ from the cached state, found with one vectorized compare."""
+        diff = state != self._state
+        n_full = state.size // self.chunk_size
+        dirty = np.flatnonzero(diff[:n_full * self.chunk_size].reshape(n_full, self.chunk_size).any(axis=1))
+        if state.size % self.chunk_size and diff[n_full * self.chunk_size:].any():
+            dirty = np.append(dirty, n_full)
+        return dirty
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._levels[0]) if self._levels else 0
+
+    def prove(self, index: int) -> List[str]:
+        """Sibling path for chunk `index`: hex digests ordered from leaf to root."""
+        if not self._levels:
+            raise ValueError("Nothing has been committed yet")
+        if not 0 <= index < len(self._levels[0]):
+            raise IndexError(f"Chunk index {index} out of range")
+        proof = []
+        for level in self._levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling].hex())
+            # A promoted odd node has no sibling at this level
+            index //= 2
+        return proof
+
+    def chunk(self, index: int) -> np.ndarray:
+        """The committed chunk `index`, as sent alongside its proof."""
+        lo = index * self.chunk_size
+        return self._state[lo:lo + self.chunk_size].copy()
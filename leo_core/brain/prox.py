@@ -0,0 +1,152 @@
+"""
+Project LEO: proximal operators for the terms of the consensus objective
+minimize Σ α_i f_i(θ_i) + Γ Ω(w) + λ Σ ||θ_i - w||_1   s.t. w ∈ C.
+
+The functions are vectorized over the last axis and write into `out` when
+it is given, so the engine can apply them to its state in place. `out`
+may be the input itself; only then do they need a temporary. The operator
+classes wrap them behind one interface, prox(v, step, out, block) =
+argmin_x step·g(x) + ½||x - v||², so any of them can serve as a local
+objective f_i, the regularizer Ω or (for the projections, which ignore
+`step`) the constraint set C.
+"""
+import numpy as np
+from typing import Optional
+
+
+def soft_threshold(v: np.ndarray, kappa, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """prox of κ||·||_1: sign(v)·max(|v| - κ, 0)."""
+    # v - clip(v, -κ, κ) is the shrinkage without computing signs
+    if out is None or np.may_share_memory(out, v):
+        return np.subtract(v, np.clip(v, -kappa, kappa), out=out)
+    np.clip(v, -kappa, kappa, out=out)
+    return np.subtract(v, out, out=out)
+
+
+def prox_ridge(v: np.ndarray, lam, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """prox of (λ/2)||·||²: v / (1 + λ)."""
+    return np.divide(v, 1.0 + lam, out=out)
+
+
+def prox_squared_loss(v: np.ndarray, target: np.ndarray, weight,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+    """prox of (weight/2)||· - target||²: (v + weight·target) / (1 + weight)."""
+    if out is None or np.may_share_memory(out, v):
+        out = np.add(v, np.multiply(target, weight), out=out)
+    else:
+        np.multiply(target, weight, out=out)  # Reads target first, so out may alias it
+        out += v
+    out /= 1.0 + weight
+    return out
+
+
+def project_box(v: np.ndarray, lower, upper, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Euclidean projection onto {x : lower <= x <= upper}."""
+    return np.clip(v, lower, upper, out=out)
+
+
+def project_simplex(v: np.ndarray, radius: float = 1.0, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Euclidean projection onto {x : x >= 0, Σx = radius}, along the last axis
+    (each row of a matrix separately). Sort-based, O(n log n) per row.
+    """
+    if radius <= 0:
+        raise ValueError(f"Simplex radius must be positive, got {radius}")
+    desc = -np.sort(-v, axis=-1)
+    excess = np.cumsum(desc, axis=-1) - radius
+    ranks = np.arange(1, v.shape[-1] + 1)
+    # The entries kept positive are a prefix of the sorted order
+    support = np.count_nonzero(desc * ranks > excess, axis=-1, keepdims=True)
+    shift = np.take_along_axis(excess, support - 1, axis=-1) / support
+    if v.ndim == 1:
+        shift = shift[0]
+    return np.maximum(np.subtract(v, shift, out=out), 0.0, out=out)
+
+
+def _block(param, block: slice):
+    """A vector parameter restricted to the block being processed; scalars pass through."""
+    return param[block] if isinstance(param, np.ndarray) and param.ndim else param
+
+
+class ProxOperator:
+    """
+    One term g of the objective. prox(v, step, out, block) returns
+    argmin_x step·g(x) + ½||x - v||²; `block` says which coordinates of the
+    full state v holds, so vector parameters can be sliced to match.
+    """
+
+    # Acts on each coordinate independently, so it can run on blocks of the state
+    separable = True
+    # c when g is (c/2)||x - a||², 0 for anything else; the L1 coupling step uses it
+    curvature = 0.0
+
+    def prox(self, v: np.ndarray, step: float = 1.0, out: Optional[np.ndarray] = None,
+             block: slice = slice(None)) -> np.ndarray:
+        raise NotImplementedError
+
+    def set_target(self, target: Optional[np.ndarray]):
+        """Receives the round's local data; only data-fitting terms use it."""
+
+
+class SquaredLoss(ProxOperator):
+    """f(x) = (weight/2)||x - target||², the engine's default local objective."""
+
+    def __init__(self, target: Optional[np.ndarray] = None, weight: float = 1.0):
+        self.target = target
+        self.weight = weight
+
+    @property
+    def curvature(self) -> float:
+        return self.weight
+
+    def set_target(self, target: Optional[np.ndarray]):
+        if target is not None:
+            self.target = np.asarray(target)
+
+    def prox(self, v, step=1.0, out=None, block=slice(None)):
+        if self.target is None:
+            raise ValueError("SquaredLoss has no target; pass one to local_step")
+        return prox_squared_loss(v, self.target[block], step * self.weight, out=out)
+
+
+class L1(ProxOperator):
+    """g(x) = lam·||x||_1: sparsity."""
+
+    def __init__(self, lam: float):
+        self.lam = lam
+
+    def prox(self, v, step=1.0, out=None, block=slice(None)):
+        return soft_threshold(v, step * self.lam, out=out)
+
+
+class Ridge(ProxOperator):
+    """g(x) = (lam/2)||x||²: L2 shrinkage."""
+
+    def __init__(self, lam: float):
+        self.lam = lam
+
+    def prox(self, v, step=1.0, out=None, block=slice(None)):
+        return prox_ridge(v, step * self.lam, out=out)
+
+
+class Box(ProxOperator):
+    """Indicator of lower <= x <= upper (scalars or per-coordinate vectors)."""
+
+    def __init__(self, lower=-np.inf, upper=np.inf):
+        self.lower = lower
+        self.upper = upper
+
+    def prox(self, v, step=1.0, out=None, block=slice(None)):
+        return project_box(v, _block(self.lower, block), _block(self.upper, block), out=out)
+
+
+class Simplex(ProxOperator):
+    """Indicator of the scaled probability simplex {x >= 0, Σx = radius}."""
+
+    separable = False
+
+    def __init__(self, radius: float = 1.0):
+        self.radius = radius
+
+    def prox(self, v, step=1.0, out=None, block=slice(None)):
+        return project_simplex(v, self.radius, out=out)
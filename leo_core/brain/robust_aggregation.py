@@ -0,0 +1,182 @@
+"""
+Project LEO: Byzantine-robust aggregators (the Abyz operator).
+
+Every aggregator takes the stacked peer matrix X of shape (n_peers, dim) and
+optional per-peer reliability weights α (shape (n_peers,)), and returns one
+dim-vector. None loops over peers or coordinates in Python; the
+coordinate-wise ones walk blocks of columns so each block stays in cache.
+
+Cost on one core (float64, 256 peers): everything is well under 1 ms at dim
+64 except Krum (~1 ms, pairwise distances are O(n² dim)). At dim 4096 the
+sub-millisecond target is missed: median and trimmed mean take ~10 ms,
+Krum ~9 ms and the geometric median ~4 ms. The weighted median and
+trimmed mean need a full argsort and take ~50 ms. Only the mean (~0.5 ms)
+stays below 1 ms there.
+"""
+import numpy as np
+from typing import Callable, Dict, Optional
+
+
+def _normalize_weights(n: int, weights: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """Returns None for uniform weights so callers can take the unweighted fast path."""
+    if weights is None:
+        return None
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != (n,):
+        raise ValueError(f"Expected {n} weights, got shape {weights.shape}")
+    if np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError("Reliability weights must be non-negative with a positive sum")
+    if np.all(weights == weights[0]):
+        return None
+    return weights
+
+
+# Coordinate-wise selection runs over blocks of this many columns: the block of
+# every peer's values (256 KB for 256 peers in float64) stays in cache while it
+# is sorted or partitioned along axis 0, with no transposed copy of the stack
+_COLUMN_BLOCK = 128
+
+
+def _column_blocks(dim: int):
+    for lo in range(0, dim, _COLUMN_BLOCK):
+        yield slice(lo, min(lo + _COLUMN_BLOCK, dim))
+
+
+def _weighted_order(block: np.ndarray, weights: np.ndarray):
+    """The block sorted along axis 0, with each entry's weight and the cumulative weight up to it."""
+    order = np.argsort(block, axis=0)
+    w_sorted = weights[order]
+    return np.take_along_axis(block, order, axis=0), w_sorted, np.cumsum(w_sorted, axis=0)
+
+
+def weighted_mean(X: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Plain (non-robust) α-weighted average, for reference and honest meshes."""
+    weights = _normalize_weights(X.shape[0], weights)
+    if weights is None:
+        return X.mean(axis=0)
+    return weights @ X / weights.sum()
+
+
+def coordinate_median(X: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Coordinate-wise (weighted) median: tolerates < 50% of the weight being Byzantine."""
+    n, dim = X.shape
+    weights = _normalize_weights(n, weights)
+    out = np.empty(dim, dtype=X.dtype)
+    mid = n // 2
+    for cols in _column_blocks(dim):
+        if weights is None:
+            # One partition at the upper middle; for even n the lower middle is
+            # the largest entry below it, cheaper than partitioning for both
+            part = np.partition(X[:, cols], mid, axis=0)
+            if n % 2:
+                out[cols] = part[mid]
+            else:
+                lower = np.max(part[:mid], axis=0, out=out[cols])
+                lower += part[mid]
+                lower *= 0.5
+            continue
+        sorted_x, _, cum = _weighted_order(X[:, cols], weights)
+        # First sorted entry whose cumulative weight reaches half the total
+        idx = np.argmax(cum >= 0.5 * weights.sum(), axis=0)
+        out[cols] = np.take_along_axis(sorted_x, idx[None, :], axis=0)[0]
+    return out
+
+
+def trimmed_mean(X: np.ndarray, weights: Optional[np.ndarray] = None, trim: float = 0.1) -> np.ndarray:
+    """
+    Coordinate-wise trimmed mean: discards the lowest and highest `trim`
+    fraction (by count, or by weight mass when weighted) before averaging.
+    """
+    if not 0.0 <= trim < 0.5:
+        raise ValueError(f"trim must be in [0, 0.5), got {trim}")
+    n, dim = X.shape
+    weights = _normalize_weights(n, weights)
+    b = int(np.floor(trim * n))
+    if weights is None and b == 0:
+        return X.mean(axis=0)
+    out = np.empty(dim, dtype=X.dtype)
+    total = None if weights is None else weights.sum()
+    for cols in _column_blocks(dim):
+        if weights is None:
+            # numpy's vectorized sort beats a partition at two order statistics here
+            np.mean(np.sort(X[:, cols], axis=0)[b:n - b], axis=0, out=out[cols])
+            continue
+        sorted_x, w_sorted, upper = _weighted_order(X[:, cols], weights)
+        lo, hi = trim * total, (1.0 - trim) * total
+        lower = upper - w_sorted
+        # Weight mass of each entry that falls inside the [lo, hi] window
+        kept = np.clip(upper, lo, hi) - np.clip(lower, lo, hi)
+        out[cols] = (kept * sorted_x).sum(axis=0) / kept.sum(axis=0)
+    return out
+
+
+def krum(X: np.ndarray, weights: Optional[np.ndarray] = None,
+         n_byzantine: Optional[int] = None, multi: Optional[int] = None) -> np.ndarray:
+    """
+    (Multi-)Krum: scores each update by the summed squared distance to its
+    n - f - 2 nearest neighbours and averages the `multi` best-scored ones.
+    Scores are divided by α so that less reliable peers need to be closer to
+    the honest cluster to be selected.
+    """
+    n = X.shape[0]
+    f = n_byzantine if n_byzantine is not None else max(0, (n - 3) // 2)
+    m = multi if multi is not None else max(1, n - f)
+    weights = _normalize_weights(n, weights)
+    if n <= 2:
+        return weighted_mean(X, weights)
+    # Pairwise squared distances from one Gram matrix (a single BLAS call)
+    sq_norms = np.einsum("ij,ij->i", X, X)
+    dist = sq_norms[:, None] + sq_norms[None, :] - 2.0 * (X @ X.T)
+    np.maximum(dist, 0.0, out=dist)
+    np.fill_diagonal(dist, np.inf)
+    k = max(1, n - f - 2)
+    scores = np.partition(dist, k - 1, axis=1)[:, :k].sum(axis=1)
+    if weights is not None:
+        scores = scores / np.maximum(weights, 1e-12)
+    selected = np.argpartition(scores, m - 1)[:m] if m < n else np.arange(n)
+    return weighted_mean(X[selected], None if weights is None else weights[selected])
+
+
+def geometric_median(X: np.ndarray, weights: Optional[np.ndarray] = None,
+                     tol: float = 1e-7, max_iter: int = 100) -> np.ndarray:
+    """Weighted geometric median via Weiszfeld iterations (breakdown point 50%)."""
+    n = X.shape[0]
+    weights = _normalize_weights(n, weights)
+    alpha = np.ones(n) if weights is None else weights
+    z = alpha @ X / alpha.sum()
+    # ||x_i - z||² = ||x_i||² - 2 x_i·z + ||z||²: two matrix-vector products per
+    # iteration instead of materializing X - z
+    sq_norms = np.einsum("ij,ij->i", X, X)
+    for _ in range(max_iter):
+        dist = np.sqrt(np.maximum(sq_norms - 2.0 * (X @ z) + z @ z, 0.0))
+        # Guard against division by zero when z lands on a data point
+        inv = alpha / np.maximum(dist, 1e-12)
+        z_new = inv @ X / inv.sum()
+        if np.linalg.norm(z_new - z) <= tol * max(1.0, np.linalg.norm(z)):
+            return z_new
+        z = z_new
+    return z
+
+
+AGGREGATORS: Dict[str, Callable[..., np.ndarray]] = {
+    "mean": weighted_mean,
+    "median": coordinate_median,
+    "trimmed_mean": trimmed_mean,
+    "krum": krum,
+    "geometric_median": geometric_median,
+}
+
+
+# Aggregators whose output coordinate j depends only on coordinate j of the inputs,
+# so they can be applied to blocks of coordinates independently
+COORDINATE_WISE = frozenset({"mean", "median", "trimmed_mean"})
+
+
+def aggregate(method: str, X: np.ndarray, weights: Optional[np.ndarray] = None, **kwargs) -> np.ndarray:
+    """Dispatches to a named aggregator. Float stacks keep their dtype; anything else becomes float64."""
+    if method not in AGGREGATORS:
+        raise ValueError(f"Unknown aggregator '{method}'. Available: {sorted(AGGREGATORS)}")
+    X = np.asarray(X)
+    if X.dtype.kind != "f":
+        X = X.astype(np.float64)
+    return AGGREGATORS[method](X, weights, **kwargs)
@@ -0,0 +1,141 @@
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+import numpy as np
+
+class LatencyHistogram:
+    """
+    Rolling latency record for one SELC operator.
+    Percentiles are computed over the most recent `window` calls, so cost
+    estimates follow the node's current load; totals are kept for the
+    lifetime of the node.
+    """
+
+    def __init__(self, window: int = 256):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, elapsed_ms: float):
+        self._samples.append(elapsed_ms)
+        self.count += 1
+        self.total_ms += elapsed_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        return float(np.percentile(np.fromiter(self._samples, dtype=np.float64), q))
+
+    def snapshot(self) -> Dict[str, float]:
+        samples = np.fromiter(self._samples, dtype=np.float64)
+        if samples.size == 0:
+            return {"count": self.count}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(samples.max()),
+        }
+
+
+class SELCOperator:
+    """A registered cognitive operator together with its measured cost."""
+
+    def __init__(self, name: str, fn: Callable[[Dict], Dict], required: bool, priority: int,
+                 default_cost_ms: float, window: int):
+        self.name = name
+        self.fn = fn
+        self.required = required      # Never pruned by the planner
+        self.priority = priority      # Higher survives longer under a tight budget
+        self.default_cost_ms = default_cost_ms # Estimate used before the first measurement
+        self.latency = LatencyHistogram(window)
+
+    def estimated_cost_ms(self, quantile: float) -> float:
+        measured = self.latency.percentile(quantile)
+        return self.default_cost_ms if measured is None else measured
+
+
+class OperatorRegistry:
+    """
+    Project LEO: SELC operator registry.
+    Operators are registered by name and every execution is timed, so the
+    circuit planner can work from measured per-operator costs.
+    """
+
+    def __init__(self, window: int = 256):
+        self.window = window
+        self.operators: Dict[str, SELCOperator] = {}
+        self.circuits: Dict[str, int] = {}  # Executed circuit signature -> count
+        self.request_latency = LatencyHistogram(window)
+        self.last_circuit: List[str] = []
+
+    def register(self, name: str, fn: Callable[[Dict], Dict], required: bool = False,
+                 priority: int = 0, default_cost_ms: float = 0.0):
+        self.operators[name] = SELCOperator(name, fn, required, priority, default_cost_ms, self.window)
+
+    def execute(self, name: str, state: Dict) -> Dict:
+        op = self.operators.get(name)
+        if op is None:
+            return state
+        start = time.perf_counter()
+        try:
+            return op.fn(state)
+        finally:
+            op.latency.record((time.perf_counter() - start) * 1000.0)
+
+    def record_circuit(self, circuit: List[str], elapsed_ms: float):
+        """Records one end-to-end circuit execution."""
+        signature = " -> ".join(circuit)
+        self.circuits[signature] = self.circuits.get(signature, 0) + 1
+        self.request_latency.record(elapsed_ms)
+        self.last_circuit = list(circuit)
+
+    def telemetry(self) -> Dict[str, Any]:
+        return {
+            "operators": {name: op.latency.snapshot() for name, op in self.operators.items()},
+            "requests": self.request_latency.snapshot(),
+            "circuits": dict(self.circuits),
+            "last_circuit": self.last_circuit,
+        }
+
+
+class CircuitPlanner:
+    """
+    Cost-aware circuit selection.
+    Starting from the requested circuit, the planner prunes optional
+    operators until the summed cost estimate fits the latency budget. It
+    drops the lowest priority first and, among equal priorities, the most
+    expensive. Required operators are always kept, so a budget below their
+    combined cost yields the minimal circuit rather than an empty one.
+    """
+
+    def __init__(self, registry: OperatorRegistry, quantile: float = 95.0):
+        self.registry = registry
+        self.quantile = quantile
+
+    def estimate_ms(self, circuit: List[str]) -> float:
+        return sum(
+            self.registry.operators[op].estimated_cost_ms(self.quantile)
+            for op in circuit if op in self.registry.operators
+        )
+
+    def plan(self, circuit: List[str], budget_ms: Optional[float]) -> List[str]:
+        if budget_ms is None:
+            return list(circuit)
+        ops = self.registry.operators
+        costs = {op: ops[op].estimated_cost_ms(self.quantile) for op in circuit if op in ops}
+        planned = list(circuit)
+        total = sum(costs.values())
+        candidates = sorted(
+            (op for op in circuit if op in ops and not ops[op].required),
+            key=lambda op: (ops[op].priority, -costs[op])
+        )
+        for op in candidates:
+            if total <= budget_ms:
+                break
+            planned.remove(op)
+            total -= costs[op]
+        return planned
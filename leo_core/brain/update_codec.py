@@ -0,0 +1,186 @@
+import zlib
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Set
+from ..network.wire import encode_message, frame_size
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 is optional; zlib is always available
+    lz4_frame = None
+
+QUANTIZERS = ("float64", "float32", "float16", "int8")
+# HybridBrain's codec preferences, best first; the lossless last resort follows the engine's dtype.
+# Top-k is left out: at 10% it drops coordinates faster than the deltas can resend
+# them and consensus stalls short of the lossless fixed point.
+DEFAULT_PREFERENCES = ("int8+zlib", "float16+zlib", "float64")
+COMPRESSORS = ("zlib", "lz4")
+
+
+def local_capabilities() -> Set[str]:
+    """Codec components this node can decode, advertised to peers during negotiation."""
+    caps = set(QUANTIZERS) | {"topk", "zlib"}
+    if lz4_frame is not None:
+        caps.add("lz4")
+    return caps
+
+
+class UpdateCodec:
+    """
+    Project LEO: ADMM update codec, the Q and S stages of
+    d_i^{k+1} = S(Q(θ_i^{k+1} + u_i^k)).
+
+    A codec is described by a spec string of '+'-joined components, e.g.
+    "int8+topk0.1+zlib":
+    - Quantization: float64 (lossless), float32 (lossless for float32
+      engines), float16, or int8 with stochastic rounding, which keeps the
+      quantized vector unbiased.
+    - Sparsification: topk<fraction> keeps only the largest-magnitude
+      coordinates; what it drops stays in the engine's next delta (see
+      ADMMEngine.encode_update).
+    - Compression: zlib, or lz4 when the package is installed.
+    """
+
+    def __init__(self, spec: str = "float64", seed: Optional[int] = None):
+        self.spec = spec
+        self.quantization = "float64"
+        self.topk: Optional[float] = None
+        self.compression: Optional[str] = None
+        for part in spec.split("+"):
+            if part in QUANTIZERS:
+                self.quantization = part
+            elif part.startswith("topk"):
+                self.topk = float(part[4:])
+                if not 0.0 < self.topk <= 1.0:
+                    raise ValueError(f"top-k fraction must be in (0, 1], got {self.topk}")
+            elif part in COMPRESSORS:
+                if part == "lz4" and lz4_frame is None:
+                    raise ValueError("lz4 compression requested but the lz4 package is not installed")
+                self.compression = part
+            else:
+                raise ValueError(f"Unknown codec component '{part}' in '{spec}'")
+        self.rng = np.random.default_rng(seed)
+        # Bandwidth accounting
+        self.messages = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.last_wire_bytes = 0
+
+    @property
+    def components(self) -> Set[str]:
+        """Capabilities a peer needs to decode this codec."""
+        comps = {self.quantization}
+        if self.topk is not None:
+            comps.add("topk")
+        if self.compression:
+            comps.add(self.compression)
+        return comps
+
+    def encode(self, vector: np.ndarray, sparsify: bool = True) -> Dict[str, Any]:
+        """
+        Encodes a dense update into a wire payload and records its size.
+        sparsify=False skips top-k and sends every coordinate.
+        """
+        vector = np.asarray(vector)
+        if vector.dtype.kind != "f":
+            vector = vector.astype(np.float64)
+        dim = vector.size
+        payload: Dict[str, Any] = {"codec": self.spec, "dim": dim}
+
+        indices = None
+        values = vector
+        if self.topk is not None and sparsify:
+            k = max(1, int(np.ceil(self.topk * dim)))
+            if k < dim:
+                indices = np.argpartition(np.abs(vector), dim - k)[dim - k:]
+                indices.sort()
+                values = vector[indices]
+
+        if self.quantization == "int8":
+            scale = float(np.max(np.abs(values))) / 127.0 if values.size else 0.0
+            if scale > 0.0:
+                # Stochastic rounding: E[q] == values / scale
+                scaled = values / scale
+                q = np.floor(scaled + self.rng.random(values.shape))
+                q = np.clip(q, -127, 127).astype(np.int8)
+            else:
+                q = np.zeros(values.shape, dtype=np.int8)
+            payload["scale"] = scale
+            body = q.tobytes()
+        elif self.quantization in ("float32", "float16"):
+            body = values.astype(self.quantization, copy=False).tobytes()
+        else:
+            body = values.astype(np.float64, copy=False).tobytes()
+
+        if indices is not None:
+            index_dtype = np.uint16 if dim <= np.iinfo(np.uint16).max else np.uint32
+            payload["k"] = int(indices.size)
+            body = indices.astype(index_dtype).tobytes() + body
+
+        if self.compression == "zlib":
+            body = zlib.compress(body, 1)
+        elif self.compression == "lz4":
+            body = lz4_frame.compress(body)
+        payload["data"] = body
+
+        self.messages += 1
+        self.raw_bytes += vector.nbytes
+        self.last_wire_bytes = frame_size(encode_message(payload))
+        self.wire_bytes += self.last_wire_bytes
+        return payload
+
+    def decode(self, payload: Dict[str, Any]) -> np.ndarray:
+        """Reconstructs the dense float64 update from a payload produced by encode()."""
+        dim = int(payload["dim"])
+        body = payload["data"]
+        if self.compression == "zlib":
+            body = zlib.decompress(body)
+        elif self.compression == "lz4":
+            body = lz4_frame.decompress(body)
+
+        k = payload.get("k")
+        indices = None
+        if k is not None:
+            index_dtype = np.uint16 if dim <= np.iinfo(np.uint16).max else np.uint32
+            index_bytes = k * np.dtype(index_dtype).itemsize
+            indices = np.frombuffer(body, dtype=index_dtype, count=k)
+            body = memoryview(body)[index_bytes:]
+
+        if self.quantization == "int8":
+            values = np.frombuffer(body, dtype=np.int8).astype(np.float64) * payload["scale"]
+        elif self.quantization in ("float32", "float16"):
+            values = np.frombuffer(body, dtype=self.quantization).astype(np.float64)
+        else:
+            values = np.frombuffer(body, dtype=np.float64)
+
+        if indices is None:
+            return values.copy() if not values.flags.writeable else values
+        dense = np.zeros(dim, dtype=np.float64)
+        dense[indices] = values
+        return dense
+
+    def stats(self) -> Dict[str, float]:
+        """Cumulative bandwidth statistics for this codec."""
+        return {
+            "codec": self.spec,
+            "messages": self.messages,
+            "raw_bytes": self.raw_bytes,
+            "wire_bytes": self.wire_bytes,
+            "compression_ratio": self.raw_bytes / self.wire_bytes if self.wire_bytes else 0.0,
+        }
+
+
+def negotiate_codec(preferences: Iterable[str], peer_capabilities: List[Set[str]]) -> str:
+    """
+    Picks the first preferred codec spec that every peer can decode.
+    Falls back to lossless float64 when no preference is universally supported.
+    """
+    common = local_capabilities()
+    for caps in peer_capabilities:
+        common &= caps
+    for spec in preferences:
+        try:
+            if UpdateCodec(spec).components <= common:
+                return spec
+        except ValueError:
+            continue
+    return "float64"
@@ -1,7 +1,27 @@
 import hashlib
+import os
 import numpy as np
 import time
-from typing import Dict, Any, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple, Optional
+from .merkle_commitment import MerkleCommitment, merkle_root, verify_chunk_proof
+from ..telemetry.metrics import REGISTRY
+
+# hashlib only releases the GIL for inputs above ~2 KB; smaller states are
+# hashed inline because thread hand-off would cost more than the digest.
+_PARALLEL_HASH_MIN_BYTES = 2048
+
+_GENERATE_SECONDS = REGISTRY.histogram("leo_zkf_generate_seconds", "Time to generate a ZKF fragment")
+_VERIFY_SECONDS = REGISTRY.histogram("leo_zkf_verify_seconds", "Time to verify one fragment or batch", ["mode"])
+_VERIFIED = REGISTRY.counter("leo_zkf_fragments_verified_total", "Fragments checked by verify_fragment/verify_batch")
+# The first acceptance criterion a rejected fragment failed
+_REJECTIONS = REGISTRY.counter("leo_zkf_rejections_total", "Rejected fragments, by failed criterion", ["reason"])
+for _reason in ("lcs", "slmcs", "noise", "commitment"):
+    _REJECTIONS.labels(_reason)  # Exported at zero before the first rejection
+
+
+def _sha256_hex_many(blobs: List[memoryview]) -> List[str]:
+    return [hashlib.sha256(b).hexdigest() for b in blobs]
 
 class ZKFLayer:
     """
@@ -13,12 +33,25 @@ class ZKFLayer:
     - Ensures local transformation correctness without revealing state.
     """
     
-    def __init__(self, node_id: str, tolerance: float = 1e-5, semantic_threshold: float = 0.8):
+    def __init__(self, node_id: str, tolerance: float = 1e-5, semantic_threshold: float = 0.8,
+                 hash_workers: Optional[int] = None,
+                 commitment: str = "sha256", merkle_chunk_size: int = 1024,
+                 ledger=None):
         self.node_id = node_id
         self.delta_c = tolerance  # Correctness tolerance
         self.tau = semantic_threshold  # Semantic checksum threshold
         self.delta_n = 0.01  # Entropy-bounded noise limit
-        
+        # Threads used to hash commitments in verify_batch (1 = hash inline)
+        self.hash_workers = hash_workers or os.cpu_count() or 1
+        self._hash_pool: Optional[ThreadPoolExecutor] = None
+        # Commitment scheme: one flat SHA-256, or an incremental Merkle tree over chunks
+        if commitment not in ("sha256", "merkle"):
+            raise ValueError(f"Unknown commitment scheme '{commitment}'")
+        self.commitment = commitment
+        self._merkle = MerkleCommitment(merkle_chunk_size) if commitment == "merkle" else None
+        # Optional AttestationLedger: attest()/attest_batch() record every outcome there
+        self.ledger = ledger
+
     def generate_fragment(self, 
                           local_state: np.ndarray, 
                           transformed_state: np.ndarray, 
@@ -28,10 +61,11 @@ class ZKFLayer:
         
         Components:
         1. LCS (Local Constraint Satisfaction): ||f(x) - T|| <= delta_c
-        2. Com (Local Commitment): Hash(T)
+        2. Com (Local Commitment): Hash(T), or its Merkle root over chunks
         3. SLMCS (Small-LM Consistency Signature): Semantic checksum in [0, 1]
         4. Noise: Entropy-bounded noise vector for privacy
         """
+        start = time.perf_counter()
         # 1. Local Constraint Satisfaction (LCS)
         # In this implementation, we assume the transformation is provided
         # and we check if it's within expected bounds.
@@ -39,9 +73,12 @@ class ZKFLayer:
         lcs = 1 if diff > 0 else 0 # Simplified: 1 if a change occurred correctly
         
         # 2. Local Commitment (Com)
-        # Cryptographic hash of the transformed state
-        state_bytes = transformed_state.tobytes()
-        com = hashlib.sha256(state_bytes).hexdigest()
+        # Cryptographic hash of the transformed state. The Merkle tree is cached
+        # between rounds and only re-hashes the chunks that changed.
+        if self._merkle is not None:
+            com = self._merkle.commit(transformed_state)
+        else:
+            com = hashlib.sha256(transformed_state.tobytes()).hexdigest()
         
         # 3. Small-LM Consistency Signature (SLMCS)
         # Provided by the caller (simulating Small-LM output)
@@ -57,10 +94,15 @@ class ZKFLayer:
             "lcs": lcs,
             "com": com,
             "slmcs": slmcs,
-            "noise": noise.tolist(),
+            "noise": noise, # Sent as a binary array by the wire format
             "timestamp": time.time()
         }
+        if self._merkle is not None:
+            fragment["com_scheme"] = "merkle"
+            fragment["chunk_size"] = self._merkle.chunk_size
+            fragment["n_chunks"] = self._merkle.n_chunks
         
+        _GENERATE_SECONDS.observe(time.perf_counter() - start)
         return fragment
 
     def verify_fragment(self, fragment: Dict[str, Any], state_to_verify: Optional[np.ndarray] = None) -> bool:
@@ -68,35 +110,160 @@ class ZKFLayer:
         Verifies a ZKF fragment based on acceptance criteria:
         LCS = 1 AND SLMCS >= tau AND Com = H(T) AND ||noise|| <= delta_n
         """
+        start = time.perf_counter()
+        reason = self._rejection_reason(fragment, state_to_verify)
+        _VERIFY_SECONDS.labels("single").observe(time.perf_counter() - start)
+        _VERIFIED.inc()
+        if reason is not None:
+            _REJECTIONS.labels(reason).inc()
+        return reason is None
+
+    def _rejection_reason(self, fragment: Dict[str, Any], state_to_verify: Optional[np.ndarray]) -> Optional[str]:
         # Check LCS
         if fragment.get("lcs") != 1:
-            return False
+            return "lcs"
             
         # Check SLMCS (Semantic Consistency)
         if fragment.get("slmcs", 0) < self.tau:
-            return False
+            return "slmcs"
             
         # Check Noise Bound
         noise = np.array(fragment.get("noise", []))
         if np.linalg.norm(noise) > self.delta_n * np.sqrt(noise.size):
-            return False
+            return "noise"
             
         # Check Commitment (if state is provided for verification)
         if state_to_verify is not None:
-            state_bytes = state_to_verify.tobytes()
-            expected_com = hashlib.sha256(state_bytes).hexdigest()
+            if fragment.get("com_scheme") == "merkle":
+                expected_com = merkle_root(state_to_verify, fragment["chunk_size"])
+            else:
+                expected_com = hashlib.sha256(state_to_verify.tobytes()).hexdigest()
             if fragment.get("com") != expected_com:
-                return False
+                return "commitment"
                 
-        return True
+        return None
+
+    def prove_chunk(self, index: int) -> Tuple[np.ndarray, List[str]]:
+        """
+        Partial-state disclosure for the last Merkle-committed state: returns
+        chunk `index` and its O(log n) inclusion proof against the fragment's com.
+        """
+        if self._merkle is None:
+            raise ValueError("Chunk proofs require commitment='merkle'")
+        return self._merkle.chunk(index), self._merkle.prove(index)
+
+    def verify_chunk(self, fragment: Dict[str, Any], index: int,
+                     chunk: np.ndarray, proof: List[str]) -> bool:
+        """Verifies one chunk of a Merkle-committed state without the rest of it."""
+        if fragment.get("com_scheme") != "merkle":
+            return False
+        return verify_chunk_proof(fragment.get("com"), index, chunk, proof, fragment["n_chunks"])
+
+    def verify_batch(self,
+                     fragments: List[Dict[str, Any]],
+                     states_to_verify: Optional[List[Optional[np.ndarray]]] = None) -> np.ndarray:
+        """
+        Vectorized verify_fragment over many fragments at once.
+        The LCS, SLMCS and noise-norm criteria are evaluated as boolean masks over
+        the whole batch; noise vectors are stacked into one matrix. Commitments
+        are only recomputed for fragments that passed the cheap checks, and large
+        states are hashed on a thread pool. Returns a boolean array, one entry
+        per fragment.
+        """
+        n = len(fragments)
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+        start = time.perf_counter()
+
+        lcs = np.fromiter((f.get("lcs") == 1 for f in fragments), dtype=bool, count=n)
+        slmcs = np.fromiter((f.get("slmcs", 0) for f in fragments), dtype=np.float64, count=n)
+        valid = lcs & (slmcs >= self.tau)
+        # Each rejection is attributed to the first criterion it failed, as in verify_fragment
+        failed = {"lcs": int(n - lcs.sum()), "slmcs": int(lcs.sum() - valid.sum())}
+
+        # Noise bound: ||noise_i|| <= delta_n * sqrt(size_i), evaluated row-wise
+        noises = [np.asarray(f.get("noise", []), dtype=np.float64).ravel() for f in fragments]
+        sizes = np.fromiter((v.size for v in noises), dtype=np.int64, count=n)
+        if np.all(sizes == sizes[0]):
+            matrix = np.stack(noises) if sizes[0] else np.zeros((n, 0))
+        else:
+            # Ragged batch: zero padding leaves the norms unchanged
+            matrix = np.zeros((n, sizes.max()))
+            for i, v in enumerate(noises):
+                matrix[i, :v.size] = v
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        passed = int(valid.sum())
+        valid &= sq_norms <= (self.delta_n ** 2) * sizes
+        failed["noise"] = passed - int(valid.sum())
+        passed -= failed["noise"]
+
+        # Commitments, only where a state was supplied and the cheap checks passed
+        if states_to_verify is not None:
+            todo = [i for i in np.flatnonzero(valid) if states_to_verify[i] is not None]
+            merkle_todo = [i for i in todo if fragments[i].get("com_scheme") == "merkle"]
+            todo = [i for i in todo if fragments[i].get("com_scheme") != "merkle"]
+            for i in merkle_todo:
+                expected_com = merkle_root(states_to_verify[i], fragments[i]["chunk_size"])
+                if fragments[i].get("com") != expected_com:
+                    valid[i] = False
+            if todo:
+                # Hash the arrays' own buffers; tobytes() would copy every state
+                blobs = [memoryview(np.ascontiguousarray(states_to_verify[i])).cast("B") for i in todo]
+                if (self.hash_workers > 1 and len(todo) > 1
+                        and max(b.nbytes for b in blobs) >= _PARALLEL_HASH_MIN_BYTES):
+                    if self._hash_pool is None:
+                        self._hash_pool = ThreadPoolExecutor(max_workers=self.hash_workers)
+                    # One task per worker-sized chunk keeps submit overhead off the hot path
+                    n_chunks = self.hash_workers
+                    chunks = [blobs[k::n_chunks] for k in range(n_chunks)]
+                    results = list(self._hash_pool.map(_sha256_hex_many, chunks))
+                    digests = [None] * len(blobs)
+                    for k, chunk_digests in enumerate(results):
+                        digests[k::n_chunks] = chunk_digests
+                else:
+                    digests = _sha256_hex_many(blobs)
+                for i, expected_com in zip(todo, digests):
+                    if fragments[i].get("com") != expected_com:
+                        valid[i] = False
+        failed["commitment"] = passed - int(valid.sum())
+
+        _VERIFY_SECONDS.labels("batch").observe(time.perf_counter() - start)
+        _VERIFIED.inc(n)
+        for reason, count in failed.items():
+            if count:
+                _REJECTIONS.labels(reason).inc(count)
+        return valid
+
+    def attest(self, fragment: Dict[str, Any], state_to_verify: Optional[np.ndarray] = None,
+               node: Optional[str] = None, round_id: int = -1) -> bool:
+        """verify_fragment, with the outcome recorded in the ledger under `node` (the sender)."""
+        valid = self.verify_fragment(fragment, state_to_verify)
+        if self.ledger is not None:
+            self.ledger.append(fragment, valid, node, round_id)
+        return valid
+
+    def attest_batch(self, fragments: List[Dict[str, Any]],
+                     states_to_verify: Optional[List[Optional[np.ndarray]]] = None,
+                     nodes: Optional[List[Optional[str]]] = None,
+                     rounds: Optional[List[int]] = None) -> np.ndarray:
+        """verify_batch, with the outcomes recorded in the ledger in one append."""
+        valid = self.verify_batch(fragments, states_to_verify)
+        if self.ledger is not None:
+            self.ledger.append_many(fragments, valid, nodes, rounds)
+        return valid
 
-    def aggregate_attestations(self, fragments: list) -> float:
+    def aggregate_attestations(self, fragments: Optional[list] = None, window_s: Optional[float] = None) -> float:
         """
         Calculates a global attestation score based on a collection of fragments.
         Returns a value between 0 and 1 representing the network's confidence.
+        Without fragments, the score covers everything the ledger recorded in
+        the last `window_s` seconds.
         """
+        if fragments is None and window_s is not None and self.ledger is not None:
+            rates = self.ledger.attestation_rates(window_s).values()
+            total = sum(r["attestations"] for r in rates)
+            return sum(r["valid"] for r in rates) / total if total else 0.0
         if not fragments:
             return 0.0
             
-        valid_count = sum(1 for f in fragments if self.verify_fragment(f))
-        return valid_count / len(fragments)
+        return float(self.verify_batch(fragments).mean())
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..telemetry.metrics import REGISTRY
+
+_KEY_SIZE = 32  # SHA-256 digest
+
+_EMBED_SECONDS = REGISTRY.histogram("leo_memory_embed_seconds", "Embedding model calls for cache misses")
+_CACHE_LOOKUPS = REGISTRY.counter("leo_memory_embedding_cache_total", "Embedding cache lookups, by tier that answered",
+                                  ["result"])
+
+
+class _DiskTier:
+    """
+    Append-only on-disk embedding store.
+    Vectors live in a preallocated float32 matrix opened with np.memmap; the
+    content hashes live in a sidecar file of fixed 32-byte records, where
+    record i names row i. A row is written and flushed before its key is
+    appended, so a crash can at worst lose the last entry, never expose a
+    half-written one.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        self._index: Dict[bytes, int] = {}
+        self._meta_path = os.path.join(path, "meta.json")
+        self._keys_path = os.path.join(path, "keys.bin")
+        self._data_path = os.path.join(path, "embeddings.f32")
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r") as f:
+                meta = json.load(f)
+            self._open(meta["dim"], meta["capacity"])
+            with open(self._keys_path, "rb") as f:
+                raw = f.read()
+            n = min(len(raw) // _KEY_SIZE, self.capacity)
+            self._index = {raw[i * _KEY_SIZE:(i + 1) * _KEY_SIZE]: i for i in range(n)}
+
+    def _open(self, dim: int, capacity: int):
+        self.dim, self.capacity = dim, capacity
+        mode = "r+" if os.path.exists(self._data_path) else "w+"
+        self._matrix = np.memmap(self._data_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self._index.get(key)
+        if row is None:
+            return None
+        return np.array(self._matrix[row])
+
+    def put(self, key: bytes, vector: np.ndarray):
+        if key in self._index:
+            return
+        if self._matrix is None:
+            self._open(vector.shape[0], self.capacity)
+            tmp = self._meta_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"dim": self.dim, "capacity": self.capacity}, f)
+            os.replace(tmp, self._meta_path)
+        if vector.shape[0] != self.dim or len(self._index) >= self.capacity:
+            return  # Full (or a different model's vectors): memory tier only
+        row = len(self._index)
+        self._matrix[row] = vector
+        self._matrix.flush()
+        with open(self._keys_path, "ab") as f:
+            f.write(key)
+        self._index[key] = row
+
+
+class CachedEmbeddingFunction:
+    """
+    Content-addressed cache in front of an embedding function.
+    Texts are keyed by the SHA-256 of their UTF-8 bytes. Lookups go through
+    an in-memory LRU tier, then an optional memory-mapped disk tier, and only
+    the remaining misses are sent to the wrapped model, as one batch.
+
+    Documents and queries share cache entries because the default MiniLM
+    model embeds both the same way. Any other attribute (name, get_config,
+    ...) is the wrapped function's: the cache is transparent, and the
+    Chroma backend passes chromadb the vectors rather than the cache itself.
+    """
+
+    def __init__(self,
+                 embedding_fn: Callable[[List[str]], Any],
+                 capacity: int = 4096,
+                 disk_path: Optional[str] = None,
+                 disk_capacity: int = 100_000):
+        self._fn = embedding_fn
+        self.capacity = capacity
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._disk = _DiskTier(disk_path, disk_capacity) if disk_path else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not defined on the cache itself
+        if name == "_fn":
+            raise AttributeError(name)
+        return getattr(self._fn, name)
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        keys = [self._key(text) for text in input]
+        results: List[Optional[np.ndarray]] = [None] * len(input)
+        pending: Dict[bytes, List[int]] = {}  # Misses, deduplicated within the batch
+        hits, disk_hits = self.hits, self.disk_hits
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                elif self._disk is not None and (vector := self._disk.get(key)) is not None:
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                elif key in pending:
+                    pending[key].append(i)
+                    self.hits += 1
+                    continue
+                else:
+                    pending[key] = [i]
+                    self.misses += 1
+                    continue
+                results[i] = vector
+            hits, disk_hits = self.hits - hits, self.disk_hits - disk_hits
+        _CACHE_LOOKUPS.labels("memory").inc(hits)
+        _CACHE_LOOKUPS.labels("disk").inc(disk_hits)
+        _CACHE_LOOKUPS.labels("miss").inc(len(input) - hits - disk_hits)
+
+        if pending:
+            texts = [input[rows[0]] for rows in pending.values()]
+            # The model runs outside the lock so concurrent cache hits are not blocked
+            start = time.perf_counter()
+            embedded = self._fn(texts)
+            _EMBED_SECONDS.observe(time.perf_counter() - start)
+            with self._lock:
+                for (key, rows), vector in zip(pending.items(), embedded):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    self._remember(key, vector)
+                    if self._disk is not None:
+                        self._disk.put(key, vector)
+                    for i in rows:
+                        results[i] = vector
+        return results
+
+    def embed_query(self, input: List[str]) -> List[np.ndarray]:
+        return self(input)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for both tiers."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._lru),
+            "disk_entries": len(self._disk) if self._disk is not None else 0,
+        }
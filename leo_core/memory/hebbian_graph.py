@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class HebbianGraph:
+    """
+    Project LEO: self-organizing sparse-graph LTM (technical_notes.md, LTM).
+
+    Nodes are unit-norm embeddings; edges carry Hebbian association weights.
+    For every observed memory θ:
+    - Node addition: θ becomes a new node only if max_j sim(v_j, θ) < τ_add.
+      Otherwise it is merged into its nearest node, whose vector moves to
+      the running mean of everything merged into it.
+    - Hebbian update: ΔE(v_j, v_k) = η · sim(v_j, θ) · sim(v_k, θ) for every
+      pair among the `active_k` most similar nodes (sim > 0), so an update
+      touches at most active_k² edges however large the graph is.
+    - Reconciliation: θ ← θ + α Σ sim(v, θ) · v over the active nodes.
+
+    Edges are kept as CSR arrays (indptr/indices/data). Updates are appended
+    to a COO buffer and folded into the CSR in one vectorized merge once the
+    buffer grows past `compact_threshold` entries, or before the edges are
+    read.
+    """
+
+    def __init__(self, eta: float = 0.1, tau_add: float = 0.9, alpha: float = 0.1,
+                 active_k: int = 8, initial_capacity: int = 1024, compact_threshold: int = 65536):
+        self.eta = eta
+        self.tau_add = tau_add
+        self.alpha = alpha
+        self.active_k = active_k
+        self.compact_threshold = compact_threshold
+        self.dim: Optional[int] = None
+        self.n = 0
+        self._capacity = initial_capacity
+        self._vectors: Optional[np.ndarray] = None   # (capacity, dim) float32, rows [:n] live
+        self._sums: Optional[np.ndarray] = None      # Unnormalized sums of merged observations
+        self.counts = np.zeros(initial_capacity, dtype=np.int64)  # Observations merged per node
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.memory_ids: List[Optional[str]] = []    # ID of the node's entry in the vector store
+        # CSR adjacency over the first n nodes
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._data = np.zeros(0, dtype=np.float32)
+        # Pending COO updates, folded into the CSR by _compact()
+        self._coo_rows: List[np.ndarray] = []
+        self._coo_cols: List[np.ndarray] = []
+        self._coo_vals: List[np.ndarray] = []
+        self._coo_size = 0
+        self.merges = 0
+        self._lock = threading.RLock()
+
+    # --- Nodes -----------------------------------------------------------
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Live node vectors, (n, dim)."""
+        if self._vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[:self.n]
+
+    def _grow(self, rows: int):
+        if self._vectors is not None and rows <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < rows:
+            capacity *= 2
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        sums = np.zeros((capacity, self.dim), dtype=np.float32)
+        counts = np.zeros(capacity, dtype=np.int64)
+        if self._vectors is not None:
+            vectors[:self.n] = self._vectors[:self.n]
+            sums[:self.n] = self._sums[:self.n]
+        counts[:self.n] = self.counts[:self.n]
+        self._vectors, self._sums, self.counts, self._capacity = vectors, sums, counts, capacity
+
+    @staticmethod
+    def _unit(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _active(self, sims: np.ndarray) -> np.ndarray:
+        """Indices of the active_k most similar nodes with positive similarity."""
+        k = min(self.active_k, sims.size)
+        if k == 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-sims, k - 1)[:k] if k < sims.size else np.arange(sims.size)
+        return top[sims[top] > 0]
+
+    def observe(self, vector: np.ndarray, document: str = "",
+                metadata: Optional[Dict[str, Any]] = None) -> Tuple[int, bool]:
+        """Observes one memory; returns (node index, whether it was added as a new node)."""
+        nodes, novel = self.observe_batch(np.asarray(vector)[None, :], [document], [metadata or {}])
+        return int(nodes[0]), bool(novel[0])
+
+    def observe_batch(self, vectors: np.ndarray, documents: List[str],
+                      metadatas: Optional[List[Dict[str, Any]]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Observes several memories in order. Returns the node index each one
+        landed on and a mask of those that created a new node; items within
+        the batch are gated against each other as well as against the graph.
+        """
+        vectors = self._unit(np.atleast_2d(vectors))
+        metadatas = metadatas or [{} for _ in documents]
+        nodes = np.empty(len(documents), dtype=np.int64)
+        novel = np.zeros(len(documents), dtype=bool)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match graph dimension {self.dim}")
+            self._grow(self.n + len(documents))
+            for i, theta in enumerate(vectors):
+                sims = self._vectors[:self.n] @ theta
+                if self.n == 0 or sims.max() < self.tau_add:
+                    node = self.n
+                    self._vectors[node] = theta
+                    self._sums[node] = theta
+                    self.counts[node] = 1
+                    self.documents.append(documents[i])
+                    self.metadatas.append(metadatas[i])
+                    self.memory_ids.append(None)
+                    self.n += 1
+                    sims = np.append(sims, np.float32(1.0))
+                    novel[i] = True
+                else:
+                    # Near-duplicate: fold into the nearest node instead of storing it
+                    node = int(np.argmax(sims))
+                    self._sums[node] += theta
+                    self.counts[node] += 1
+                    self._vectors[node] = self._unit(self._sums[node])
+                    self.merges += 1
+                nodes[i] = node
+                self._hebbian_update(sims)
+            if self._coo_size > self.compact_threshold:
+                self._compact()
+        return nodes, novel
+
+    def bind_memory_ids(self, nodes: List[int], memory_ids: List[str]):
+        """Records the vector-store entry each of `nodes` was written to."""
+        with self._lock:
+            for node, memory_id in zip(nodes, memory_ids):
+                self.memory_ids[node] = memory_id
+
+    def rebind_memory_ids(self, memory_ids: List[str], replacement: Optional[str] = None) -> int:
+        """
+        Points the nodes bound to any of `memory_ids` at `replacement`, or
+        unbinds them when it is None. Returns how many nodes changed.
+        """
+        removed = set(memory_ids)
+        changed = 0
+        with self._lock:
+            for node, memory_id in enumerate(self.memory_ids):
+                if memory_id in removed:
+                    self.memory_ids[node] = replacement
+                    changed += 1
+        return changed
+
+    def unbound(self, nodes: np.ndarray) -> np.ndarray:
+        """Mask of the nodes that have no entry in the vector store."""
+        with self._lock:
+            return np.array([self.memory_ids[node] is None for node in nodes], dtype=bool)
+
+    def _hebbian_update(self, sims: np.ndarray):
+        """Queues ΔE(j, k) = η · s_j · s_k for all ordered pairs j ≠ k of active nodes."""
+        active = self._active(sims)
+        if active.size < 2:
+            return
+        s = sims[active]
+        delta = self.eta * np.outer(s, s)
+        rows = np.repeat(active, active.size)
+        cols = np.tile(active, active.size)
+        off_diag = rows != cols
+        self._coo_rows.append(rows[off_diag])
+        self._coo_cols.append(cols[off_diag])
+        self._coo_vals.append(delta.ravel()[off_diag].astype(np.float32))
+        self._coo_size += int(off_diag.sum())
+
+    # --- Edges -----------------------------------------------------------
+
+    def _compact(self):
+        """Folds the pending COO updates into the CSR adjacency (duplicates summed)."""
+        n_old = self._indptr.size - 1
+        if not self._coo_size and n_old == self.n:
+            return
+        old_rows = np.repeat(np.arange(n_old, dtype=np.int64), np.diff(self._indptr))
+        rows = np.concatenate([old_rows] + self._coo_rows)
+        cols = np.concatenate([self._indices] + self._coo_cols)
+        vals = np.concatenate([self._data] + self._coo_vals)
+        keys = rows * max(self.n, 1) + cols
+        unique, inverse = np.unique(keys, return_inverse=True)
+        self._data = np.bincount(inverse, weights=vals, minlength=unique.size).astype(np.float32)
+        rows, self._indices = np.divmod(unique, max(self.n, 1))
+        self._indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.n), out=self._indptr[1:])
+        self._coo_rows, self._coo_cols, self._coo_vals = [], [], []
+        self._coo_size = 0
+
+    @property
+    def n_edges(self) -> int:
+        """Number of directed non-zero entries in the adjacency."""
+        with self._lock:
+            self._compact()
+            return int(self._indices.size)
+
+    def edge_weight(self, j: int, k: int) -> float:
+        with self._lock:
+            self._compact()
+            lo, hi = self._indptr[j], self._indptr[j + 1]
+            hit = np.flatnonzero(self._indices[lo:hi] == k)
+            return float(self._data[lo + hit[0]]) if hit.size else 0.0
+
+    def neighbors(self, node: int, k: int = 5) -> List[Tuple[int, float]]:
+        """The k most strongly associated nodes of `node`."""
+        with self._lock:
+            self._compact()
+            lo, hi = self._indptr[node], self._indptr[node + 1]
+            idx, w = self._indices[lo:hi], self._data[lo:hi]
+            order = np.argsort(-w)[:k]
+            return [(int(idx[i]), float(w[i])) for i in order]
+
+    # --- Retrieval -------------------------------------------------------
+
+    def query(self, vector: np.ndarray, k: int = 3) -> List[Tuple[int, float]]:
+        """The k nodes most similar to `vector`, as (node index, similarity)."""
+        theta = self._unit(vector)
+        with self._lock:
+            if self.n == 0:
+                return []
+            sims = self._vectors[:self.n] @ theta
+            k = min(k, self.n)
+            top = np.argpartition(-sims, k - 1)[:k] if k < self.n else np.arange(self.n)
+            top = top[np.argsort(-sims[top])]
+            return [(int(j), float(sims[j])) for j in top]
+
+    def reconcile(self, vector: np.ndarray, alpha: Optional[float] = None) -> np.ndarray:
+        """θ ← θ + α Σ sim(v, θ) · v over the active nodes."""
+        theta = np.asarray(vector, dtype=np.float32)
+        alpha = self.alpha if alpha is None else alpha
+        with self._lock:
+            if self.n == 0:
+                return theta.copy()
+            sims = self._vectors[:self.n] @ self._unit(theta)
+            active = self._active(sims)
+            return theta + alpha * (sims[active] @ self._vectors[active])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"nodes": self.n, "edges": self.n_edges, "merges": self.merges,
+                "observations": int(self.counts[:self.n].sum())}
+
+    # --- Persistence -----------------------------------------------------
+
+    def save(self, path: str):
+        """Writes the graph to an .npz file, atomically."""
+        with self._lock:
+            self._compact()
+            records = {"documents": self.documents, "metadatas": self.metadatas, "memory_ids": self.memory_ids}
+            arrays = {
+                "vectors": self.vectors,
+                "sums": self._sums[:self.n] if self._sums is not None else np.zeros((0, 0), np.float32),
+                "counts": self.counts[:self.n],
+                "indptr": self._indptr,
+                "indices": self._indices,
+                "data": self._data,
+                "records": np.array(json.dumps(records)),
+                "params": np.array([self.eta, self.tau_add, self.alpha, self.active_k, self.merges]),
+            }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "HebbianGraph":
+        """Reads a graph written by save(); keyword arguments override the stored parameters."""
+        with np.load(path) as f:
+            eta, tau_add, alpha, active_k, merges = f["params"]
+            params = {"eta": float(eta), "tau_add": float(tau_add), "alpha": float(alpha), "active_k": int(active_k)}
+            params.update(kwargs)
+            graph = cls(**params)
+            records = json.loads(str(f["records"]))
+            n = len(records["documents"])
+            graph.merges = int(merges)
+            if n:
+                graph.dim = f["vectors"].shape[1]
+                graph._grow(n)
+                graph._vectors[:n] = f["vectors"]
+                graph._sums[:n] = f["sums"]
+                graph.counts[:n] = f["counts"]
+            graph.n = n
+            graph.documents = records["documents"]
+            graph.metadatas = records["metadatas"]
+            graph.memory_ids = records["memory_ids"]
+            graph._indptr, graph._indices, graph._data = f["indptr"], f["indices"], f["data"]
+        return graph
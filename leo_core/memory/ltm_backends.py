@@ -0,0 +1,491 @@
+"""
+Project LEO: storage backends behind VectorMemory.
+
+A backend stores documents with their metadata and answers top-k semantic
+queries over them. VectorMemory owns ID generation and the embedding cache;
+backends receive the (cached) embedding function at construction.
+
+- ChromaBackend: the original chromadb.PersistentClient collection.
+- NumpyBackend: a dependency-free index over an append-only, memory-mapped
+  float32 matrix, searched by exact vectorized top-k or an IVF coarse
+  quantizer. It avoids SQLite, HNSW and IPC overhead, which dominate query
+  latency for LTMs of up to about a million vectors.
+"""
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+EmbeddingFn = Callable[[List[str]], List[np.ndarray]]
+
+
+class LTMBackend(ABC):
+    """
+    Interface shared by the LTM storage backends. Backends open lazily, on
+    first use. Search scores are cosine similarities (higher is closer), so
+    results from different backends and tiers can be merged.
+    """
+
+    embedding_fn: EmbeddingFn
+
+    @property
+    @abstractmethod
+    def opened(self) -> bool:
+        """Whether the store has been opened; checking it must not open it."""
+
+    @abstractmethod
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+            embeddings: Optional[np.ndarray] = None):
+        """Stores documents; precomputed embeddings (e.g. when moving between tiers) skip the model."""
+
+    @abstractmethod
+    def search(self, queries: List[str], n_results: int) -> List[List[Tuple[str, str, float]]]:
+        """Top-k (id, document, similarity) per query, best first."""
+
+    def query(self, queries: List[str], n_results: int) -> List[List[str]]:
+        return [[doc for _, doc, _ in hits] for hits in self.search(queries, n_results)]
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Records by ID (all when None) as {"ids", "documents", "metadatas", "embeddings"}."""
+
+    @abstractmethod
+    def scan(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        One page of {"ids", "metadatas"} in storage order, without documents or
+        embeddings, so maintenance can walk a large store in bounded memory.
+        """
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Removes records by ID; unknown IDs are ignored."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored records."""
+
+
+class ChromaBackend(LTMBackend):
+    """
+    LTM stored in a persistent ChromaDB collection; chromadb is imported on
+    first use. Documents and queries are embedded here, through the cached
+    embedding function, and chromadb only receives the vectors: the
+    collection is opened without an embedding function, so one persisted
+    with it (e.g. "default") is not overridden by another name.
+    """
+
+    def __init__(self, db_path: str, embedding_fn: EmbeddingFn, collection_name: str = "leo_ltm"):
+        self.db_path = db_path
+        self.embedding_fn = embedding_fn
+        self.collection_name = collection_name
+        self._client = None
+        self._collection = None
+        self._lock = threading.Lock()
+
+    @property
+    def opened(self) -> bool:
+        return self._collection is not None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import chromadb
+                    self._client = chromadb.PersistentClient(path=self.db_path)
+        return self._client
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            client = self.client
+            with self._lock:
+                if self._collection is None:
+                    self._collection = client.get_or_create_collection(
+                        name=self.collection_name,
+                        embedding_function=None
+                    )
+        return self._collection
+
+    @property
+    def space(self) -> str:
+        """The collection's distance space: set in its metadata (older collections) or its configuration."""
+        collection = self.collection
+        space = (collection.metadata or {}).get("hnsw:space")
+        if space is None:
+            hnsw = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+            space = hnsw.get("space")
+        return space or "l2"
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+            embeddings: Optional[np.ndarray] = None):
+        if embeddings is None:
+            embeddings = self.embedding_fn(documents)
+        self.collection.add(documents=documents, metadatas=metadatas, ids=ids,
+                            embeddings=[np.asarray(e, dtype=np.float32) for e in embeddings])
+
+    def search(self, queries: List[str], n_results: int) -> List[List[Tuple[str, str, float]]]:
+        count = self.collection.count()
+        if count == 0:
+            return [[] for _ in queries]
+        embeddings = [np.asarray(e, dtype=np.float32) for e in self.embedding_fn(queries)]
+        results = self.collection.query(query_embeddings=embeddings, n_results=min(n_results, count),
+                                        include=["documents", "distances"])
+        # Cosine and inner-product spaces report 1 - sim; the default squared L2
+        # over unit-norm embeddings (as MiniLM produces) is 2 - 2 cos
+        space = self.space
+        scale = 0.5 if space == "l2" else 1.0
+        return [
+            [(i, doc, 1.0 - scale * dist) for i, doc, dist in zip(ids, docs, dists)]
+            for ids, docs, dists in zip(results["ids"], results["documents"], results["distances"])
+        ]
+
+    def get(self, ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        records = self.collection.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+        embeddings = records.get("embeddings")
+        return {
+            "ids": list(records["ids"]),
+            "documents": list(records["documents"]),
+            "metadatas": [m or {} for m in records["metadatas"]],
+            "embeddings": np.asarray(embeddings if embeddings is not None else [], dtype=np.float32),
+        }
+
+    def scan(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        records = self.collection.get(include=["metadatas"], offset=offset, limit=limit)
+        return {"ids": list(records["ids"]), "metadatas": [m or {} for m in records["metadatas"]]}
+
+    def delete(self, ids: List[str]):
+        if ids:
+            self.collection.delete(ids=list(ids))
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest scores per row, best first."""
+    if k >= scores.shape[1]:
+        return np.argsort(-scores, axis=1)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def spherical_kmeans(X: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Lloyd iterations over unit rows; returns (unit centroids, assignment of each row)."""
+    rng = np.random.default_rng(seed)
+    centroids = X[rng.choice(X.shape[0], size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(X @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, X)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Empty clusters keep their previous centroid
+        centroids = np.where(empty[:, None], centroids, sums / np.maximum(norms, 1e-12))
+    centroids = centroids.astype(np.float32)
+    return centroids, np.argmax(X @ centroids.T, axis=1)
+
+
+class NumpyBackend(LTMBackend):
+    """
+    LTM stored as plain files under `path`:
+    - vectors.f32: preallocated float32 matrix of unit-norm embeddings,
+      opened with np.memmap and grown by doubling;
+    - documents.jsonl: one {"id", "document", "metadata"} record per row;
+    - deleted.txt: tombstoned row numbers, one per line;
+    - meta.json: the embedding dimension, committed row count and file generation.
+
+    Appends are crash-safe: rows are written and flushed, then their
+    document records are appended and fsynced, and only then is the new
+    count published by atomically replacing meta.json. After a crash,
+    vectors or records past the committed count are ignored and the
+    sidecar is truncated back to it. Deletes append to the tombstone file;
+    once tombstones exceed `vacuum_ratio` of the rows, live rows are
+    rewritten into next-generation files and meta.json is swapped to them.
+
+    Search scores queries by cosine similarity. With index="flat" every row
+    is scored in one matrix product (exact). With index="ivf", rows are
+    clustered into `n_lists` inverted lists by spherical k-means and a query
+    scans only its `n_probe` nearest lists, plus rows added since the last
+    training; the quantizer is retrained once those exceed half the
+    indexed rows.
+    """
+
+    def __init__(self, path: str, embedding_fn: EmbeddingFn, index: str = "flat",
+                 initial_capacity: int = 1024, n_lists: int = 64, n_probe: int = 8,
+                 vacuum_ratio: float = 0.25, seed: int = 0):
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"Unknown index '{index}'")
+        self.path = path
+        self.embedding_fn = embedding_fn
+        self.index = index
+        self.initial_capacity = initial_capacity
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.vacuum_ratio = vacuum_ratio
+        self.seed = seed
+        self.dim: Optional[int] = None
+        self._count = 0          # Committed rows, including tombstoned ones
+        self._generation = 0
+        self._matrix: Optional[np.memmap] = None
+        self._records: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._deleted = np.zeros(0, dtype=bool)
+        self._n_deleted = 0
+        self._opened = False
+        self._lock = threading.RLock()
+        # IVF state: unit centroids, and row ids grouped by list (rows >= _indexed are unassigned)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._indexed = 0
+        self._meta_path = os.path.join(path, "meta.json")
+
+    def _paths(self, generation: int) -> Tuple[str, str, str]:
+        suffix = f".{generation}" if generation else ""
+        return (os.path.join(self.path, f"vectors{suffix}.f32"),
+                os.path.join(self.path, f"documents{suffix}.jsonl"),
+                os.path.join(self.path, f"deleted{suffix}.txt"))
+
+    @property
+    def _data_path(self) -> str:
+        return self._paths(self._generation)[0]
+
+    @property
+    def _docs_path(self) -> str:
+        return self._paths(self._generation)[1]
+
+    @property
+    def _tombstone_path(self) -> str:
+        return self._paths(self._generation)[2]
+
+    @property
+    def opened(self) -> bool:
+        return self._opened
+
+    def _open(self):
+        if self._opened:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r") as f:
+                meta = json.load(f)
+            self.dim, self._count = meta["dim"], meta["count"]
+            self._generation = meta.get("generation", 0)
+            capacity = os.path.getsize(self._data_path) // (4 * self.dim)
+            self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        if os.path.exists(self._docs_path):
+            self._load_records()
+        self._deleted = np.zeros(0 if self._matrix is None else self._matrix.shape[0], dtype=bool)
+        if os.path.exists(self._tombstone_path):
+            with open(self._tombstone_path, "rb") as f:
+                # A torn last line (no newline) was never committed
+                rows = [int(line) for line in f if line.endswith(b"\n")]
+            rows = np.asarray([r for r in rows if r < self._count], dtype=np.int64)
+            self._deleted[rows] = True
+            self._n_deleted = int(self._deleted.sum())
+            for r in rows:
+                # An ID deleted and added again (e.g. promoted back to the hot tier) lives on in a later row
+                memory_id = self._records[r]["id"]
+                if self._row_of.get(memory_id) == r:
+                    del self._row_of[memory_id]
+        self._opened = True
+
+    def _load_records(self):
+        """Reads the first `count` records and drops anything a crash left behind them."""
+        records, offset = [], 0
+        with open(self._docs_path, "rb") as f:
+            for line in f:
+                if len(records) == self._count or not line.endswith(b"\n"):
+                    break
+                records.append(json.loads(line))
+                offset += len(line)
+        if len(records) < self._count:
+            raise RuntimeError(f"LTM sidecar {self._docs_path} has {len(records)} records, expected {self._count}")
+        if os.path.getsize(self._docs_path) != offset:
+            with open(self._docs_path, "r+b") as f:
+                f.truncate(offset)
+        self._records = records
+        self._row_of = {r["id"]: i for i, r in enumerate(records)}
+
+    def _ensure_capacity(self, rows: int):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        # Extending the file keeps the existing rows in place; the new tail reads as zeros
+        with open(self._data_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+        self._deleted = np.concatenate([self._deleted, np.zeros(new_capacity - self._deleted.size, dtype=bool)])
+
+    @staticmethod
+    def _unit(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _commit_meta(self, count: int, generation: int):
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "count": count, "generation": generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._meta_path)  # Commit point
+
+    @staticmethod
+    def _write_records(path: str, records: List[Dict[str, Any]], mode: str = "ab"):
+        with open(path, mode) as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+            embeddings: Optional[np.ndarray] = None):
+        vectors = self._unit(self.embedding_fn(documents) if embeddings is None else embeddings)
+        with self._lock:
+            self._open()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match LTM dimension {self.dim}")
+            start, end = self._count, self._count + len(ids)
+            self._ensure_capacity(end)
+            self._matrix[start:end] = vectors
+            self._matrix.flush()
+            records = [
+                {"id": i, "document": d, "metadata": m}
+                for i, d, m in zip(ids, documents, metadatas)
+            ]
+            self._write_records(self._docs_path, records)
+            self._commit_meta(end, self._generation)
+            self._records.extend(records)
+            self._row_of.update((r["id"], start + k) for k, r in enumerate(records))
+            self._count = end
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._open()
+            rows = [self._row_of.pop(i) for i in ids if i in self._row_of]
+            if not rows:
+                return
+            with open(self._tombstone_path, "ab") as f:
+                f.write("".join(f"{r}\n" for r in rows).encode("ascii"))
+                f.flush()
+                os.fsync(f.fileno())  # Commit point
+            self._deleted[rows] = True
+            self._n_deleted += len(rows)
+            if self._n_deleted > self.vacuum_ratio * self._count:
+                self._vacuum()
+
+    def _vacuum(self):
+        """Rewrites the live rows into next-generation files and swaps meta.json over to them."""
+        live = np.flatnonzero(~self._deleted[:self._count])
+        old_paths = self._paths(self._generation)
+        generation = self._generation + 1
+        data_path, docs_path, tombstone_path = self._paths(generation)
+        capacity = self.initial_capacity
+        while capacity < live.size:
+            capacity *= 2
+        matrix = np.memmap(data_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        matrix[:live.size] = self._matrix[live]
+        matrix.flush()
+        records = [self._records[r] for r in live]
+        self._write_records(docs_path, records, mode="wb")
+        if os.path.exists(tombstone_path):
+            os.remove(tombstone_path)  # Left over from an interrupted vacuum
+        self._commit_meta(int(live.size), generation)
+
+        del self._matrix
+        self._matrix, self._records, self._generation = matrix, records, generation
+        self._row_of = {r["id"]: i for i, r in enumerate(records)}
+        self._count = int(live.size)
+        self._deleted = np.zeros(capacity, dtype=bool)
+        self._n_deleted = 0
+        self._centroids, self._lists, self._indexed = None, [], 0
+        for old in old_paths:
+            if os.path.exists(old):
+                os.remove(old)
+
+    def _train(self):
+        n = self._count
+        k = min(self.n_lists, n)
+        self._centroids, assign = spherical_kmeans(np.asarray(self._matrix[:n]), k, iters=10, seed=self.seed)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(k + 1))
+        self._lists = [order[bounds[j]:bounds[j + 1]] for j in range(k)]
+        self._indexed = n
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if self._centroids is None or self._count - self._indexed > self._indexed // 2:
+            self._train()
+        n_probe = min(self.n_probe, len(self._lists))
+        probes = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+        pending = np.arange(self._indexed, self._count)
+        candidates = np.concatenate([self._lists[j] for j in probes] + [pending])
+        return candidates[~self._deleted[candidates]] if self._n_deleted else candidates
+
+    def search(self, queries: List[str], n_results: int) -> List[List[Tuple[str, str, float]]]:
+        with self._lock:
+            self._open()
+            if self._count - self._n_deleted == 0:
+                return [[] for _ in queries]
+        q = self._unit(self.embedding_fn(queries))
+        with self._lock:
+            n = self._count
+            k = min(n_results, n - self._n_deleted)
+            matrix = self._matrix[:n]
+            hits = []
+            # Too few rows for clustering to pay off: scan them all
+            if self.index == "flat" or n < 4 * self.n_lists:
+                scores = q @ matrix.T
+                if self._n_deleted:
+                    scores[:, self._deleted[:n]] = -np.inf
+                for row, best in zip(scores, _top_k(scores, k)):
+                    hits.append([(r, row[r]) for r in best])
+            else:
+                for vector in q:
+                    candidates = self._candidates(vector)
+                    scores = matrix[candidates] @ vector
+                    best = _top_k(scores[None, :], min(k, candidates.size))[0]
+                    hits.append([(candidates[b], scores[b]) for b in best])
+            return [
+                [(self._records[r]["id"], self._records[r]["document"], float(s)) for r, s in row]
+                for row in hits
+            ]
+
+    def get(self, ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            if ids is None:
+                rows = np.flatnonzero(~self._deleted[:self._count])
+            else:
+                rows = np.asarray([self._row_of[i] for i in ids if i in self._row_of], dtype=np.int64)
+            records = [self._records[r] for r in rows]
+            return {
+                "ids": [r["id"] for r in records],
+                "documents": [r["document"] for r in records],
+                "metadatas": [r["metadata"] for r in records],
+                "embeddings": np.asarray(self._matrix[rows]) if rows.size else np.zeros((0, self.dim or 0), np.float32),
+            }
+
+    def scan(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            rows = np.flatnonzero(~self._deleted[:self._count])
+            rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+            records = [self._records[r] for r in rows]
+            return {"ids": [r["id"] for r in records], "metadatas": [r["metadata"] for r in records]}
+
+    def count(self) -> int:
+        with self._lock:
+            self._open()
+            return self._count - self._n_deleted
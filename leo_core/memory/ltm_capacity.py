@@ -0,0 +1,164 @@
+"""
+Project LEO: LTM capacity management.
+
+A CapacityPolicy bounds the hot tier of VectorMemory. VectorMemory.maintain()
+applies it periodically:
+- promotion: cold memories retrieved since the last run move back to hot;
+- TTL: hot memories neither created nor retrieved within `ttl_s` are demoted;
+- capacity: while the hot tier exceeds `max_hot`, the lowest-ranked memories
+  (by LRU, hit count or importance) are demoted;
+- compaction: episodic memories older than `compact_after_s` are clustered
+  and every tight cluster is replaced by a single summary node. A run
+  clusters a random sample of at most `compact_batch_size` of them, so its
+  cost does not grow with the store; repeated runs cover the rest.
+
+Demoted memories go to the cold tier, which is searched only when the hot
+tier misses; without a cold tier they are deleted.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ltm_backends import spherical_kmeans
+
+EVICTION_POLICIES = ("lru", "hits", "importance")
+
+
+def created_at(memory_id: str, metadata: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Creation time in seconds: metadata["created_at"], else the mem_<ms>_<uuid> ID prefix."""
+    if metadata and "created_at" in metadata:
+        return float(metadata["created_at"])
+    parts = memory_id.split("_")
+    if len(parts) >= 3 and parts[0] == "mem" and parts[1].isdigit():
+        return int(parts[1]) / 1000.0
+    return None
+
+
+class CapacityPolicy:
+    """Configuration and ranking for LTM capacity management."""
+
+    def __init__(self,
+                 max_hot: Optional[int] = None,
+                 ttl_s: Optional[float] = None,
+                 eviction: str = "importance",
+                 half_life_s: float = 7 * 24 * 3600.0,
+                 compact_after_s: Optional[float] = None,
+                 compact_cluster_size: int = 8,
+                 compact_min_members: int = 3,
+                 compact_similarity: float = 0.75,
+                 compact_batch_size: int = 2048,
+                 miss_threshold: float = 0.5,
+                 interval_s: float = 300.0):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction}'. Available: {EVICTION_POLICIES}")
+        self.max_hot = max_hot
+        self.ttl_s = ttl_s
+        self.eviction = eviction
+        self.half_life_s = half_life_s                    # Recency decay used by importance
+        self.compact_after_s = compact_after_s            # None disables compaction
+        self.compact_cluster_size = compact_cluster_size  # Target memories per k-means cluster
+        self.compact_min_members = compact_min_members
+        self.compact_similarity = compact_similarity      # Min mean cosine to the centroid
+        self.compact_batch_size = compact_batch_size      # Max old memories read and clustered per run
+        self.miss_threshold = miss_threshold              # Best hot score below this searches cold
+        self.interval_s = interval_s                      # Minimum time between maintenance runs
+
+    def rank(self, hits: np.ndarray, last_access: np.ndarray, importance: np.ndarray,
+             now: float) -> np.ndarray:
+        """Retention score per memory; the lowest are evicted first."""
+        if self.eviction == "lru":
+            return last_access
+        if self.eviction == "hits":
+            return hits + last_access / (now + 1.0)  # Recency only breaks ties
+        recency = np.exp2(-(now - last_access) / self.half_life_s)
+        return importance + np.log1p(hits) + recency
+
+
+class UsageTracker:
+    """Retrieval hits and last-access times per memory ID, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._usage: Dict[str, List[float]] = {}  # id -> [hits, last_access]
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                self._usage = json.load(f)
+
+    def record(self, ids: List[str], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for memory_id in ids:
+                entry = self._usage.setdefault(memory_id, [0, now])
+                entry[0] += 1
+                entry[1] = now
+
+    def lookup(self, ids: List[str], created: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(hits, last_access) arrays; a never-retrieved memory was last accessed at creation."""
+        with self._lock:
+            entries = [self._usage.get(i) for i in ids]
+        hits = np.array([e[0] if e else 0 for e in entries], dtype=np.float64)
+        last = np.array([e[1] if e else c for e, c in zip(entries, created)], dtype=np.float64)
+        return hits, last
+
+    def forget(self, ids: List[str]):
+        with self._lock:
+            for memory_id in ids:
+                self._usage.pop(memory_id, None)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._usage)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+def plan_compaction(records: Dict[str, Any], policy: CapacityPolicy, now: float,
+                    max_summary_docs: int = 5) -> List[Dict[str, Any]]:
+    """
+    Groups old episodic memories into summary nodes. Returns one entry per
+    summary: {"members": [ids], "document", "metadata", "embedding"}, where
+    the embedding is the members' unit centroid.
+    """
+    if policy.compact_after_s is None:
+        return []
+    ids, docs, metas = records["ids"], records["documents"], records["metadatas"]
+    eligible = [
+        i for i, (memory_id, meta) in enumerate(zip(ids, metas))
+        if meta.get("type") != "summary"
+        and (created_at(memory_id, meta) or now) <= now - policy.compact_after_s
+    ]
+    if len(eligible) < policy.compact_min_members:
+        return []
+    X = np.asarray(records["embeddings"], dtype=np.float32)[eligible]
+    X = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    k = max(1, len(eligible) // policy.compact_cluster_size)
+    centroids, assign = spherical_kmeans(X, k)
+    cohesion = np.einsum("ij,ij->i", X, centroids[assign])
+
+    summaries = []
+    for c in range(k):
+        members = np.flatnonzero(assign == c)
+        if members.size < policy.compact_min_members or cohesion[members].mean() < policy.compact_similarity:
+            continue
+        # Most central members first, so the summary text leads with the cluster's core
+        members = members[np.argsort(-cohesion[members])]
+        rows = [eligible[m] for m in members]
+        newest = max((created_at(ids[r], metas[r]) or now) for r in rows)
+        summaries.append({
+            "members": [ids[r] for r in rows],
+            "document": f"Summary of {len(rows)} memories: " + " | ".join(docs[r] for r in rows[:max_summary_docs]),
+            "metadata": {"type": "summary", "members": len(rows), "created_at": newest,
+                         "importance": float(np.log1p(len(rows)))},
+            "embedding": centroids[c],
+        })
+    return summaries
@@ -1,49 +1,167 @@
-import json
+import logging
 import os
-from typing import List, Dict, Any
+import queue
+import threading
+from typing import List, Dict, Optional
+import numpy as np
+from .hebbian_graph import HebbianGraph
 from .vector_memory import VectorMemory
 
+logger = logging.getLogger(__name__)
+
 class MemoryManager:
     """
     LEO Hierarchical Memory System
     Implements Short-Term Memory (STM) and Long-Term Memory (LTM).
+
+    Consolidated memories pass through a Hebbian graph (stored at
+    storage_path) before reaching the vector store: near-duplicates
+    (similarity >= tau_add to an existing node) only reinforce that node and
+    its associations, so the vector store grows with distinct knowledge
+    rather than with turn count.
     """
     
-    def __init__(self, storage_path: str = "data/memory.json"):
+    def __init__(self, storage_path: str = "data/ltm_graph.npz",
+                 background_consolidation: bool = True, consolidation_queue_size: int = 8,
+                 ltm: Optional[VectorMemory] = None, tau_add: float = 0.9):
         self.storage_path = storage_path
+        self.tau_add = tau_add
+        self._graph: Optional[HebbianGraph] = None # Loaded on first consolidation
+        self._graph_lock = threading.Lock()
         # STM: Lightweight circular buffer
         self.stm: List[Dict[str, str]] = []
+        self._stm_lock = threading.RLock() # STM is shared by concurrent requests
         # LTM: Upgraded to Vector Storage for Semantic Reasoning
-        self.ltm = VectorMemory()
+        self.ltm = ltm if ltm is not None else VectorMemory()
+        # Capacity maintenance deletes and merges memories; graph nodes follow their entries
+        self.ltm.on_memories_removed = self._memories_removed
+        # Consolidation runs off the request path on a worker fed by a bounded
+        # queue; a full queue blocks the producer, which is the backpressure.
+        self.background_consolidation = background_consolidation
+        self._consolidation_queue: "queue.Queue[Optional[List[Dict[str, str]]]]" = queue.Queue(
+            maxsize=consolidation_queue_size
+        )
+        self._consolidation_worker: Optional[threading.Thread] = None
 
-    def _load_ltm(self) -> Dict:
+    @property
+    def graph(self) -> HebbianGraph:
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = self._load_ltm()
+        return self._graph
+
+    def _load_ltm(self) -> HebbianGraph:
         if os.path.exists(self.storage_path):
-            with open(self.storage_path, "r") as f:
-                return json.load(f)
-        return {"nodes": [], "edges": []}
+            return HebbianGraph.load(self.storage_path, tau_add=self.tau_add)
+        return HebbianGraph(tau_add=self.tau_add)
 
     def consolidate_to_ltm(self):
         """
         Hebbian Update: Consolidating STM patterns into the Vector LTM.
+        The STM snapshot is handed to the background worker as one batch.
         """
-        for item in self.stm:
-            content = f"{item['role']}: {item['content']}"
-            self.ltm.add_memory(content=content, metadata={"source": "stm_consolidation"})
-        self.stm = [] # Clear STM after consolidation
+        with self._stm_lock:
+            batch, self.stm = self.stm, [] # Clear STM after consolidation
+        if not batch:
+            return
+        if not self.background_consolidation:
+            self._write_batch(batch)
+            return
+        if self._consolidation_worker is None:
+            self._consolidation_worker = threading.Thread(target=self._consolidation_loop, daemon=True)
+            self._consolidation_worker.start()
+        self._consolidation_queue.put(batch)
+
+    def _write_batch(self, batch: List[Dict[str, str]]):
+        contents = [f"{item['role']}: {item['content']}" for item in batch]
+        metadatas = [{"source": "stm_consolidation"} for _ in batch]
+        # Novelty gate: only memories that open a new graph node are stored, or that
+        # land on a node whose entry maintenance deleted (once per node).
+        # The embeddings are cached, so the vector store does not recompute them.
+        nodes, _ = self.graph.observe_batch(self.ltm.embed(contents), contents, metadatas)
+        unbound = np.flatnonzero(self.graph.unbound(nodes))
+        _, first = np.unique(nodes[unbound], return_index=True)
+        keep = np.sort(unbound[first])
+        if keep.size == 0:
+            return
+        ids = self.ltm.add_memories([contents[i] for i in keep], [metadatas[i] for i in keep])
+        self.graph.bind_memory_ids(nodes[keep], ids)
+
+    def _memories_removed(self, memory_ids: List[str], replacement: Optional[str]):
+        # Compacted memories live on in their summary; deleted ones can be stored again
+        self.graph.rebind_memory_ids(memory_ids, replacement)
+
+    def _consolidation_loop(self):
+        while True:
+            batch = self._consolidation_queue.get()
+            try:
+                if batch is None:
+                    return
+                self._write_batch(batch)
+                # Capacity maintenance piggybacks on the worker, off the request path
+                report = self.ltm.maybe_maintain()
+                if report and any(report.values()):
+                    logger.info("LTM maintenance: %s", report)
+            except Exception as e:
+                logger.exception("Consolidation failed: %s", e)
+            finally:
+                self._consolidation_queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued consolidation batch has been written to LTM, then saves the graph."""
+        if self._consolidation_worker is not None:
+            self._consolidation_queue.join()
+        self._save_ltm()
+
+    def close(self):
+        """Drains pending consolidation, stops the background worker and saves the graph."""
+        if self._consolidation_worker is not None:
+            self._consolidation_queue.join()
+            self._consolidation_queue.put(None)
+            self._consolidation_worker.join()
+            self._consolidation_worker = None
+        self._save_ltm()
 
     def _save_ltm(self):
-        # VectorMemory handles its own persistence via PersistentClient
-        pass
+        # VectorMemory persists its own store; the graph is written here
+        if self._graph is not None:
+            self._graph.save(self.storage_path)
 
     def add_to_stm(self, role: str, content: str):
-        self.stm.append({"role": role, "content": content})
-        if len(self.stm) > 10:
+        with self._stm_lock:
+            self.stm.append({"role": role, "content": content})
+            overflow = len(self.stm) > 10
+        if overflow:
             self.consolidate_to_ltm()
 
     def get_context(self, query: str = "") -> str:
         """
         Reconciliation: Combining recent STM with semantic LTM retrieval.
         """
-        recent = self.stm[-3:] if self.stm else []
-        semantic_context = self.ltm.query_memory(query) if query else []
-        return f"Recent: {recent} | Semantic Context: {semantic_context}"
+        return self.get_contexts([query])[0]
+
+    def reconcile(self, query: str, k: int = 3) -> List[str]:
+        """
+        Associative recall: the query embedding is pulled toward the graph
+        nodes it activates (HebbianGraph.reconcile) and the documents of the
+        k nodes nearest the result are returned.
+        """
+        graph = self.graph
+        if not query or graph.n == 0:
+            return []
+        theta = graph.reconcile(self.ltm.embed([query])[0])
+        return [graph.documents[node] for node, _ in graph.query(theta, k)]
+
+    def get_contexts(self, queries: List[str]) -> List[str]:
+        """
+        Batched get_context: all non-empty queries share one LTM query call.
+        """
+        with self._stm_lock:
+            recent = self.stm[-3:] if self.stm else []
+        texts = [q for q in queries if q]
+        results = iter(self.ltm.query_memories(texts) if texts else [])
+        return [
+            f"Recent: {recent} | Semantic Context: {next(results) if q else []}"
+            for q in queries
+        ]
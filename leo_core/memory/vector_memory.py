@@ -1,50 +1,296 @@
-import chromadb
-from chromadb.utils import embedding_functions
-import os
-from typing import List, Dict, Any
+import threading
+import time
+import uuid
+import numpy as np
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple, Union
+from .embedding_cache import CachedEmbeddingFunction
+from .ltm_backends import ChromaBackend, LTMBackend, NumpyBackend
+from .ltm_capacity import CapacityPolicy, UsageTracker, created_at, plan_compaction
+from ..telemetry.metrics import REGISTRY
+
+_QUERY_SECONDS = REGISTRY.histogram("leo_memory_query_seconds", "LTM retrieval per query_memories call")
+_ADD_SECONDS = REGISTRY.histogram("leo_memory_add_seconds", "LTM writes per add_memories call")
+_STORE_SIZE = REGISTRY.gauge("leo_memory_store_size", "Memories in the LTM, by tier", ["tier"])
 
 class VectorMemory:
     """
     Advanced LTM implementation for Project LEO using ChromaDB.
     Enables semantic retrieval and Hebbian-like association through vector similarity.
+
+    Storage is delegated to an LTM backend: "chroma" (default), "numpy"
+    (the memory-mapped NumpyBackend under db_path) or an LTMBackend
+    instance. Nothing is opened at construction: the backend, the embedding
+    model and chromadb itself are loaded on first use, so a node that never
+    touches its LTM never pays for them.
+
+    With a CapacityPolicy the store is split into a bounded hot tier and an
+    optional cold tier (`cold_backend`, stored next to db_path) that is only
+    searched when the hot tier misses; maintain() enforces the policy.
+    Memories it removes for good are reported to `on_memories_removed(ids,
+    replacement)`, with the ID of the summary that replaced them when they
+    were compacted and None when they were deleted.
     """
     
-    def __init__(self, db_path: str = "data/chroma_db"):
-        self.client = chromadb.PersistentClient(path=db_path)
-        # Using a default embedding function (can be upgraded to OpenAI later)
-        self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
-        self.collection = self.client.get_or_create_collection(
-            name="leo_ltm",
-            embedding_function=self.embedding_fn
-        )
+    def __init__(self, db_path: str = "data/chroma_db",
+                 embedding_cache_size: int = 4096, embedding_cache_path: Optional[str] = None,
+                 backend: Union[str, LTMBackend] = "chroma",
+                 cold_backend: Union[None, str, LTMBackend] = None,
+                 policy: Optional[CapacityPolicy] = None,
+                 **backend_options):
+        for name in (backend, cold_backend):
+            if isinstance(name, str) and name not in ("chroma", "numpy"):
+                raise ValueError(f"Unknown LTM backend '{name}'")
+        self.db_path = db_path
+        self.embedding_cache_size = embedding_cache_size
+        self.embedding_cache_path = embedding_cache_path
+        self.backend_name = backend if isinstance(backend, str) else type(backend).__name__
+        self.backend_options = backend_options
+        self._backend: Optional[LTMBackend] = None if isinstance(backend, str) else backend
+        self.cold_backend_name = cold_backend if isinstance(cold_backend, str) else None
+        self._cold: Optional[LTMBackend] = None if isinstance(cold_backend, str) else cold_backend
+        self._embedding_fn: Optional[CachedEmbeddingFunction] = None
+        self._init_lock = threading.Lock()
+        # Capacity management: retrieval statistics, cold hits awaiting promotion
+        self.policy = policy
+        self.usage = UsageTracker(db_path.rstrip("/") + "_usage.json" if policy else None)
+        self._cold_hits: Set[str] = set()
+        self._cold_hits_lock = threading.Lock()  # Queries add to it while maintain() swaps it out
+        self._maintenance_lock = threading.Lock()
+        # maintain() reads IDs and metadata in pages of this many records
+        self.maintenance_page_size = 1024
+        self._last_maintenance = time.time()
+        self.on_memories_removed: Optional[Callable[[List[str], Optional[str]], None]] = None
+        # Read at scrape time; a store that was never opened reports 0 rather than opening it
+        _STORE_SIZE.labels("hot").set_function(lambda: self.backend.count() if self.initialized else 0)
+        _STORE_SIZE.labels("cold").set_function(lambda: self._cold.count() if self._cold is not None else 0)
+
+    @property
+    def embedding_fn(self) -> CachedEmbeddingFunction:
+        if self._embedding_fn is None:
+            with self._init_lock:
+                if self._embedding_fn is None:
+                    from chromadb.utils import embedding_functions
+                    # Using a default embedding function (can be upgraded to OpenAI later),
+                    # behind a content-addressed cache shared by add_memory and query_memory
+                    self._embedding_fn = CachedEmbeddingFunction(
+                        embedding_functions.DefaultEmbeddingFunction(),
+                        capacity=self.embedding_cache_size,
+                        disk_path=self.embedding_cache_path
+                    )
+        return self._embedding_fn
+
+    def _make_backend(self, name: str, path: str) -> LTMBackend:
+        embedding_fn = self.embedding_fn
+        if name == "numpy":
+            return NumpyBackend(path, embedding_fn, **self.backend_options)
+        return ChromaBackend(path, embedding_fn, **self.backend_options)
+
+    @property
+    def backend(self) -> LTMBackend:
+        """The (hot) store every memory is written to."""
+        if self._backend is None:
+            backend = self._make_backend(self.backend_name, self.db_path)
+            with self._init_lock:
+                if self._backend is None:
+                    self._backend = backend
+        return self._backend
+
+    @property
+    def cold(self) -> Optional[LTMBackend]:
+        """The cold tier, or None when demoted memories are simply deleted."""
+        if self._cold is None and self.cold_backend_name is not None:
+            cold = self._make_backend(self.cold_backend_name, self.db_path.rstrip("/") + "_cold")
+            with self._init_lock:
+                if self._cold is None:
+                    self._cold = cold
+        return self._cold
+
+    @property
+    def initialized(self) -> bool:
+        """Whether the vector store has been opened yet."""
+        return self._backend is not None and self._backend.opened
+
+    @staticmethod
+    def _new_memory_id() -> str:
+        # Timestamp prefix keeps IDs roughly time-ordered; the UUID makes them
+        # unique even when many memories are written in the same millisecond.
+        return f"mem_{int(time.time() * 1000)}_{uuid.uuid4().hex}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embeds texts with the store's (cached) embedding function."""
+        return np.asarray(self.backend.embedding_fn(list(texts)), dtype=np.float32)
 
     def add_memory(self, content: str, metadata: Dict[str, Any] = None):
         """
         Adds a new memory node to the LTM vector space.
         """
-        # Generate a simple ID based on timestamp
-        import time
-        memory_id = f"mem_{int(time.time() * 1000)}"
-        self.collection.add(
-            documents=[content],
-            metadatas=[metadata or {"type": "episodic"}],
-            ids=[memory_id]
-        )
+        self.add_memories([content], [metadata] if metadata else None)
+
+    def add_memories(self, contents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+        """
+        Adds several memory nodes with a single collection write, so the whole
+        batch is embedded in one call and committed in one transaction.
+        """
+        if not contents:
+            return []
+        ids = [self._new_memory_id() for _ in contents]
+        with _ADD_SECONDS.time():
+            self.backend.add(ids, list(contents), metadatas or [{"type": "episodic"} for _ in contents])
+        return ids
 
     def query_memory(self, query: str, n_results: int = 3) -> List[str]:
         """
         Semantic retrieval from LTM.
         """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        return results['documents'][0] if results['documents'] else []
+        return self.query_memories([query], n_results)[0]
+
+    def query_memories(self, queries: List[str], n_results: int = 3) -> List[List[str]]:
+        """
+        Semantic retrieval for several queries with one collection query.
+        """
+        if not queries:
+            return []
+        with _QUERY_SECONDS.time():
+            return self._query_memories(queries, n_results)
+
+    def _query_memories(self, queries: List[str], n_results: int) -> List[List[str]]:
+        if self.policy is None:
+            return self.backend.query(list(queries), n_results)
+        results = self.backend.search(list(queries), n_results)
+        # Cold memories are only searched for the queries the hot tier missed
+        misses = [
+            i for i, hits in enumerate(results)
+            if len(hits) < n_results or hits[0][2] < self.policy.miss_threshold
+        ]
+        cold = self.cold
+        if misses and cold is not None and cold.count() > 0:
+            cold_results = cold.search([queries[i] for i in misses], n_results)
+            for i, cold_hits in zip(misses, cold_results):
+                with self._cold_hits_lock:
+                    self._cold_hits.update(memory_id for memory_id, _, _ in cold_hits)
+                merged = {hit[0]: hit for hit in results[i] + cold_hits}  # A memory mid-move may be in both tiers
+                results[i] = sorted(merged.values(), key=lambda hit: -hit[2])[:n_results]
+        self.usage.record([memory_id for hits in results for memory_id, _, _ in hits])
+        return [[doc for _, doc, _ in hits] for hits in results]
+
+    def maybe_maintain(self) -> Optional[Dict[str, int]]:
+        """Runs maintain() if the policy's interval has elapsed since the last run."""
+        if self.policy is None or time.time() - self._last_maintenance < self.policy.interval_s:
+            return None
+        return self.maintain()
+
+    def maintain(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Enforces the capacity policy: promotes cold hits, demotes expired and
+        excess hot memories, and compacts old episodic memories into summary
+        nodes. Returns how many memories each step touched.
+        """
+        report = {"promoted": 0, "expired": 0, "evicted": 0, "compacted": 0, "summaries": 0}
+        policy = self.policy
+        if policy is None:
+            return report
+        now = time.time() if now is None else now
+        with self._maintenance_lock:
+            hot, cold = self.backend, self.cold
+            with self._cold_hits_lock:
+                promoted, self._cold_hits = list(self._cold_hits), set()
+            if cold is not None and promoted:
+                report["promoted"] = self._move(cold, hot, cold.get(promoted))
+
+            # Demotion is decided from IDs and metadata; only the demoted records are read in full
+            ids, metas = self._scan(hot)
+            created = np.array([created_at(i, m) or now for i, m in zip(ids, metas)], dtype=np.float64)
+            hits, last_access = self.usage.lookup(ids, created)
+            demote = np.zeros(len(ids), dtype=bool)
+            if policy.ttl_s is not None:
+                demote = now - last_access > policy.ttl_s
+                report["expired"] = int(demote.sum())
+            if policy.max_hot is not None:
+                kept = np.flatnonzero(~demote)
+                excess = kept.size - policy.max_hot
+                if excess > 0:
+                    importance = np.array([float(m.get("importance", 0.0)) for m in metas])
+                    score = policy.rank(hits[kept], last_access[kept], importance[kept], now)
+                    demote[kept[np.argpartition(score, excess - 1)[:excess]]] = True
+                    report["evicted"] = excess
+            if demote.any():
+                self._move(hot, cold, hot.get([ids[r] for r in np.flatnonzero(demote)]))
+            del ids, metas
+
+            # Compact where old memories end up: the cold tier, or hot without one
+            target = cold if cold is not None else hot
+            for summary in plan_compaction(self._compaction_candidates(target, now), policy, now):
+                summary_id = self._new_memory_id()
+                target.add([summary_id], [summary["document"]], [summary["metadata"]],
+                           embeddings=summary["embedding"][None, :])
+                target.delete(summary["members"])
+                self.usage.forget(summary["members"])
+                self._removed(summary["members"], summary_id)
+                report["compacted"] += len(summary["members"])
+                report["summaries"] += 1
+            self.usage.save()
+            self._last_maintenance = now
+        return report
+
+    def _scan(self, backend: LTMBackend) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Every (id, metadata) of a store, read page by page."""
+        ids: List[str] = []
+        metas: List[Dict[str, Any]] = []
+        while True:
+            page = backend.scan(len(ids), self.maintenance_page_size)
+            ids.extend(page["ids"])
+            metas.extend(page["metadatas"])
+            if len(page["ids"]) < self.maintenance_page_size:
+                return ids, metas
+
+    def _compaction_candidates(self, backend: LTMBackend, now: float) -> Dict[str, Any]:
+        """
+        The full records of the memories old enough to compact (see
+        plan_compaction): a random sample of at most compact_batch_size of
+        them, so a run reads and clusters a bounded number of embeddings.
+        """
+        if self.policy.compact_after_s is None:
+            return {"ids": [], "documents": [], "metadatas": [], "embeddings": np.zeros((0, 0), np.float32)}
+        cutoff = now - self.policy.compact_after_s
+        ids, metas = self._scan(backend)
+        old = [i for i, m in zip(ids, metas) if m.get("type") != "summary" and (created_at(i, m) or now) <= cutoff]
+        if len(old) < self.policy.compact_min_members:
+            return {"ids": [], "documents": [], "metadatas": [], "embeddings": np.zeros((0, 0), np.float32)}
+        if len(old) > self.policy.compact_batch_size:
+            sample = np.random.default_rng().choice(len(old), self.policy.compact_batch_size, replace=False)
+            old = [old[i] for i in sample]
+        return backend.get(old)
+
+    def _move(self, src: LTMBackend, dst: Optional[LTMBackend], records: Dict[str, Any]) -> int:
+        """Copies records to dst (when given) before deleting them from src."""
+        ids = records["ids"]
+        if not ids:
+            return 0
+        if dst is not None:
+            dst.add(ids, records["documents"], records["metadatas"], embeddings=records["embeddings"])
+        else:
+            self.usage.forget(ids)
+        src.delete(ids)
+        if dst is None:
+            self._removed(ids)
+        return len(ids)
+
+    def _removed(self, ids: List[str], replacement: Optional[str] = None):
+        if self.on_memories_removed is not None:
+            self.on_memories_removed(list(ids), replacement)
+
+    def embedding_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the embedding cache."""
+        stats = getattr(self.backend.embedding_fn, "stats", None)
+        return stats() if stats else {}
 
     def get_all_context(self) -> str:
         """
         Summarizes or retrieves key context for the brain.
         """
         # For now, just return the count of memories to show it's working
-        count = self.collection.count()
+        count = self.backend.count()
+        cold = self.cold
+        if cold is not None:
+            return f"LTM contains {count} semantic nodes ({cold.count()} more in cold storage)."
         return f"LTM contains {count} semantic nodes."
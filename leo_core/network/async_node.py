@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from ..telemetry.metrics import REGISTRY
+from .wire import (BYTES_RECEIVED, BYTES_SENT, CONNECT_SECONDS, MESSAGES_RECEIVED, MESSAGES_SENT,
+                   SEND_FAILURES, encode_message, read_frame_async)
+
+logger = logging.getLogger(__name__)
+
+_DROPPED = REGISTRY.counter("leo_p2p_backpressure_drops_total", "Queued frames shed because a peer's queue was full")
+
+class AsyncP2PNode:
+    """
+    Project LEO: asyncio networking layer.
+    Same start/connect_to_peer/broadcast/stop surface as P2PNode, but all
+    sockets are served by a single event loop running on one background
+    thread. Every peer gets a bounded send queue drained by its own writer
+    task, so broadcast() returns immediately and a slow or dead peer only
+    ever backs up its own queue.
+    """
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 5000,
+                 connect_timeout: float = 2.0,
+                 send_timeout: float = 2.0,
+                 queue_size: int = 64):
+        self.host = host
+        self.port = port
+        self.peers: List[tuple] = []
+        self.connect_timeout = connect_timeout
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.on_message_received: Callable = None
+        self.running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._queues: Dict[Tuple[str, int], asyncio.Queue] = {}
+        self._writers: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._retired: Set[asyncio.Task] = set()
+        self._inbound: Set[asyncio.StreamWriter] = set()
+        # Per-peer counters: frames dropped by backpressure and failed sends
+        self.dropped: Dict[Tuple[str, int], int] = {}
+        self.failures: Dict[Tuple[str, int], int] = {}
+        self._sent, self._sent_bytes = MESSAGES_SENT.labels("asyncio"), BYTES_SENT.labels("asyncio")
+        self._received, self._received_bytes = MESSAGES_RECEIVED.labels("asyncio"), BYTES_RECEIVED.labels("asyncio")
+        self._send_failures = SEND_FAILURES.labels("asyncio")
+        self._connect_time = CONNECT_SECONDS.labels("asyncio")
+
+    def start(self):
+        """Starts the event loop thread and the listening server."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.running = True
+        # Block until the server is bound so bind errors surface to the caller
+        asyncio.run_coroutine_threadsafe(self._start_server(), self._loop).result()
+        logger.info("Async node started on %s:%d", self.host, self.port)
+        for peer in self.peers:
+            self._loop.call_soon_threadsafe(self._ensure_writer, peer)
+
+    async def _start_server(self):
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, reuse_address=True
+        )
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        address = writer.get_extra_info("peername")
+        self._inbound.add(writer)
+        try:
+            while self.running:
+                frame = await read_frame_async(reader)
+                if frame is None:
+                    break
+                message, size = frame
+                self._received.inc()
+                self._received_bytes.inc(size)
+                if self.on_message_received:
+                    self.on_message_received(message, address)
+        except Exception as e:
+            if self.running:
+                logger.warning("Error handling client %s: %s", address, e)
+        finally:
+            self._inbound.discard(writer)
+            writer.close()
+
+    def connect_to_peer(self, host: str, port: int):
+        """Adds a peer; its writer task connects lazily on the first send."""
+        if (host, port) not in self.peers and (host != self.host or port != self.port):
+            self.peers.append((host, port))
+            if self.running:
+                self._loop.call_soon_threadsafe(self._ensure_writer, (host, port))
+            logger.info("Connected to peer %s:%d", host, port)
+
+    def broadcast(self, message: dict):
+        """Queues a message for every peer without waiting for delivery."""
+        if not self.running:
+            return
+        # Snapshot into one buffer: the caller may mutate its arrays after we return
+        frame = b"".join(encode_message(message))
+        self._loop.call_soon_threadsafe(self._enqueue_all, frame)
+
+    def send_to_peer(self, host: str, port: int, message: dict):
+        """Queues a direct message to a specific peer."""
+        if not self.running:
+            return
+        frame = b"".join(encode_message(message))
+        self._loop.call_soon_threadsafe(self._enqueue, (host, port), frame)
+
+    def _ensure_writer(self, peer: Tuple[str, int]) -> asyncio.Queue:
+        queue = self._queues.get(peer)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queues[peer] = queue
+            self.dropped.setdefault(peer, 0)
+            self.failures.setdefault(peer, 0)
+            self._writers[peer] = self._loop.create_task(self._peer_writer(peer, queue))
+        return queue
+
+    def _enqueue_all(self, frame: bytes):
+        for peer in self.peers:
+            self._enqueue(peer, frame)
+
+    def _enqueue(self, peer: Tuple[str, int], frame: bytes):
+        queue = self._ensure_writer(peer)
+        if queue.full():
+            # Backpressure: ADMM updates supersede each other, so shed the oldest
+            queue.get_nowait()
+            self.dropped[peer] += 1
+            _DROPPED.inc()
+        queue.put_nowait(frame)
+
+    async def _peer_writer(self, peer: Tuple[str, int], queue: asyncio.Queue):
+        writer: Optional[asyncio.StreamWriter] = None
+        try:
+            while True:
+                frame = await queue.get()
+                if frame is None: # Shutdown sentinel
+                    break
+                try:
+                    if writer is None:
+                        start = time.perf_counter()
+                        _, writer = await asyncio.wait_for(
+                            asyncio.open_connection(*peer), self.connect_timeout
+                        )
+                        self._connect_time.observe(time.perf_counter() - start)
+                    writer.write(frame)
+                    await asyncio.wait_for(writer.drain(), self.send_timeout)
+                    self._sent.inc()
+                    self._sent_bytes.inc(len(frame))
+                except (OSError, asyncio.TimeoutError) as e:
+                    self.failures[peer] += 1
+                    self._send_failures.inc()
+                    logger.warning("Failed to send message to %s:%d: %r", peer[0], peer[1], e)
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def disconnect(self, host: str, port: int):
+        """Closes the connection to a peer once its queued frames are written."""
+        if self.running:
+            self._loop.call_soon_threadsafe(self._close_writer, (host, port))
+
+    def _close_writer(self, peer: Tuple[str, int]):
+        queue = self._queues.pop(peer, None)
+        task = self._writers.pop(peer, None)
+        if task is not None:
+            # Still awaited by _shutdown if it has not exited by then
+            self._retired.add(task)
+            task.add_done_callback(self._retired.discard)
+        if queue is not None:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped[peer] += 1
+            queue.put_nowait(None) # The writer exits after draining what is ahead of it
+
+    def queue_depths(self) -> Dict[Tuple[str, int], int]:
+        """Number of frames waiting in each peer's send queue."""
+        return {peer: q.qsize() for peer, q in self._queues.items()}
+
+    async def _shutdown(self):
+        # Wake idle writers with a sentinel and cancel any blocked in I/O.
+        # wait_for() can swallow a cancel that races with completion, so the
+        # sentinel is what guarantees every writer exits.
+        for queue in self._queues.values():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        tasks = list(self._writers.values()) + list(self._retired)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._inbound):
+            writer.close()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,233 @@
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..brain.selc import LatencyHistogram
+from ..telemetry.metrics import REGISTRY
+from .metrics_server import TelemetryRequestHandler
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE = REGISTRY.histogram("leo_server_batch_size", "Requests per micro-batch tick",
+                                 buckets=(1, 2, 4, 8, 16, 32, 64))
+_BATCH_FAILURES = REGISTRY.counter("leo_server_batch_failures_total", "Micro-batch ticks that raised")
+_QUEUE_DEPTH = REGISTRY.gauge("leo_server_queue_depth", "Requests waiting for the next tick")
+
+
+class MicroBatcher:
+    """
+    Project LEO: request micro-batching in front of HybridBrain.
+    Callers submit requests from any thread and get a Future back. A single
+    worker drains the queue into batches of at most `max_batch_size`
+    requests, waiting at most `max_wait_ms` after the first one arrives, and
+    runs each batch through brain.process_batch as one tick.
+
+    The two knobs trade latency for throughput: a larger batch or a longer
+    wait shares the context query and the consensus step among more
+    requests, at the cost of queueing delay for the first one in.
+    """
+
+    def __init__(self, brain, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        self.brain = brain
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Optional[Tuple[str, Optional[float], Future]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.running = False
+        self.batches = 0
+        self.requests = 0
+        self.batch_latency = LatencyHistogram()
+
+    def start(self):
+        self.running = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Stops the worker after the requests already queued are served."""
+        if not self.running:
+            return
+        self.running = False
+        self._queue.put(None)
+        self._worker.join()
+
+    def submit(self, request: str, latency_budget_ms: Optional[float] = None) -> Future:
+        future: Future = Future()
+        if not self.running:
+            future.set_exception(RuntimeError("MicroBatcher is not running"))
+            return future
+        self._queue.put((request, latency_budget_ms, future))
+        return future
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """Gathers up to max_batch_size items, waiting at most max_wait_ms after the first."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect(first)
+            # One tick per latency budget so a tight request never runs a looser circuit
+            groups: Dict[Optional[float], List] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for budget, items in groups.items():
+                self._process(items, budget)
+        # Drain whatever is left so no caller waits forever
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[2].set_exception(RuntimeError("MicroBatcher stopped"))
+
+    def _process(self, items: List, budget: Optional[float]):
+        start = time.perf_counter()
+        try:
+            responses = self.brain.process_batch([item[0] for item in items], budget)
+        except Exception as e:
+            logger.exception("Batch of %d failed", len(items))
+            _BATCH_FAILURES.inc()
+            for item in items:
+                item[2].set_exception(e)
+            return
+        self.batch_latency.record((time.perf_counter() - start) * 1000.0)
+        self.batches += 1
+        self.requests += len(items)
+        _BATCH_SIZE.observe(len(items))
+        for item, response in zip(items, responses):
+            item[2].set_result(response)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "batch_latency": self.batch_latency.snapshot(),
+        }
+
+
+class _BrainRequestHandler(TelemetryRequestHandler):
+    server: "_BrainHTTPServer"
+
+    def _reply(self, status: int, payload: Dict[str, Any]):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def do_POST(self):
+        if self.path != "/request":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            request = payload["input"]
+            budget = payload.get("latency_budget_ms")
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"Invalid request: {e}"})
+            return
+        start = time.perf_counter()
+        try:
+            response = self.server.batcher.submit(request, budget).result(self.server.request_timeout)
+        except Exception as e:
+            self._reply(503, {"error": str(e)})
+            return
+        self._reply(200, {"response": response, "latency_ms": (time.perf_counter() - start) * 1000.0})
+
+    def do_GET(self):
+        if self.reply_telemetry():
+            return
+        if self.path == "/stats":
+            self._reply(200, {
+                "batching": self.server.batcher.stats(),
+                "selc": self.server.batcher.brain.get_selc_telemetry(),
+                "consensus": self.server.batcher.brain.get_round_telemetry(),
+                "attestations": self.server.batcher.brain.get_attestation_telemetry(),
+            })
+        else:
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def log_message(self, format, *args):
+        pass  # Per-request access logs would dominate the console under load
+
+
+class _BrainHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 resets connections under a burst of clients
+    request_queue_size = 128
+    batcher: MicroBatcher
+    request_timeout: float
+
+
+class BrainServer:
+    """
+    Project LEO: local HTTP front end for a HybridBrain.
+    POST /request with {"input": ..., "latency_budget_ms": optional} returns
+    {"response": ..., "latency_ms": ...}; GET /stats returns batching, SELC,
+    consensus round and attestation telemetry, and GET /metrics and /traces
+    serve the process's Prometheus metrics and recent request traces. Each
+    connection gets its own handler thread, but all brain
+    work goes through one MicroBatcher, so the brain itself is only ever
+    driven from the batcher's worker.
+    """
+
+    def __init__(self, brain, host: str = "127.0.0.1", port: int = 8080,
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0,
+                 request_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(brain, max_batch_size, max_wait_ms)
+        self.request_timeout = request_timeout
+        self._httpd: Optional[_BrainHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.batcher.start()
+        self._httpd = _BrainHTTPServer((self.host, self.port), _BrainRequestHandler)
+        self._httpd.batcher = self.batcher
+        self._httpd.request_timeout = self.request_timeout
+        # Port 0 picks a free port; report the bound one
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        _QUEUE_DEPTH.set_function(self.batcher._queue.qsize)
+        logger.info("Listening on http://%s:%d (batch size %d, max wait %s ms)",
+                    self.host, self.port, self.batcher.max_batch_size, self.batcher.max_wait_ms)
+
+    def serve_forever(self):
+        """Blocks until interrupted."""
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        self.batcher.stop()
@@ -0,0 +1,458 @@
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ALIVE, SUSPECT, DEAD = "alive", "suspect", "dead"
+_STATUS_RANK = {ALIVE: 0, SUSPECT: 1, DEAD: 2}
+
+GOSSIP_TYPES = ("GOSSIP", "GOSSIP_PING", "GOSSIP_PING_REQ", "GOSSIP_ACK",
+                "GOSSIP_JOIN", "GOSSIP_JOIN_ACK", "GOSSIP_LEAVE", "GOSSIP_DIGEST", "GOSSIP_PULL")
+
+
+class GossipNode:
+    """
+    Project LEO: epidemic dissemination and membership over a P2P transport.
+
+    Wraps a P2PNode or AsyncP2PNode and keeps the same surface, so HybridBrain
+    can use it as its networking layer:
+    - broadcast() gossips a message instead of sending it to every peer: it
+      goes to `fanout` random members of a small active view, and each
+      receiver forwards it the same way while its TTL (forwarding hops
+      left) lasts: one broadcast costs at most fanout + ... + fanout^(ttl+1)
+      sends. By default the TTL follows the membership, log_fanout(N) +
+      `ttl_margin` hops. Message IDs and a bounded dedup cache deliver
+      every message at most once.
+    - Push alone misses a few percent of the members whatever the TTL (a
+      node forwards only once, and with fanout 3 about 6% are never picked),
+      so push-pull anti-entropy fills the gaps: every protocol period a node
+      sends one member of its view the IDs of the messages it received in
+      the last `history_periods` periods; that member sends back the recent
+      messages missing from the list and pulls the ones it lacks itself.
+    - Membership is discovered, not configured: connect_to_peer() joins the
+      mesh through a seed and member updates are piggybacked on all traffic.
+    - Failure detection follows SWIM: every protocol period one member is
+      pinged, then probed indirectly through `indirect_probes` others; a
+      member that answers neither is suspected, and declared dead unless it
+      refutes the suspicion within `suspect_timeout`.
+
+    Each node forwards a message at most once, so per-node load is set by
+    fanout and view size, not by mesh size.
+    """
+
+    def __init__(self, transport,
+                 fanout: int = 3,
+                 ttl: Optional[int] = None,
+                 ttl_margin: int = 2,
+                 view_size: int = 8,
+                 protocol_period: float = 0.5,
+                 ping_timeout: float = 0.2,
+                 indirect_probes: int = 2,
+                 suspect_timeout: float = 2.0,
+                 dead_retention: float = 60.0,
+                 dedup_size: int = 10000,
+                 piggyback: int = 6,
+                 join_sample: int = 64,
+                 history_size: int = 1024,
+                 history_periods: int = 3,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None):
+        self.transport = transport
+        self.fanout = fanout
+        self.ttl = ttl  # None: derived from the membership size (see broadcast_ttl)
+        self.ttl_margin = ttl_margin
+        self.view_size = view_size
+        self.protocol_period = protocol_period
+        self.ping_timeout = ping_timeout
+        self.indirect_probes = indirect_probes
+        self.suspect_timeout = suspect_timeout
+        self.dead_retention = dead_retention
+        self.dedup_size = dedup_size
+        self.piggyback = piggyback
+        self.join_sample = join_sample
+        self.history_size = history_size
+        self.history_periods = history_periods
+        self.metadata = metadata or {}
+        self.address = f"{transport.host}:{transport.port}"
+        # Milliseconds since the epoch: a restarted node outranks its own tombstone
+        self.incarnation = int(time.time() * 1000)
+        self.on_message_received: Callable = None
+        self.on_member_update: Callable = None  # (address, status, metadata)
+        self.running = False
+
+        self.members: Dict[str, Dict[str, Any]] = {}  # address -> status, inc, meta, since
+        self.active_view: List[str] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # Anti-entropy: recent envelopes by ID, with the protocol period they arrived in
+        self._history: "OrderedDict[str, Tuple[int, dict]]" = OrderedDict()
+        self._period = 0
+        self._updates: Dict[str, int] = {}  # Piggyback queue: address -> times sent
+        self._seq = itertools.count(1)
+        self._probe: Optional[Dict[str, Any]] = None
+        self._probe_order: List[str] = []
+        self._next_period = 0.0
+        self._relays: Dict[int, Tuple[str, int, float]] = {}  # our seq -> requester, its seq, expiry
+        self._releases: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.counters = {"originated": 0, "delivered": 0, "duplicates": 0, "forwarded": 0,
+                         "digests": 0, "pulled": 0, "pings": 0, "ping_reqs": 0, "suspected": 0, "declared_dead": 0}
+
+    # -- P2PNode surface -------------------------------------------------
+
+    @property
+    def host(self) -> str:
+        return self.transport.host
+
+    @property
+    def port(self) -> int:
+        return self.transport.port
+
+    @property
+    def peers(self) -> List[tuple]:
+        """Every member currently believed alive."""
+        with self._lock:
+            return [_split(a) for a, m in self.members.items() if m["status"] == ALIVE]
+
+    def start(self, protocol_thread: bool = True):
+        """Starts the transport and the protocol thread (without it, the caller drives tick())."""
+        self.transport.on_message_received = self._on_frame
+        self.transport.start()
+        self.running = True
+        self._stop.clear()
+        if protocol_thread:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Announces the departure to the active view, then stops the transport."""
+        if self.running:
+            self.running = False
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            with self._lock:
+                leaving = [{"addr": self.address, "status": DEAD, "inc": self.incarnation}]
+                sends = [(a, {"type": "GOSSIP_LEAVE", "members": leaving}) for a in self.active_view]
+            self._flush(sends)
+        self.transport.stop()
+
+    def connect_to_peer(self, host: str, port: int):
+        """Joins the mesh through a seed; the rest of the membership is discovered."""
+        address = f"{host}:{port}"
+        if address == self.address:
+            return
+        with self._lock:
+            if address not in self.members:
+                # Placeholder incarnation; the seed's JOIN_ACK carries the real one
+                self._apply({"addr": address, "status": ALIVE, "inc": 0})
+            sends = [(address, {"type": "GOSSIP_JOIN"})]
+        self._flush(sends)
+        logger.info("Joining mesh via %s", address)
+
+    def broadcast_ttl(self) -> int:
+        """Forwarding hops a broadcast gets: the configured TTL, or log_fanout(N) + ttl_margin."""
+        if self.ttl is not None:
+            return self.ttl
+        with self._lock:
+            n = 1 + sum(1 for m in self.members.values() if m["status"] != DEAD)
+        return math.ceil(math.log(n) / math.log(max(2, self.fanout))) + self.ttl_margin
+
+    def broadcast(self, message: dict, ttl: Optional[int] = None):
+        """Gossips a message to the mesh (at most `ttl` forwarding hops)."""
+        envelope = {
+            "type": "GOSSIP",
+            "id": f"{self.address}/{next(self._seq)}",
+            "origin": self.address,
+            "ttl": self.broadcast_ttl() if ttl is None else ttl,
+            "msg": message,
+        }
+        with self._lock:
+            self._remember(envelope["id"])
+            self._keep(envelope)
+            self.counters["originated"] += 1
+            sends = self._forward(envelope, exclude=(self.address,))
+        self._flush(sends)
+
+    def send_to_peer(self, host: str, port: int, message: dict):
+        """Sends a direct message; it is delivered as-is, without gossip."""
+        self.transport.send_to_peer(host, port, message)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            by_status = {ALIVE: 0, SUSPECT: 0, DEAD: 0}
+            for m in self.members.values():
+                by_status[m["status"]] += 1
+            return dict(self.counters, members=by_status[ALIVE], suspect=by_status[SUSPECT],
+                        dead=by_status[DEAD], active_view=len(self.active_view))
+
+    # -- Protocol period ---------------------------------------------------
+
+    def _run(self):
+        # Deadlines are checked more often than probes are started
+        interval = min(self.protocol_period, self.ping_timeout) / 2.0
+        while not self._stop.wait(interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.exception("Gossip protocol error: %s", e)
+
+    def tick(self, now: Optional[float] = None):
+        """
+        Advances the membership protocol: expires probes and suspicions and,
+        once per protocol period, refreshes the active view and probes the
+        next member. Called by the protocol thread; exposed so simulations
+        can drive many nodes from one loop.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            sends = self._check_probe(now)
+            for address, member in list(self.members.items()):
+                if member["status"] == SUSPECT and now - member["since"] >= self.suspect_timeout:
+                    self.counters["declared_dead"] += 1
+                    self._apply({"addr": address, "status": DEAD, "inc": member["inc"]}, now)
+                elif member["status"] == DEAD and now - member["since"] >= self.dead_retention:
+                    del self.members[address]
+                    self._updates.pop(address, None)
+            for seq in [s for s, (_, _, expiry) in self._relays.items() if expiry <= now]:
+                del self._relays[seq]
+            if now >= self._next_period:
+                self._next_period = now + self.protocol_period
+                self._period += 1
+                self._refresh_view()
+                if self._probe is None:
+                    sends += self._start_probe(now)
+                sends += self._digest()
+        self._flush(sends)
+
+    def _start_probe(self, now: float) -> List[tuple]:
+        if not self._probe_order:
+            # SWIM round-robin: every member is probed once per pass, in random order
+            self._probe_order = [a for a, m in self.members.items() if m["status"] != DEAD]
+            self._rng.shuffle(self._probe_order)
+        while self._probe_order:
+            target = self._probe_order.pop()
+            if target in self.members and self.members[target]["status"] != DEAD:
+                seq = next(self._seq)
+                self._probe = {"target": target, "seq": seq, "deadline": now + self.ping_timeout, "indirect": False}
+                self.counters["pings"] += 1
+                return [(target, {"type": "GOSSIP_PING", "seq": seq})]
+        return []
+
+    def _check_probe(self, now: float) -> List[tuple]:
+        probe = self._probe
+        if probe is None or now < probe["deadline"]:
+            return []
+        target = probe["target"]
+        if not probe["indirect"]:
+            helpers = [a for a, m in self.members.items() if m["status"] == ALIVE and a != target]
+            helpers = self._rng.sample(helpers, min(self.indirect_probes, len(helpers)))
+            if helpers:
+                probe["indirect"] = True
+                probe["deadline"] = now + 2 * self.ping_timeout
+                self.counters["ping_reqs"] += len(helpers)
+                return [(h, {"type": "GOSSIP_PING_REQ", "target": target, "seq": probe["seq"]}) for h in helpers]
+        self._probe = None
+        self._release(target)
+        member = self.members.get(target)
+        if member is not None and member["status"] == ALIVE:
+            self.counters["suspected"] += 1
+            self._apply({"addr": target, "status": SUSPECT, "inc": member["inc"]}, now)
+        return []
+
+    def _refresh_view(self):
+        """Keeps the active view full of live members and swaps one entry per period."""
+        alive = [a for a, m in self.members.items() if m["status"] == ALIVE]
+        for address in [a for a in self.active_view if a not in alive]:
+            self.active_view.remove(address)
+        candidates = [a for a in alive if a not in self.active_view]
+        self._rng.shuffle(candidates)
+        if candidates and len(self.active_view) >= self.view_size:
+            # Rotation keeps the overlay random and lets new members in
+            evicted = self.active_view.pop(self._rng.randrange(len(self.active_view)))
+            self._release(evicted)
+        while candidates and len(self.active_view) < self.view_size:
+            self.active_view.append(candidates.pop())
+
+    def _digest(self) -> List[tuple]:
+        """Anti-entropy: exchanges the IDs of recent messages with one member of the view."""
+        while self._history and next(iter(self._history.values()))[0] <= self._period - self.history_periods:
+            self._history.popitem(last=False)
+        if not self.active_view:
+            return []
+        self.counters["digests"] += 1
+        return [(self._rng.choice(self.active_view), {"type": "GOSSIP_DIGEST", "ids": list(self._history)})]
+
+    def _release(self, address: str):
+        """Schedules closing the pooled connection to a member outside the active view."""
+        if address not in self.active_view:
+            self._releases.append(address)
+
+    # -- Incoming ----------------------------------------------------------
+
+    def _on_frame(self, message: dict, address: tuple):
+        kind = message.get("type")
+        if kind not in GOSSIP_TYPES:
+            if self.on_message_received:
+                self.on_message_received(message, address)
+            return
+        deliver = None
+        with self._lock:
+            for entry in message.get("members", ()):
+                self._apply(entry)
+            sender = message.get("from")
+            if sender and "inc" in message:
+                self._apply({"addr": sender, "status": ALIVE, "inc": message["inc"]})
+            sends: List[tuple] = []
+            if kind == "GOSSIP":
+                if message["id"] in self._seen:
+                    self.counters["duplicates"] += 1
+                else:
+                    self._remember(message["id"])
+                    self._keep(message)
+                    self.counters["delivered"] += 1
+                    deliver = message
+                    if message["ttl"] > 0:
+                        forwarded = dict(message, ttl=message["ttl"] - 1)
+                        sends = self._forward(forwarded, exclude=(self.address, sender, message["origin"]))
+            elif kind == "GOSSIP_DIGEST":
+                # Push-pull: send back what the sender lacks, ask for what this node lacks
+                offered = set(message["ids"])
+                envelopes = [e for i, (_, e) in self._history.items() if i not in offered]
+                self.counters["pulled"] += len(envelopes)
+                sends = [(sender, dict(e, ttl=0)) for e in envelopes]
+                missing = [i for i in message["ids"] if i not in self._seen]
+                if missing:
+                    sends.append((sender, {"type": "GOSSIP_PULL", "ids": missing}))
+            elif kind == "GOSSIP_PULL":
+                # Pulled messages are delivered without being forwarded again
+                envelopes = [self._history[i][1] for i in message["ids"] if i in self._history]
+                self.counters["pulled"] += len(envelopes)
+                sends = [(sender, dict(e, ttl=0)) for e in envelopes]
+            elif kind == "GOSSIP_PING":
+                sends = [(sender, {"type": "GOSSIP_ACK", "seq": message["seq"]})]
+            elif kind == "GOSSIP_PING_REQ":
+                seq = next(self._seq)
+                self._relays[seq] = (sender, message["seq"], time.monotonic() + 4 * self.ping_timeout)
+                sends = [(message["target"], {"type": "GOSSIP_PING", "seq": seq})]
+            elif kind == "GOSSIP_ACK":
+                relay = self._relays.pop(message["seq"], None)
+                if relay is not None:
+                    sends = [(relay[0], {"type": "GOSSIP_ACK", "seq": relay[1]})]
+                elif self._probe is not None and self._probe["seq"] == message["seq"]:
+                    target = self._probe["target"]
+                    self._probe = None
+                    self._release(target)
+            elif kind == "GOSSIP_JOIN":
+                sample = [a for a, m in self.members.items() if m["status"] != DEAD and a != sender]
+                sample = self._rng.sample(sample, min(self.join_sample, len(sample)))
+                entries = [self._entry(a) for a in sample] + [self._self_entry()]
+                sends = [(sender, {"type": "GOSSIP_JOIN_ACK", "members": entries})]
+        self._flush(sends)
+        if deliver is not None and self.on_message_received:
+            self.on_message_received(deliver["msg"], _split(deliver["origin"]))
+
+    def _apply(self, entry: Dict[str, Any], now: Optional[float] = None):
+        """
+        Merges one membership record. Higher incarnations win; at equal
+        incarnation dead > suspect > alive. A node that hears itself
+        suspected refutes it with a new incarnation.
+        """
+        address, status, inc = entry["addr"], entry["status"], entry["inc"]
+        if address == self.address:
+            if status != ALIVE and inc >= self.incarnation:
+                self.incarnation = inc + 1
+                self._updates[self.address] = 0
+            return
+        known = self.members.get(address)
+        if known is not None and (inc, _STATUS_RANK[status]) <= (known["inc"], _STATUS_RANK[known["status"]]):
+            return
+        meta = entry.get("meta", known["meta"] if known else {})
+        self.members[address] = {"status": status, "inc": inc, "meta": meta,
+                                 "since": time.monotonic() if now is None else now}
+        self._updates[address] = 0
+        if status != ALIVE and address in self.active_view:
+            self.active_view.remove(address)
+        elif status == ALIVE and address not in self.active_view and len(self.active_view) < self.view_size:
+            self.active_view.append(address)
+        if known is not None and known["status"] != status:
+            # Discovery is silent; failures and recoveries are worth a log line
+            logger.info("Member %s is %s", address, status)
+        if self.on_member_update:
+            self.on_member_update(address, status, meta)
+
+    # -- Outgoing ----------------------------------------------------------
+
+    def _forward(self, envelope: dict, exclude: tuple) -> List[tuple]:
+        targets = [a for a in self.active_view if a not in exclude]
+        targets = self._rng.sample(targets, min(self.fanout, len(targets)))
+        self.counters["forwarded"] += len(targets)
+        return [(t, envelope) for t in targets]
+
+    def _flush(self, sends: List[tuple]):
+        """Sends and disconnects outside the lock: the transport may block on connect."""
+        with self._lock:
+            header = {"from": self.address, "inc": self.incarnation}
+            piggyback = self._piggyback() if sends else []
+            releases, self._releases = self._releases, []
+        for address, message in sends:
+            if address is None:
+                continue
+            message = dict(message, **header)
+            if piggyback or "members" in message:
+                message["members"] = message.get("members", []) + piggyback
+            host, port = _split(address)
+            self.transport.send_to_peer(host, port, message)
+        disconnect = getattr(self.transport, "disconnect", None)
+        for address in releases:
+            if disconnect is not None and address not in self.active_view:
+                disconnect(*_split(address))
+
+    def _piggyback(self) -> List[Dict[str, Any]]:
+        """The least-sent recent membership updates, each sent ~3 log n times."""
+        if not self._updates:
+            return []
+        limit = 3 * math.ceil(math.log2(len(self.members) + 2))
+        chosen = sorted(self._updates, key=self._updates.get)[:self.piggyback]
+        entries = []
+        for address in chosen:
+            entries.append(self._self_entry() if address == self.address else self._entry(address))
+            self._updates[address] += 1
+            if self._updates[address] >= limit:
+                del self._updates[address]
+        return entries
+
+    def _entry(self, address: str) -> Dict[str, Any]:
+        member = self.members[address]
+        entry = {"addr": address, "status": member["status"], "inc": member["inc"]}
+        if member["status"] == ALIVE:
+            entry["meta"] = member["meta"]
+        return entry
+
+    def _self_entry(self) -> Dict[str, Any]:
+        return {"addr": self.address, "status": ALIVE, "inc": self.incarnation, "meta": self.metadata}
+
+    def _keep(self, envelope: dict):
+        """Holds a delivered envelope (without the sender's header) for anti-entropy pulls."""
+        envelope = {k: envelope[k] for k in ("type", "id", "origin", "ttl", "msg")}
+        self._history[envelope["id"]] = (self._period, envelope)
+        if len(self._history) > self.history_size:
+            self._history.popitem(last=False)
+
+    def _remember(self, message_id: str):
+        self._seen[message_id] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+
+
+def _split(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
@@ -0,0 +1,75 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from ..telemetry.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from ..telemetry.tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET /metrics (Prometheus text format, from the process registry)
+    and GET /traces (the most recent request traces as JSON). Other HTTP
+    front ends subclass it to expose the same endpoints.
+    """
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reply_telemetry(self) -> bool:
+        """Answers a telemetry path; returns False for any other path."""
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._send(200, REGISTRY.render().encode("utf-8"), PROMETHEUS_CONTENT_TYPE)
+        elif path == "/traces":
+            self._send(200, json.dumps({"traces": TRACER.recent()}).encode("utf-8"), "application/json")
+        else:
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.reply_telemetry():
+            self._send(404, json.dumps({"error": f"Unknown path {self.path}"}).encode("utf-8"),
+                       "application/json")
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+
+class _TelemetryHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """
+    Project LEO: local telemetry endpoint for nodes that do not run the
+    BrainServer (which serves the same paths itself).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9100):
+        self.host = host
+        self.port = port
+        self._httpd: Optional[_TelemetryHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._httpd = _TelemetryHTTPServer((self.host, self.port), TelemetryRequestHandler)
+        # Port 0 picks a free port; report the bound one
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Metrics on http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
@@ -1,29 +1,46 @@
+import logging
 import socket
 import threading
-import json
 import time
-from typing import List, Callable
+from typing import Dict, List, Callable, Tuple
+from .wire import (BYTES_RECEIVED, BYTES_SENT, CONNECT_SECONDS, MESSAGES_RECEIVED, MESSAGES_SENT,
+                   SEND_FAILURES, encode_message, frame_size, recv_frame, send_frame)
+
+logger = logging.getLogger(__name__)
 
 class P2PNode:
     """
     Project LEO: Decentralized Networking Layer.
     Handles peer discovery and message broadcasting for ADMM consensus.
+
+    Messages travel as length-prefixed binary frames (see wire.py) over one
+    long-lived TCP connection per peer, so consecutive ADMM updates reuse the
+    same socket instead of paying a handshake each time.
     """
-    def __init__(self, host: str = '127.0.0.1', port: int = 5000):
+    def __init__(self, host: str = '127.0.0.1', port: int = 5000, connect_timeout: float = 2.0):
         self.host = host
         self.port = port
         self.peers: List[tuple] = []
+        self.connect_timeout = connect_timeout
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.on_message_received: Callable = None
         self.running = True
+        # Connection pool: one outbound socket per peer, guarded by its own lock
+        self._connections: Dict[Tuple[str, int], socket.socket] = {}
+        self._send_locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._pool_lock = threading.Lock()
+        self._sent, self._sent_bytes = MESSAGES_SENT.labels("thread"), BYTES_SENT.labels("thread")
+        self._received, self._received_bytes = MESSAGES_RECEIVED.labels("thread"), BYTES_RECEIVED.labels("thread")
+        self._send_failures = SEND_FAILURES.labels("thread")
+        self._connect_time = CONNECT_SECONDS.labels("thread")
 
     def start(self):
         """Starts the node's server to listen for incoming peer connections."""
         self.server_socket.bind((self.host, self.port))
         self.server_socket.listen(5)
-        print(f"[P2P] Node started on {self.host}:{self.port}")
-        
+        logger.info("Node started on %s:%d", self.host, self.port)
+
         thread = threading.Thread(target=self._listen)
         thread.daemon = True
         thread.start()
@@ -32,20 +49,27 @@ class P2PNode:
         while self.running:
             try:
                 client, address = self.server_socket.accept()
-                threading.Thread(target=self._handle_client, args=(client, address)).start()
+                threading.Thread(target=self._handle_client, args=(client, address), daemon=True).start()
             except Exception as e:
                 if self.running:
-                    print(f"[P2P] Listen error: {e}")
+                    logger.warning("Listen error: %s", e)
 
     def _handle_client(self, client, address):
+        """Serves a persistent inbound connection until the peer closes it."""
         try:
-            data = client.recv(4096).decode('utf-8')
-            if data:
-                message = json.loads(data)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            while self.running:
+                frame = recv_frame(client)
+                if frame is None:
+                    break
+                message, size = frame
+                self._received.inc()
+                self._received_bytes.inc(size)
                 if self.on_message_received:
                     self.on_message_received(message, address)
         except Exception as e:
-            print(f"[P2P] Error handling client {address}: {e}")
+            if self.running:
+                logger.warning("Error handling client %s: %s", address, e)
         finally:
             client.close()
 
@@ -53,23 +77,73 @@ class P2PNode:
         """Adds a peer to the node's list of active connections."""
         if (host, port) not in self.peers and (host != self.host or port != self.port):
             self.peers.append((host, port))
-            print(f"[P2P] Connected to peer {host}:{port}")
+            logger.info("Connected to peer %s:%d", host, port)
 
     def broadcast(self, message: dict):
         """Sends a message to all connected peers."""
+        # Encode once; every peer receives the same frame buffers
+        frame = encode_message(message)
         for peer_host, peer_port in self.peers:
-            self.send_to_peer(peer_host, peer_port, message)
+            self._send_frame_to_peer(peer_host, peer_port, frame)
 
     def send_to_peer(self, host: str, port: int, message: dict):
         """Sends a direct message to a specific peer."""
-        try:
-            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            client.connect((host, port))
-            client.send(json.dumps(message).encode('utf-8'))
-            client.close()
-        except Exception as e:
-            print(f"[P2P] Failed to send message to {host}:{port}: {e}")
+        self._send_frame_to_peer(host, port, encode_message(message))
+
+    def _get_connection(self, peer: Tuple[str, int]) -> socket.socket:
+        # Called with the peer's send lock held, so only one thread connects per peer
+        with self._pool_lock:
+            conn = self._connections.get(peer)
+        if conn is None:
+            start = time.perf_counter()
+            conn = socket.create_connection(peer, timeout=self.connect_timeout)
+            self._connect_time.observe(time.perf_counter() - start)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._pool_lock:
+                self._connections[peer] = conn
+        return conn
+
+    def _drop_connection(self, peer: Tuple[str, int]):
+        with self._pool_lock:
+            conn = self._connections.pop(peer, None)
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _send_frame_to_peer(self, host: str, port: int, frame: list):
+        peer = (host, port)
+        with self._pool_lock:
+            lock = self._send_locks.setdefault(peer, threading.Lock())
+        with lock:
+            # A pooled socket may have been closed by the peer since last use;
+            # retry once on a fresh connection before giving up.
+            for attempt in range(2):
+                try:
+                    send_frame(self._get_connection(peer), frame)
+                    self._sent.inc()
+                    self._sent_bytes.inc(frame_size(frame))
+                    return
+                except OSError as e:
+                    self._drop_connection(peer)
+                    if attempt == 1:
+                        self._send_failures.inc()
+                        logger.warning("Failed to send message to %s:%d: %s", host, port, e)
+
+    def disconnect(self, host: str, port: int):
+        """Closes the pooled connection to a peer; the next send reconnects."""
+        peer = (host, port)
+        with self._pool_lock:
+            lock = self._send_locks.get(peer)
+        if lock is not None:
+            with lock:
+                self._drop_connection(peer)
 
     def stop(self):
         self.running = False
         self.server_socket.close()
+        with self._pool_lock:
+            peers = list(self._connections)
+        for peer in peers:
+            self._drop_connection(peer)
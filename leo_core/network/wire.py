@@ -0,0 +1,157 @@
+import asyncio
+import json
+import socket
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..telemetry.metrics import REGISTRY
+
+# Frame layout (all integers big-endian):
+#   [u32 body_length][u32 header_length][JSON header][blob 0][blob 1]...
+# NumPy arrays and raw bytes are lifted out of the message into binary blobs,
+# and the header keeps a small descriptor in their place. Arrays are rebuilt
+# with np.frombuffer over the received buffer, so they never pass through
+# a Python list.
+_LEN = struct.Struct(">I")
+MAX_FRAME_SIZE = 256 * 1024 * 1024  # Hard cap to reject corrupt length prefixes
+
+_BLOB_KEY = "__blob__"
+
+# Transport metrics shared by P2PNode and AsyncP2PNode, labelled by transport
+MESSAGES_SENT = REGISTRY.counter("leo_p2p_messages_sent_total", "Frames written to peers", ["transport"])
+BYTES_SENT = REGISTRY.counter("leo_p2p_bytes_sent_total", "Frame bytes written to peers", ["transport"])
+MESSAGES_RECEIVED = REGISTRY.counter("leo_p2p_messages_received_total", "Frames read from peers", ["transport"])
+BYTES_RECEIVED = REGISTRY.counter("leo_p2p_bytes_received_total", "Frame bytes read from peers", ["transport"])
+SEND_FAILURES = REGISTRY.counter("leo_p2p_send_failures_total", "Sends that failed after retrying", ["transport"])
+CONNECT_SECONDS = REGISTRY.histogram("leo_p2p_connect_seconds", "Time to open an outbound peer connection",
+                                     ["transport"])
+
+
+def _extract_blobs(obj: Any, blobs: List[memoryview]) -> Any:
+    if isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        blobs.append(memoryview(arr).cast("B"))
+        return {_BLOB_KEY: len(blobs) - 1, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        blobs.append(memoryview(obj).cast("B"))
+        return {_BLOB_KEY: len(blobs) - 1}
+    if isinstance(obj, dict):
+        return {k: _extract_blobs(v, blobs) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_extract_blobs(v, blobs) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _restore_blobs(obj: Any, blobs: List[memoryview]) -> Any:
+    if isinstance(obj, dict):
+        if _BLOB_KEY in obj:
+            raw = blobs[obj[_BLOB_KEY]]
+            if "dtype" not in obj:
+                return bytes(raw)
+            return np.frombuffer(raw, dtype=np.dtype(obj["dtype"])).reshape(obj["shape"])
+        return {k: _restore_blobs(v, blobs) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_restore_blobs(v, blobs) for v in obj]
+    return obj
+
+
+def encode_message(message: Dict[str, Any]) -> List[memoryview]:
+    """
+    Serializes a message into a list of buffers forming one length-prefixed frame.
+    The buffers can be handed to socket.sendmsg / sendall without joining them.
+    """
+    blobs: List[memoryview] = []
+    header = _extract_blobs(message, blobs)
+    header_bytes = json.dumps(
+        {"msg": header, "blobs": [b.nbytes for b in blobs]},
+        separators=(",", ":")
+    ).encode("utf-8")
+    body_len = _LEN.size + len(header_bytes) + sum(b.nbytes for b in blobs)
+    if body_len > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {body_len} bytes exceeds MAX_FRAME_SIZE")
+    prefix = _LEN.pack(body_len) + _LEN.pack(len(header_bytes))
+    return [memoryview(prefix), memoryview(header_bytes)] + blobs
+
+
+def frame_size(buffers: List[memoryview]) -> int:
+    """Total number of bytes a frame occupies on the wire."""
+    return sum(b.nbytes for b in buffers)
+
+
+def decode_body(body: bytearray) -> Dict[str, Any]:
+    """Decodes a frame body (everything after the outer length prefix)."""
+    view = memoryview(body)
+    (header_len,) = _LEN.unpack_from(view, 0)
+    offset = _LEN.size
+    header = json.loads(bytes(view[offset:offset + header_len]))
+    offset += header_len
+    blobs = []
+    for size in header["blobs"]:
+        blobs.append(view[offset:offset + size])
+        offset += size
+    return _restore_blobs(header["msg"], blobs)
+
+
+def send_frame(sock: socket.socket, buffers: List[memoryview]):
+    """Writes all buffers of an encoded frame to a blocking socket."""
+    if hasattr(sock, "sendmsg"):
+        pending = [b for b in buffers if b.nbytes]
+        while pending:
+            sent = sock.sendmsg(pending)
+            # Drop fully written buffers and trim a partially written one
+            while sent and pending:
+                if sent >= pending[0].nbytes:
+                    sent -= pending[0].nbytes
+                    pending.pop(0)
+                else:
+                    pending[0] = pending[0][sent:]
+                    sent = 0
+    else:
+        for buf in buffers:
+            sock.sendall(buf)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytearray]:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            return None
+        received += n
+    return buf
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Reads one frame from a blocking socket.
+    Returns (message, bytes_on_wire), or None when the peer closed the connection.
+    """
+    prefix = _recv_exact(sock, _LEN.size)
+    if prefix is None:
+        return None
+    (body_len,) = _LEN.unpack(prefix)
+    if body_len > MAX_FRAME_SIZE:
+        raise ValueError(f"Incoming frame of {body_len} bytes exceeds MAX_FRAME_SIZE")
+    body = _recv_exact(sock, body_len)
+    if body is None:
+        return None
+    return decode_body(body), _LEN.size + body_len
+
+
+async def read_frame_async(reader: asyncio.StreamReader) -> Optional[Tuple[Dict[str, Any], int]]:
+    """asyncio counterpart of recv_frame; returns None on a clean EOF."""
+    try:
+        prefix = await reader.readexactly(_LEN.size)
+        (body_len,) = _LEN.unpack(prefix)
+        if body_len > MAX_FRAME_SIZE:
+            raise ValueError(f"Incoming frame of {body_len} bytes exceeds MAX_FRAME_SIZE")
+        body = bytearray(await reader.readexactly(body_len))
+    except asyncio.IncompleteReadError:
+        return None
+    return decode_body(body), _LEN.size + body_len
@@ -1,30 +1,375 @@
-import os
+import ast
 import importlib.util
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Module-level settings a skill file may declare, with their defaults:
+#   EXECUTOR = "thread"     # or "process" for CPU-bound or untrusted skills
+#   TIMEOUT_S = 10.0        # the caller stops waiting after this long
+#   MAX_CONCURRENCY = 4     # calls of this skill allowed in flight at once
+DEFAULT_DECLARATION = {"EXECUTOR": "thread", "TIMEOUT_S": 10.0, "MAX_CONCURRENCY": 4}
+EXECUTORS = ("thread", "process")
+
+# Modules imported inside process workers, keyed by path -> (mtime, module)
+_process_modules: Dict[str, Tuple[float, Any]] = {}
+
+
+def _import_skill(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(f"leo_skill_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run_in_process(name: str, path: str, mtime: float, args: tuple, kwargs: dict):
+    """Runs a skill in a process worker, importing (or re-importing) it first."""
+    cached = _process_modules.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, _import_skill(name, path))
+        _process_modules[path] = cached
+    return cached[1].execute(*args, **kwargs)
+
+
+def _process_worker_main(conn):
+    """Process worker loop: runs one call per message until it receives None."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        try:
+            reply = ("ok", _run_in_process(*task))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:  # An unpicklable result or exception
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _ProcessWorker:
+    """
+    One process running skill calls sequentially. Unlike a ProcessPoolExecutor
+    worker it can be killed on its own, which is how a timed-out call gives
+    its process back.
+    """
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_process_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def call(self, task: tuple):
+        self.conn.send(task)
+        try:
+            status, value = self.conn.recv()
+        except (EOFError, OSError):
+            raise RuntimeError("worker process was terminated")
+        if status == "error":
+            raise value
+        return value
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+
+def read_declaration(path: str) -> Dict[str, Any]:
+    """Reads a skill's literal settings from its source without executing it."""
+    declaration = dict(DEFAULT_DECLARATION)
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        target = node.targets[0]
+        if isinstance(target, ast.Name) and target.id in DEFAULT_DECLARATION:
+            try:
+                declaration[target.id] = ast.literal_eval(node.value)
+            except ValueError:
+                logger.warning("Ignoring non-literal %s in %s", target.id, path)
+    if declaration["EXECUTOR"] not in EXECUTORS:
+        raise ValueError(f"Unknown EXECUTOR '{declaration['EXECUTOR']}' in {path}, expected one of {EXECUTORS}")
+    return declaration
+
+
+class Skill:
+    """A discovered skill file: its declaration, and its module once first used."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.declaration = read_declaration(path)
+        self.module = None
+        # Set by the loader: MAX_CONCURRENCY, capped at the skill's share of its pool
+        self.concurrency = 0
+        self.slots: Optional[threading.BoundedSemaphore] = None
+        self.calls = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.reloads = 0
+
+    @property
+    def executor(self) -> str:
+        return self.declaration["EXECUTOR"]
+
+    @property
+    def timeout_s(self) -> float:
+        return float(self.declaration["TIMEOUT_S"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor,
+            "timeout_s": self.timeout_s,
+            "max_concurrency": int(self.declaration["MAX_CONCURRENCY"]),
+            "concurrency": self.concurrency,
+            "imported": self.module is not None,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "reloads": self.reloads,
+        }
+
 
 class SkillLoader:
     """
     Dynamically loads skills from the skills directory.
+
+    Skill files are discovered up front but only imported on first use, and
+    re-imported when their mtime changes. Each call runs in a thread or
+    process pool (per the skill's EXECUTOR declaration) and the caller waits
+    at most TIMEOUT_S for it, so a slow skill cannot stall the pipeline.
+
+    A timed-out process call has its worker killed, which frees its slot and
+    its process at once; a thread cannot be stopped, so a timed-out thread
+    call holds its slot until it returns. Either way a skill holds at most
+    `max_share` of its pool's workers, so one hung skill cannot starve the
+    others.
     """
-    
-    def __init__(self, skills_dir: str = "leo_core/skills"):
+
+    def __init__(self, skills_dir: str = "leo_core/skills", max_threads: int = 8, max_processes: int = 2,
+                 max_share: float = 0.5):
         self.skills_dir = skills_dir
-        self.skills = {}
+        self.skills: Dict[str, Skill] = {}
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.max_share = max_share
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        # Process calls: a dispatch thread per running call talks to a _ProcessWorker
+        self._dispatch_pool: Optional[ThreadPoolExecutor] = None
+        self._idle_workers: List[_ProcessWorker] = []
+        self._busy_workers: Dict[Future, _ProcessWorker] = {}
 
-    def load_skills((self):
-        for filename in os.listdir(self.skills_dir):
+    def load_skills(self):
+        """Discovers skill files; new files are picked up and removed ones dropped on every call."""
+        found = set()
+        for filename in sorted(os.listdir(self.skills_dir)):
             if filename.endswith(".py") and filename != "__init__.py" and filename != "skill_loader.py":
                 skill_name = filename[:-3]
                 file_path = os.path.join(self.skills_dir, filename)
-                
-                spec = importlib.util.spec_from_file_location(skill_name, file_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                if hasattr(module, "execute"):
-                    self.skills[skill_name] = module.execute
-                    print(f"Loaded skill: {skill_name}")
+                found.add(skill_name)
+                if skill_name in self.skills:
+                    continue
+                try:
+                    skill = Skill(skill_name, file_path)
+                except (SyntaxError, ValueError) as e:
+                    logger.warning("Skipping %s: %s", filename, e)
+                    continue
+                self._set_concurrency(skill)
+                self.skills[skill_name] = skill
+                logger.info("Loaded skill: %s (%s)", skill_name, self.skills[skill_name].executor)
+        for skill_name in set(self.skills) - found:
+            del self.skills[skill_name]
+
+    def _set_concurrency(self, skill: Skill):
+        pool_size = self.max_processes if skill.executor == "process" else self.max_threads
+        share = max(1, int(pool_size * self.max_share))
+        concurrency = max(1, min(int(skill.declaration["MAX_CONCURRENCY"]), share))
+        if concurrency != skill.concurrency:
+            skill.concurrency = concurrency
+            skill.slots = threading.BoundedSemaphore(concurrency)
+
+    def _refresh(self, skill: Skill) -> bool:
+        """
+        Re-reads a skill whose file changed on disk. Returns False if the file
+        is gone; raises SyntaxError or ValueError if the new version is broken
+        (and retries on the next call).
+        """
+        try:
+            mtime = os.path.getmtime(skill.path)
+        except OSError:
+            return False
+        if mtime != skill.mtime:
+            skill.declaration = read_declaration(skill.path)
+            self._set_concurrency(skill)
+            skill.mtime = mtime
+            skill.module = None
+            skill.reloads += 1
+            logger.info("Reloading %s", skill.name)
+        return True
+
+    def _get_pool(self, executor: str):
+        with self._lock:
+            if executor == "process":
+                if self._dispatch_pool is None:
+                    self._dispatch_pool = ThreadPoolExecutor(max_workers=self.max_processes,
+                                                             thread_name_prefix="leo-skill-proc")
+                return self._dispatch_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                       thread_name_prefix="leo-skill")
+            return self._thread_pool
+
+    def _run_in_thread(self, skill: Skill, args: tuple, kwargs: dict):
+        with self._lock:
+            if skill.module is None:
+                skill.module = _import_skill(skill.name, skill.path)
+            module = skill.module
+        return module.execute(*args, **kwargs)
+
+    def _run_in_worker(self, skill: Skill, future: Future, args: tuple, kwargs: dict):
+        """Dispatch thread: runs one process call on an idle (or new) worker."""
+        if not future.set_running_or_notify_cancel():
+            return  # Timed out while queued
+        with self._lock:
+            self._busy_workers[future] = None  # Running, worker not assigned yet
+            worker = self._idle_workers.pop() if self._idle_workers else None
+        try:
+            if worker is None:
+                worker = _ProcessWorker(mp.get_context("spawn"))
+            with self._lock:
+                recycled = future not in self._busy_workers
+                if not recycled:
+                    self._busy_workers[future] = worker
+            if recycled:
+                raise RuntimeError("worker process was terminated")
+            result = worker.call((skill.name, skill.path, skill.mtime, args, kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        with self._lock:
+            # _recycle takes the worker of a timed-out call out of the map and kills it
+            owned = self._busy_workers.pop(future, None) is worker
+            if worker is not None and owned and worker.process.is_alive():
+                self._idle_workers.append(worker)
+
+    def _recycle(self, future: Future):
+        """Stops a timed-out process call: kills its worker, or drops the call if still queued."""
+        if future.cancel():
+            return
+        with self._lock:
+            worker = self._busy_workers.pop(future, None)
+        if worker is not None:
+            worker.kill()
+            # The dispatch thread sees the closed pipe and fails the call at once; waiting
+            # for it means the skill's slot is free again when the timeout is reported
+            wait([future], timeout=1.0)
+            logger.warning("Killed a skill worker process after a timeout")
+
+    def submit(self, skill_name: str, *args, **kwargs) -> Future:
+        """
+        Starts a skill call and returns its future. Raises KeyError for an
+        unknown skill, RuntimeError if its concurrency limit is reached, and
+        SyntaxError or ValueError if its file was edited into a broken state.
+        """
+        skill = self.skills.get(skill_name)
+        if skill is None or not self._refresh(skill):
+            raise KeyError(skill_name)
+        slots = skill.slots
+        if not slots.acquire(blocking=False):
+            skill.rejected += 1
+            raise RuntimeError(f"Skill '{skill_name}' is at its concurrency limit")
+        skill.calls += 1
+        try:
+            if skill.executor == "process":
+                future = Future()
+                self._get_pool("process").submit(self._run_in_worker, skill, future, args, kwargs)
+            else:
+                future = self._get_pool("thread").submit(self._run_in_thread, skill, args, kwargs)
+        except Exception:
+            slots.release()
+            raise
+        # The slot is held until the call really finishes, even after a timeout
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _collect(self, skill_name: str, future: Optional[Future], error: Optional[str], deadline: float):
+        if error is not None:
+            return error
+        skill = self.skills[skill_name]
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            skill.timeouts += 1
+            if skill.executor == "process":
+                self._recycle(future)
+            return f"Skill '{skill_name}' timed out after {skill.timeout_s:g}s."
+        except Exception as e:
+            return f"Skill '{skill_name}' failed: {e}"
+
+    def _start(self, skill_name: str, args: tuple, kwargs: dict):
+        try:
+            future = self.submit(skill_name, *args, **kwargs)
+        except KeyError:
+            return None, f"Skill '{skill_name}' not found.", 0.0
+        except RuntimeError as e:
+            return None, f"{e}.", 0.0
+        except (SyntaxError, ValueError) as e:
+            # A hot edit broke the file; calls fail until it is fixed
+            return None, f"Skill '{skill_name}' could not be loaded: {e}", 0.0
+        return future, None, time.monotonic() + self.skills[skill_name].timeout_s
 
     def execute_skill(self, skill_name: str, *args, **kwargs):
-        if skill_name in self.skills:
-            return self.skills[skill_name](*args, **kwargs)
-        return f"Skill '{skill_name}' not found."
+        future, error, deadline = self._start(skill_name, args, kwargs)
+        return self._collect(skill_name, future, error, deadline)
+
+    def execute_skills(self, calls: List[Tuple[str, tuple, dict]]) -> List[Any]:
+        """
+        Runs independent (skill_name, args, kwargs) calls in parallel and
+        returns their results in order; each call keeps its own timeout.
+        """
+        started = [(name,) + self._start(name, tuple(args), dict(kwargs)) for name, args, kwargs in calls]
+        return [self._collect(name, future, error, deadline) for name, future, error, deadline in started]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: skill.stats() for name, skill in self.skills.items()}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pools = [self._thread_pool, self._dispatch_pool]
+            self._thread_pool = self._dispatch_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            idle, self._idle_workers = self._idle_workers, []
+            busy = list(self._busy_workers.values())
+            self._busy_workers.clear()
+        for worker in idle:
+            worker.close()
+        for worker in busy:
+            worker.kill()
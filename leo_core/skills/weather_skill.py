@@ -1,3 +1,7 @@
+# Simulates an external API call: run on the thread pool and give up after 5 seconds
+EXECUTOR = "thread"
+TIMEOUT_S = 5.0
+
 def execute(location: str = "World"):
     """
     A sample skill to demonstrate functionality.
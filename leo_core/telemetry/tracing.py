@@ -0,0 +1,100 @@
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .metrics import REGISTRY, MetricsRegistry
+
+_ids = itertools.count(1)
+# The span the current thread / task is inside of, if any
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("leo_span", default=None)
+
+
+class Span:
+    """One timed step of a trace. Spans nest through a context variable."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start", "duration_ms",
+                 "_tracer", "_trace", "_token", "_t0")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_ids)
+        self.duration_ms: Optional[float] = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        if parent is None:
+            self.trace_id, self.parent_id, self._trace = self.span_id, None, []
+        else:
+            self.trace_id, self.parent_id, self._trace = parent.trace_id, parent.span_id, parent._trace
+        self._trace.append(self)
+        self._token = _current.set(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._t0
+        self.duration_ms = elapsed * 1000.0
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current.reset(self._token)
+        self._tracer._finish(self, elapsed)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Records per-request spans. Every finished span is observed in the
+    leo_span_seconds histogram (labelled by span name); whole traces are
+    kept in a bounded ring of the most recent `max_traces` for inspection.
+    """
+
+    def __init__(self, max_traces: int = 64, registry: MetricsRegistry = REGISTRY):
+        self._traces: Deque[List[Span]] = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        self._durations = registry.histogram("leo_span_seconds", "Duration of traced spans", ["span"])
+        self._by_name: Dict[str, Any] = {}  # Histogram child per span name
+
+    def span(self, name: str, **attributes) -> Span:
+        """Context manager timing `name`, nested under the enclosing span if there is one."""
+        return Span(self, name, attributes)
+
+    def _finish(self, span: Span, elapsed_s: float):
+        histogram = self._by_name.get(span.name)
+        if histogram is None:
+            histogram = self._by_name[span.name] = self._durations.labels(span.name)
+        histogram.observe(elapsed_s)
+        if span.parent_id is None:
+            # Kept as span objects; serialized only when someone reads them
+            with self._lock:
+                self._traces.append(span._trace)
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The most recent finished traces, newest last."""
+        with self._lock:
+            traces = list(self._traces)
+        if n is not None:
+            traces = traces[-n:]
+        return [{"trace_id": spans[0].trace_id, "spans": [s.to_dict() for s in spans]} for spans in traces]
+
+
+# Process-wide tracer
+TRACER = Tracer()
@@ -1,17 +1,73 @@
+import logging
 import os
 import sys
 from leo_core.brain.hybrid_brain import HybridBrain
 from leo_core.memory.memory_manager import MemoryManager
+from leo_core.memory.ltm_capacity import CapacityPolicy
+from leo_core.memory.vector_memory import VectorMemory
+from leo_core.network.brain_server import BrainServer
+from leo_core.network.metrics_server import MetricsServer
+
+def serve(brain):
+    """Concurrent HTTP mode: requests are micro-batched into shared brain ticks."""
+    server = BrainServer(
+        brain,
+        port=int(os.getenv("LEO_HTTP_PORT", 8080)),
+        max_batch_size=int(os.getenv("LEO_BATCH_SIZE", 16)),
+        max_wait_ms=float(os.getenv("LEO_BATCH_WAIT_MS", 5.0)),
+    )
+    server.start()
+    print("Project LEO is serving. (Ctrl+C to stop)")
+    server.serve_forever()
+    server.stop()
 
 def main():
+    # LEO_LOG_LEVEL=DEBUG also shows per-message network logs
+    logging.basicConfig(level=os.getenv("LEO_LOG_LEVEL", "INFO").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     print("--- Project LEO by Kadropic Labs ---")
     print("Initializing AGI-Oriented Agent...")
     
     # Initialize Memory and Brain
     p2p_port = int(os.getenv("LEO_PORT", 5000))
-    memory = MemoryManager()
-    brain = HybridBrain(memory=memory, p2p_port=p2p_port)
+    network_mode = os.getenv("LEO_NETWORK_MODE", "thread")
+    # LEO_GOSSIP=1 disseminates over a gossip overlay; LEO_PEERS seeds the membership
+    gossip = bool(os.getenv("LEO_GOSSIP"))
+    peers = [p for p in os.getenv("LEO_PEERS", "").split(",") if p]
+    # LTM backend: "chroma" (default) or "numpy" (memory-mapped, no database).
+    # LEO_LTM_MAX_HOT bounds the hot tier; older memories move to a cold tier.
+    ltm_backend = os.getenv("LEO_LTM_BACKEND", "chroma")
+    max_hot = os.getenv("LEO_LTM_MAX_HOT")
+    policy = CapacityPolicy(max_hot=int(max_hot), compact_after_s=30 * 24 * 3600.0) if max_hot else None
+    db_path = "data/ltm_numpy" if ltm_backend == "numpy" else "data/chroma_db"
+    memory = MemoryManager(ltm=VectorMemory(
+        db_path=db_path, backend=ltm_backend,
+        cold_backend=ltm_backend if policy else None, policy=policy
+    ))
+    # Consensus state is checkpointed here so a restarted node resumes its rounds;
+    # ZKF attestations are logged to the ledger directory
+    brain = HybridBrain(memory=memory, p2p_port=p2p_port, network_mode=network_mode, gossip=gossip,
+                        gossip_fanout=int(os.getenv("LEO_GOSSIP_FANOUT", 3)),
+                        checkpoint_path=os.getenv("LEO_CHECKPOINT_DIR", "data/admm_checkpoint"),
+                        ledger_path=os.getenv("LEO_LEDGER_DIR", "data/zkf_ledger"))
+    # Listen right away so peers can reach this node before its first request
+    brain.start_network()
+    for peer in peers:
+        host, port = peer.rsplit(":", 1)
+        brain.connect_to_peer(host, int(port))
+    
+    if "--serve" in sys.argv or os.getenv("LEO_SERVE"):
+        # The HTTP server exposes /metrics and /traces itself
+        serve(brain)
+        brain.stop_network()
+        memory.close()
+        return
     
+    # LEO_METRICS_PORT exposes /metrics (Prometheus) and /traces in interactive mode
+    metrics = MetricsServer(port=int(os.environ["LEO_METRICS_PORT"])) if os.getenv("LEO_METRICS_PORT") else None
+    if metrics is not None:
+        metrics.start()
+
     print("Project LEO is ready. (Type 'exit' to quit)")
     
     while True:
@@ -28,5 +84,11 @@ def main():
         except Exception as e:
             print(f"An error occurred: {e}")
 
+    # Checkpoint the consensus state and persist any STM batch still queued for consolidation
+    if metrics is not None:
+        metrics.stop()
+    brain.stop_network()
+    memory.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,376 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from leo_core.brain.admm_engine import ADMMEngine
+from leo_core.brain.admm_checkpoint import ADMMCheckpoint
+from leo_core.brain.batched_admm import BatchedADMMEngine
+from leo_core.brain.update_codec import DEFAULT_PREFERENCES, UpdateCodec, negotiate_codec
+from leo_core.brain.robust_aggregation import AGGREGATORS, coordinate_median
+from leo_core.brain.prox import L1, Box, Simplex, project_simplex, prox_ridge, soft_threshold
+
+def test_update_codec_bandwidth():
+    print("--- Testing ADMM Update Codec ---")
+    theta = np.random.rand(4096)
+    baseline = len(json.dumps(theta.tolist()).encode("utf-8"))
+
+    for spec in ["float64", "float16+zlib", "int8+topk0.1+zlib"]:
+        codec = UpdateCodec(spec, seed=0)
+        payload = codec.encode(theta)
+        decoded = codec.decode(payload)
+        error = np.max(np.abs(decoded - theta))
+        print(f"{spec:>20}: {codec.last_wire_bytes:>7} bytes on wire "
+              f"(JSON baseline {baseline}), max error {error:.4f}")
+
+    # The compressed codec must cut bandwidth by at least an order of magnitude
+    assert codec.last_wire_bytes * 10 < baseline
+    assert np.array_equal(UpdateCodec("float64").decode(UpdateCodec("float64").encode(theta)), theta)
+
+def test_delta_encoded_updates():
+    print("--- Testing Delta-Encoded Updates ---")
+    admm = ADMMEngine(dimension=512)
+    peer = ADMMEngine(dimension=512)
+    codec = UpdateCodec("int8+topk0.05", seed=1)
+    admm.theta = np.random.rand(512)
+    admm.keyframe_every = 1000
+
+    # Each delta resends what the previous ones lost, so the receiver's
+    # reconstruction converges to the update itself and stays dense
+    rounds = 50
+    for _ in range(rounds):
+        for payload in admm.iter_update_chunks(codec):
+            peer.receive_chunk("sender", payload["offset"], codec.decode(payload),
+                               payload["seq"], payload["base"])
+    error = np.max(np.abs(peer.peer_state["sender"] - admm.theta))
+    print(f"Reconstruction error after {rounds} rounds: {error:.2e}")
+    assert error < 1e-2 and np.count_nonzero(peer.peer_state["sender"]) == 512
+    assert np.array_equal(peer.peer_state["sender"], admm.reference)
+
+    # A lost delta leaves the chunk out of sync until the next keyframe
+    admm.keyframe_every = 5
+    for version in range(rounds, rounds + 5):
+        for payload in admm.iter_update_chunks(codec):
+            assert payload["seq"] == version
+            if version != rounds + 1:
+                peer.receive_chunk("sender", payload["offset"], codec.decode(payload),
+                                   payload["seq"], payload["base"])
+    assert peer.desynced_chunks == 3
+    for payload in admm.iter_update_chunks(codec):
+        assert payload["base"] == -1 and "k" not in payload
+        peer.receive_chunk("sender", payload["offset"], codec.decode(payload), payload["seq"], payload["base"])
+    assert np.array_equal(peer.peer_state["sender"], admm.reference)
+
+def run_codec_consensus(spec, rounds=40, n_nodes=3, dim=64):
+    """Nodes exchanging every round's update through `spec`; returns their consensus states."""
+    rng = np.random.default_rng(3)
+    targets = rng.random((n_nodes, dim)) * 10
+    nodes = [ADMMEngine(dimension=dim) for _ in range(n_nodes)]
+    codecs = [UpdateCodec(spec, seed=i) for i in range(n_nodes)]
+    for _ in range(rounds):
+        for node, target in zip(nodes, targets):
+            node.local_step(target)
+        for i, node in enumerate(nodes):
+            for payload in node.iter_update_chunks(codecs[i]):
+                lo = payload["offset"]
+                node.submit_chunk(f"n{i}", lo, node.reference[lo:lo + payload["dim"]])
+                for j, other in enumerate(nodes):
+                    if j != i:
+                        other.receive_chunk(f"n{i}", lo, codecs[j].decode(payload),
+                                            payload["seq"], payload["base"])
+        for node in nodes:
+            node.aggregate_round()
+            node.dual_update()
+    return [node.w for node in nodes]
+
+def test_default_codecs_consensus():
+    print("--- Testing Multi-Node Consensus With The Default Codecs ---")
+    lossless = run_codec_consensus("float64")
+    for spec in DEFAULT_PREFERENCES:
+        states = run_codec_consensus(spec)
+        error = max(np.max(np.abs(w - lossless[0])) for w in states)
+        print(f"{spec:>14}: max deviation from lossless consensus {error:.2e}")
+        assert error < 1e-3
+        assert all(np.count_nonzero(w) == w.size for w in states)
+
+def test_codec_negotiation():
+    assert negotiate_codec(["int8+topk0.1+zlib", "float64"], [{"float64"}]) == "float64"
+    assert negotiate_codec(
+        ["int8+topk0.1+zlib", "float64"],
+        [{"float64", "int8", "topk", "zlib"}]
+    ) == "int8+topk0.1+zlib"
+
+def test_batched_mesh_consensus():
+    print("--- Testing Batched Mesh Consensus ---")
+    n_agents, dim = 10_000, 64
+    targets = np.random.rand(n_agents, dim)
+    alpha = np.random.uniform(0.5, 1.0, n_agents)
+    mesh = BatchedADMMEngine(n_agents, dimension=dim, rho=1.0, alpha=alpha)
+
+    start = time.perf_counter()
+    result = mesh.run(targets, max_iter=200)
+    elapsed = time.perf_counter() - start
+    print(f"{n_agents} agents converged={result['converged']} in {result['iterations']} "
+          f"iterations ({elapsed:.2f}s), final primal residual {result['primal_residuals'][-1]:.2e}")
+
+    # The fixed point is the reliability-weighted mean of the local targets
+    expected = alpha @ targets / alpha.sum()
+    assert result["converged"]
+    assert np.allclose(result["consensus"], expected, atol=1e-3)
+
+def test_batched_matches_single_engine():
+    # With rho = 0.25 the batched local step reproduces ADMMEngine's blend
+    single = ADMMEngine(dimension=8)
+    mesh = BatchedADMMEngine(1, dimension=8, rho=0.25)
+    target = np.random.rand(8)
+    assert np.allclose(single.local_step(target), mesh.local_step(target[None, :])[0])
+
+def test_byzantine_robust_aggregation():
+    print("--- Testing Byzantine-Robust Aggregation ---")
+    admm = ADMMEngine(dimension=64)
+    honest = 1.0 + 0.01 * np.random.randn(20, 64)
+    for i, update in enumerate(honest):
+        admm.submit_update(f"honest-{i}", update)
+    for i in range(6):
+        admm.submit_update(f"byzantine-{i}", np.full(64, 1e6))
+        admm.peer_alpha[f"byzantine-{i}"] = 0.5 # Low reliability
+    stacked = np.stack(list(admm.update_buffer[0].values()))
+    weights = np.array([admm.peer_alpha.get(p, 1.0) for p in admm.update_buffer[0]])
+
+    # Trim must exceed the Byzantine weight share (3 of 23 units here)
+    options = {"trimmed_mean": {"trim": 0.2}}
+    for name, fn in AGGREGATORS.items():
+        start = time.perf_counter()
+        result = fn(stacked, weights, **options.get(name, {}))
+        elapsed = (time.perf_counter() - start) * 1000
+        error = np.max(np.abs(result - 1.0))
+        print(f"{name:>16}: max deviation {error:.3g} ({elapsed:.3f} ms)")
+        if name != "mean":
+            assert error < 0.1, f"{name} was captured by Byzantine peers"
+
+    # aggregate_round consumes the buffer and advances the round
+    admm.aggregate_round()
+    assert admm.round == 1 and not admm.update_buffer
+    assert np.max(np.abs(admm.w - 1.0)) < 0.1
+
+    # A late update for round 0 is carried into round 1
+    admm.submit_update("honest-0", honest[0], round_id=0)
+    assert "honest-0" in admm.update_buffer[1]
+
+def test_bounded_staleness():
+    print("--- Testing Bounded-Staleness Rounds ---")
+    admm = ADMMEngine(dimension=4, staleness_bound=1)
+    for _ in range(3):
+        admm.submit_update("self", np.zeros(4))
+        admm.aggregate_round()
+    assert admm.round == 3
+
+    # Within the bound: carried into the open round; beyond it: dropped
+    assert admm.submit_update("late", np.ones(4), round_id=2)
+    assert not admm.submit_update("straggler", np.ones(4), round_id=1)
+    assert admm.stale_accepted == 1 and admm.stale_dropped == 1
+    assert admm.update_rounds[3] == {"late": 2}
+    assert admm.fresh_updates() == 0
+
+    # A fresher update replaces the stale one; an older one never does
+    admm.submit_update("late", 2 * np.ones(4), round_id=3)
+    assert not admm.submit_update("late", np.ones(4), round_id=2)
+    assert admm.fresh_updates() == 1
+
+    # A peer that misses round 3 is represented by its last update...
+    admm.submit_update("peer", np.full(4, 5.0), round_id=3)
+    admm.aggregate_round()
+    admm.submit_update("late", 2 * np.ones(4), round_id=4)
+    admm.aggregate_round(method="mean")
+    assert np.allclose(admm.w, 3.5)  # mean of late=2 and peer's round-3 update 5
+    # ...until it falls outside the bound
+    admm.submit_update("late", 2 * np.ones(4), round_id=5)
+    admm.submit_update("late", 2 * np.ones(4), round_id=6)
+    admm.aggregate_round(method="mean")
+    admm.aggregate_round(method="mean")
+    assert np.allclose(admm.w, 2.0) and "peer" not in admm.last_update
+
+    # Down-weighting: a one-round-old update counts half
+    decayed = ADMMEngine(dimension=1, staleness_bound=2, staleness_decay=0.5)
+    decayed.submit_update("a", np.zeros(1))
+    decayed.aggregate_round()
+    decayed.submit_update("a", np.zeros(1))
+    decayed.submit_update("b", np.full(1, 3.0), round_id=0)
+    decayed.aggregate_round(method="mean")
+    assert np.allclose(decayed.w, 1.0)  # (0 * 1 + 3 * 0.5) / 1.5
+    print(f"Accepted {admm.stale_accepted} stale updates, dropped {admm.stale_dropped}")
+
+def test_checkpoint_warm_restart():
+    print("--- Testing ADMM Checkpoint Restore ---")
+    admm = ADMMEngine(dimension=16)
+    for _ in range(5):
+        admm.local_step(np.random.rand(16))
+        admm.submit_update("self", admm.theta)
+        admm.aggregate_round()
+        admm.dual_update()
+    admm.rho, admm.peer_alpha = 2.0, {"peer-a": 0.5}
+
+    with tempfile.TemporaryDirectory() as path:
+        checkpoint = ADMMCheckpoint(path)
+        assert checkpoint.save(admm) == 1
+        admm.round += 1
+        # Each save commits a new generation and retires the previous one
+        assert checkpoint.save(admm) == 2
+        assert sorted(os.listdir(path)) == ["meta.json", "state.2.f64"]
+
+        restarted = ADMMEngine(dimension=16)
+        assert ADMMCheckpoint(path).restore(restarted)
+        assert restarted.round == 6 and restarted.rho == 2.0 and restarted.peer_alpha == {"peer-a": 0.5}
+        for name in ("theta", "w", "u", "reference"):
+            assert np.array_equal(getattr(restarted, name), getattr(admm, name))
+        # Restored vectors are copy-on-write views of the checkpoint file
+        assert isinstance(restarted.w, np.memmap)
+        restarted.w[:] = 0.0
+        assert ADMMCheckpoint(path).restore(restarted) and np.array_equal(restarted.w, admm.w)
+        # A checkpoint of another dimension is ignored
+        assert not ADMMCheckpoint(path).restore(ADMMEngine(dimension=8))
+
+def test_large_dimension_chunked_state():
+    print("--- Testing In-Place Chunked ADMM State ---")
+    dim = 100_003  # Not a multiple of the chunk size
+    admm = ADMMEngine(dimension=dim, dtype="float32", chunk_size=4096)
+    rng = np.random.default_rng(0)
+    admm.w[:] = rng.random(dim)
+    target = rng.random(dim, dtype=np.float32)
+    theta, u = admm.theta, admm.u
+    admm.local_step(target)
+    assert np.allclose(admm.theta, 0.8 * target + 0.2 * (admm.w - admm.u), atol=1e-6)
+
+    def step():
+        admm.local_step(target)
+        admm.dual_update()
+
+    tracemalloc.start()
+    step()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    step()
+    allocated = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    print(f"Allocated per step at dim={dim}: {allocated} bytes")
+    # Updated in place: no new arrays, nothing close to one state vector (400 KB)
+    assert admm.theta is theta and admm.u is u and admm.theta.dtype == np.float32
+    assert allocated < 4096
+
+    # Streamed in chunks, reassembled by a peer, aggregated chunk by chunk
+    codec = UpdateCodec("float32")
+    peer = ADMMEngine(dimension=dim, dtype="float32", chunk_size=4096)
+    payloads = list(admm.iter_update_chunks(codec))
+    assert len(payloads) == 25 and max(p["dim"] for p in payloads) == 4096
+    for payload in reversed(payloads):
+        complete = peer.submit_chunk("sender", payload["offset"], codec.decode(payload))
+        assert complete == (payload is payloads[0]) and not peer.submit_chunk(
+            "sender", payload["offset"], codec.decode(payload))
+    assert np.array_equal(peer.update_buffer[0]["sender"], admm.theta + admm.u)
+    # Overlapping chunks cannot pass for a complete update with unwritten coordinates
+    peer.submit_chunk("overlap", 0, np.ones(60_000, dtype=np.float32))
+    try:
+        peer.submit_chunk("overlap", 50_000, np.ones(dim - 50_000, dtype=np.float32))
+        assert False, "overlapping chunk accepted"
+    except ValueError:
+        pass
+    assert "overlap" not in peer.update_buffer[0]
+    del peer.partial_updates[(0, "overlap")]
+    others = rng.random((2, dim)).astype(np.float32)
+    peer.submit_update("a", others[0])
+    peer.submit_update("b", others[1])
+    stacked = np.stack([peer.update_buffer[0][p] for p in ("sender", "a", "b")])
+    peer.aggregate_round()
+    assert np.allclose(peer.w, coordinate_median(stacked.astype(np.float64)))
+    assert peer._stack.dtype == np.float32
+    assert np.isclose(peer.primal_residual, np.linalg.norm(peer.theta - peer.w), rtol=1e-4)
+
+    with tempfile.TemporaryDirectory() as path:
+        ADMMCheckpoint(path).save(peer)
+        assert sorted(os.listdir(path)) == ["meta.json", "state.1.f32"]
+        restored = ADMMEngine(dimension=dim, dtype="float32")
+        assert ADMMCheckpoint(path).restore(restored) and np.array_equal(restored.w, peer.w)
+
+def test_prox_operators_and_adaptive_penalty():
+    print("--- Testing Prox Operators and Adaptive Penalty ---")
+    v = np.array([-2.0, -0.5, 0.3, 3.0])
+    assert np.array_equal(soft_threshold(v, 1.0), [-1.0, 0.0, 0.0, 2.0])
+    assert np.allclose(prox_ridge(v, 1.0), v / 2)
+    rows = np.random.default_rng(0).normal(size=(5, 7))
+    projected = project_simplex(rows, 2.0)
+    assert np.allclose(projected.sum(axis=1), 2.0) and np.all(projected >= 0)
+    project_simplex(rows, 2.0, out=rows)  # In place
+    assert np.array_equal(rows, projected)
+
+    # Fixed points of the regularized / constrained consensus problem
+    n_agents, dim = 1000, 64
+    targets = np.random.default_rng(1).random((n_agents, dim))
+    mean = targets.mean(axis=0)
+    box = BatchedADMMEngine(n_agents, dim, rho=1.0, constraint=Box(0.4, 0.6)).run(targets)
+    assert np.allclose(box["consensus"], np.clip(mean, 0.4, 0.6), atol=1e-3)
+    sparse = BatchedADMMEngine(n_agents, dim, rho=1.0, regularizer=L1(0.5 * n_agents)).run(targets)
+    assert np.allclose(sparse["consensus"], soft_threshold(mean, 0.5), atol=1e-3)
+
+    # A badly tuned penalty: residual balancing and over-relaxation recover the round count
+    rounds = {}
+    for name, options in {"fixed": {}, "adaptive": dict(adaptive_rho=True),
+                          "adaptive+relaxed": dict(adaptive_rho=True, relaxation=1.6)}.items():
+        result = BatchedADMMEngine(n_agents, dim, rho=0.01, **options).run(targets, max_iter=2000)
+        assert result["converged"] and np.allclose(result["consensus"], mean, atol=1e-3)
+        rounds[name] = result["iterations"]
+    print(f"Rounds to tolerance from rho=0.01: {rounds}")
+    assert rounds["adaptive"] * 10 < rounds["fixed"] and rounds["adaptive+relaxed"] <= rounds["adaptive"]
+
+    # The same terms in the networked engine
+    admm = ADMMEngine(dimension=dim, constraint=Simplex(1.0), l1_coupling=0.01,
+                      relaxation=1.5, adaptive_rho=True)
+    admm.rho = 50.0
+    for _ in range(30):
+        admm.local_step(targets[0])
+        admm.submit_update("self", admm.theta_hat + admm.u)
+        admm.aggregate_round()
+        admm.dual_update()
+    assert np.isclose(admm.w.sum(), 1.0) and np.all(admm.w >= 0)
+    assert admm.rho < 50.0 and admm.primal_residual < 1e-3
+
+def test_per_node_rho_weighting():
+    print("--- Testing Per-Node Penalties ---")
+    dim = 16
+    targets = np.random.default_rng(2).random((3, dim))
+    engines = [ADMMEngine(dimension=dim, aggregator="mean") for _ in range(3)]
+    for engine, rho in zip(engines, (0.5, 1.0, 4.0)):
+        engine.rho = rho
+    for _ in range(200):
+        updates = []
+        for engine, target in zip(engines, targets):
+            engine.local_step(target)
+            updates.append(engine.theta_hat + engine.u)
+        for i, engine in enumerate(engines):
+            for j, update in enumerate(updates):
+                if j != i:
+                    engine.set_peer_rho(f"n{j}", engines[j].rho)  # Sent along with the update
+                engine.submit_update(f"n{j}" if j != i else "self", update)
+            engine.aggregate_round()
+            engine.dual_update()
+    # Weighting each update by its sender's ρ keeps the fixed point at the true optimum
+    error = max(np.abs(engine.w - targets.mean(axis=0)).max() for engine in engines)
+    print(f"Consensus error with rho = 0.5 / 1 / 4: {error:.2e}")
+    assert error < 1e-8
+    assert engines[0].participants == 3
+    # A peer claiming an extreme penalty is clipped to rho_spread times this node's
+    assert engines[1].set_peer_rho("liar", 1e9) == engines[1].rho * engines[1].rho_spread
+
+if __name__ == "__main__":
+    test_update_codec_bandwidth()
+    test_delta_encoded_updates()
+    test_default_codecs_consensus()
+    test_codec_negotiation()
+    test_batched_mesh_consensus()
+    test_batched_matches_single_engine()
+    test_byzantine_robust_aggregation()
+    test_bounded_staleness()
+    test_checkpoint_warm_restart()
+    test_large_dimension_chunked_state()
+    test_prox_operators_and_adaptive_penalty()
+    test_per_node_rho_weighting()
@@ -32,6 +32,7 @@ def test_leo_evolution():
         brain.process_request(f"Remember this: {fact}")
     
     print("Consolidation triggered automatically (exceeded 10 items in STM).")
+    memory.flush() # Consolidation runs in the background; wait for the LTM write
     
     # 2. Test Semantic Retrieval
     print("\n[Test 2] Semantic Retrieval from LTM...")
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from leo_core.memory.embedding_cache import CachedEmbeddingFunction
+from leo_core.memory.hebbian_graph import HebbianGraph
+from leo_core.memory.ltm_backends import ChromaBackend, LTMBackend, NumpyBackend
+from leo_core.memory.ltm_capacity import CapacityPolicy
+from leo_core.memory.memory_manager import MemoryManager
+from leo_core.memory.vector_memory import VectorMemory
+
+class CountingEmbedder:
+    """Deterministic stand-in for the ONNX model that counts what it embeds."""
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.embedded = 0
+
+    def __call__(self, input):
+        self.embedded += len(input)
+        return [
+            np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8)[:self.dim].astype(np.float32)
+            for text in input
+        ]
+
+def test_embedding_cache():
+    print("--- Testing Embedding Cache ---")
+    cache_dir = tempfile.mkdtemp()
+    model = CountingEmbedder()
+    cache = CachedEmbeddingFunction(model, capacity=2, disk_path=cache_dir)
+
+    first = cache(["What is LEO?", "What is LEO?", "ADMM"])
+    assert model.embedded == 2 # Duplicate within the batch embedded once
+    second = cache(["What is LEO?"])
+    assert np.array_equal(first[0], second[0])
+    assert model.embedded == 2
+
+    # Evicted from the 2-entry LRU tier, but still served from disk
+    cache(["a", "b"])
+    cache(["ADMM"])
+    assert model.embedded == 4
+    print(f"Cache stats: {cache.stats()}")
+
+    # A fresh process reopens the memory-mapped tier
+    reopened = CachedEmbeddingFunction(CountingEmbedder(), disk_path=cache_dir)
+    vector = reopened(["What is LEO?"])[0]
+    assert np.array_equal(vector, first[0])
+    assert reopened.stats()["disk_hits"] == 1 and reopened.stats()["misses"] == 0
+
+def test_numpy_ltm_backend():
+    print("--- Testing NumPy LTM Backend ---")
+    path = tempfile.mkdtemp()
+    facts = [f"fact number {i}" for i in range(300)]
+    memory = VectorMemory(backend=NumpyBackend(path, CountingEmbedder(), initial_capacity=64))
+    memory.add_memories(facts[:200])
+    memory.add_memories(facts[200:])
+    assert memory.query_memory("fact number 123", n_results=1) == ["fact number 123"]
+
+    # A crash mid-append leaves an uncommitted record and a torn line behind
+    with open(os.path.join(path, "documents.jsonl"), "ab") as f:
+        f.write(b'{"id": "lost", "document": "uncommitted", "metadata": {}}\n{"id": "to')
+    reopened = NumpyBackend(path, CountingEmbedder(), index="ivf", n_lists=8, n_probe=8)
+    assert reopened.count() == 300
+    reopened.add(["after"], ["written after recovery"], [{}])
+    assert NumpyBackend(path, CountingEmbedder()).count() == 301
+    # Probing every list makes IVF exact
+    assert reopened.query(["fact number 7", "written after recovery"], 1) == [["fact number 7"], ["written after recovery"]]
+    print(f"{reopened.count()} memories recovered and searchable")
+    # Paged ID/metadata scans skip deleted rows and cover every live one once
+    reopened.delete(["after"])
+    pages = [reopened.scan(offset, 128) for offset in range(0, 384, 128)]
+    assert [len(page["ids"]) for page in pages] == [128, 128, 44]
+    assert sorted(i for page in pages for i in page["ids"]) == sorted(reopened.get()["ids"])
+    # An ID deleted and added again stays live, and deletable, after a reopen
+    memory_id = reopened.get()["ids"][0]
+    reopened.delete([memory_id])
+    reopened.add([memory_id], ["added again"], [{}])
+    revived = NumpyBackend(path, CountingEmbedder())
+    assert revived.get([memory_id])["documents"] == ["added again"] and revived.count() == 300
+    revived.delete([memory_id])
+    assert revived.count() == 299 and NumpyBackend(path, CountingEmbedder()).get([memory_id])["ids"] == []
+    # The interface is abstract: a backend missing part of it cannot be instantiated
+    class SearchOnly(LTMBackend):
+        def search(self, queries, n_results):
+            return [[] for _ in queries]
+    for incomplete in (LTMBackend, SearchOnly):
+        try:
+            incomplete()
+        except TypeError:
+            continue
+        raise AssertionError(f"{incomplete.__name__} should be abstract")
+
+def test_chroma_backend_existing_collection():
+    print("--- Testing Chroma Backend on a Persisted Collection ---")
+    import chromadb
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    path = tempfile.mkdtemp()
+    # A collection saved with chromadb's "default" embedding function, as data/chroma_db is
+    collection = chromadb.PersistentClient(path=path).get_or_create_collection(
+        "leo_ltm", embedding_function=DefaultEmbeddingFunction())
+    model = CountingEmbedder()
+    collection.add(ids=["old"], documents=["stored before"], embeddings=model(["stored before"]))
+    # The cache is never handed to chromadb, so reopening it does not conflict
+    backend = ChromaBackend(path, CachedEmbeddingFunction(model))
+    backend.add(["new"], ["stored after"], [{"source": "test"}])
+    assert backend.count() == 2
+    assert backend.query(["stored before", "stored after"], 1) == [["stored before"], ["stored after"]]
+    reopened = chromadb.PersistentClient(path=path).get_collection("leo_ltm")
+    assert reopened.configuration_json["embedding_function"]["name"] == "default"
+
+def test_hebbian_novelty_gate():
+    print("--- Testing Hebbian Novelty Gate ---")
+    root = tempfile.mkdtemp()
+    ltm = VectorMemory(backend=NumpyBackend(os.path.join(root, "ltm"), CountingEmbedder()))
+    graph_path = os.path.join(root, "graph.npz")
+    memory = MemoryManager(storage_path=graph_path, background_consolidation=False, ltm=ltm)
+    # 60 turns that cycle through 3 distinct exchanges
+    for turn in range(30):
+        memory.add_to_stm("user", f"question {turn % 3}")
+        memory.add_to_stm("leo", f"answer {turn % 3}")
+    memory.close()
+
+    stats = memory.graph.stats()
+    print(f"Graph: {stats}, vector store: {ltm.backend.count()} memories")
+    assert stats["nodes"] == 6 and ltm.backend.count() == 6
+    assert stats["merges"] == stats["observations"] - 6 and stats["edges"] > 0
+    # Every node points at its vector-store entry, and the graph reloads from disk
+    reloaded = HebbianGraph.load(graph_path)
+    assert reloaded.stats() == stats and None not in reloaded.memory_ids
+    # Recall through the graph leads with the node the query activates most
+    recalled = memory.reconcile("user: question 1")
+    print(f"Recalled: {recalled}")
+    assert len(recalled) == 3 and recalled[0] == "user: question 1"
+
+    # Entries deleted by maintenance are unbound from their nodes, so the topics are stored again
+    ltm.policy = CapacityPolicy(max_hot=4, interval_s=0)
+    assert ltm.maintain()["evicted"] == 2 and memory.graph.memory_ids.count(None) == 2
+    for turn in range(3):
+        memory.add_to_stm("user", f"question {turn}")
+        memory.add_to_stm("leo", f"answer {turn}")
+    memory.consolidate_to_ltm()
+    assert ltm.backend.count() == 6 and None not in memory.graph.memory_ids
+    assert memory.graph.stats()["nodes"] == 6
+    # Compacted ones are rebound to the summary that replaced them
+    compacted = memory.graph.memory_ids[:2]
+    memory._memories_removed(compacted, "mem_summary")
+    assert memory.graph.memory_ids[:2] == ["mem_summary", "mem_summary"]
+
+def test_ltm_capacity_tiers():
+    print("--- Testing LTM Capacity Tiers ---")
+    root = tempfile.mkdtemp()
+    # Hash embeddings are all mutually similar, so a strict threshold defines a miss
+    policy = CapacityPolicy(max_hot=5, eviction="importance", miss_threshold=0.99, interval_s=0)
+    memory = VectorMemory(
+        db_path=os.path.join(root, "hot"), policy=policy,
+        backend=NumpyBackend(os.path.join(root, "hot"), CountingEmbedder()),
+        cold_backend=NumpyBackend(os.path.join(root, "cold"), CountingEmbedder()),
+    )
+    memory.maintenance_page_size = 3  # Several partial pages
+    memory.add_memories([f"fact {i}" for i in range(20)])
+    for _ in range(3):
+        memory.query_memory("fact 1", n_results=1)
+    report = memory.maintain()
+    assert report["evicted"] == 15
+    assert memory.backend.count() == 5 and memory.cold.count() == 15
+    assert memory.query_memory("fact 1", n_results=1) == ["fact 1"] # Frequently used: stayed hot
+
+    # A cold memory is still found on a hot miss, then promoted back
+    demoted = memory.cold.get()["documents"][0]
+    assert memory.query_memory(demoted, n_results=1) == [demoted]
+    report = memory.maintain()
+    assert report["promoted"] == 1 and memory.backend.count() == 5
+    assert demoted in memory.backend.get()["documents"]
+
+    # Old cold memories are merged into summary nodes, a bounded sample per run
+    policy.compact_after_s, policy.compact_similarity, policy.compact_batch_size = 0.0, 0.0, 8
+    report = memory.maintain()
+    print(f"Compaction: {report}; {memory.get_all_context()}")
+    assert report["summaries"] > 0 and report["compacted"] <= 8 and memory.cold.count() < 15
+    assert any(doc.startswith("Summary of") for doc in memory.cold.get()["documents"])
+
+def test_lazy_cold_start():
+    print("--- Testing Lazy Cold Start ---")
+    # A fresh interpreter, so modules imported by other tests do not leak in
+    probe = (
+        "import sys\n"
+        "from leo_core.memory.memory_manager import MemoryManager\n"
+        "from leo_core.brain.hybrid_brain import HybridBrain\n"
+        "brain = HybridBrain(memory=MemoryManager(), p2p_port=5016)\n"
+        "print('chromadb' in sys.modules, brain.network_started, brain.memory.ltm.initialized)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+    print(f"chromadb imported / network started / LTM opened: {out.strip()}")
+    assert out.split() == ["False", "False", "False"]
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_numpy_ltm_backend()
+    test_chroma_backend_existing_collection()
+    test_hebbian_novelty_gate()
+    test_ltm_capacity_tiers()
+    test_lazy_cold_start()
@@ -1,7 +1,16 @@
 from leo_core.brain.hybrid_brain import HybridBrain
 from leo_core.memory.memory_manager import MemoryManager
+from leo_core.network.p2p_node import P2PNode
+from leo_core.network.async_node import AsyncP2PNode
+from leo_core.network.brain_server import BrainServer
+from leo_core.network.cluster_sim import ClusterSimulator, LinkProfile, build_topology
+from leo_core.network.gossip import GossipNode
+from leo_core.brain.update_codec import UpdateCodec
+import numpy as np
 import time
 import threading
+import json
+import urllib.request
 import os
 
 def run_node(port, peers):
@@ -12,14 +21,14 @@ def run_node(port, peers):
     time.sleep(1) # Wait for server to start
     
     for peer_port in peers:
-        brain.p2p.connect_to_peer('127.0.0.1', peer_port)
+        brain.connect_to_peer('127.0.0.1', peer_port)
     
     # Simulate a request to trigger consensus
     response = brain.process_request(f"Node on {port} triggering consensus.")
     print(f"Node {port} Response: {response}")
     
     time.sleep(2) # Wait for messages to propagate
-    brain.p2p.stop()
+    brain.stop_network()
 
 def test_p2p_decentralization():
     # Ensure data directory exists
@@ -36,5 +45,284 @@ def test_p2p_decentralization():
     t2.join()
     print("\n--- P2P Test Complete ---")
 
+def test_large_payload_framing():
+    print("--- Testing Length-Prefixed Framing ---")
+    received = []
+    done = threading.Event()
+
+    def on_message(message, address):
+        received.append(message)
+        if len(received) == 3:
+            done.set()
+
+    receiver = P2PNode(port=5011)
+    receiver.on_message_received = on_message
+    receiver.start()
+    sender = P2PNode(port=5012)
+    sender.connect_to_peer('127.0.0.1', 5011)
+
+    # Far beyond the old 4 KB single-recv limit
+    theta = np.random.rand(100_000)
+    for i in range(3):
+        sender.broadcast({"type": "ADMM_UPDATE", "seq": i, "theta": theta})
+
+    assert done.wait(5), "Frames were not delivered"
+    assert [m["seq"] for m in received] == [0, 1, 2]
+    assert np.array_equal(received[-1]["theta"], theta)
+    # All three messages reused one pooled connection
+    assert len(sender._connections) == 1
+    print(f"Delivered {len(received)} frames of {theta.nbytes} bytes over one connection")
+
+    sender.stop()
+    receiver.stop()
+
+def test_async_fanout_isolates_dead_peer():
+    print("--- Testing Async Fan-Out ---")
+    received = threading.Event()
+
+    receiver = AsyncP2PNode(port=5013)
+    receiver.on_message_received = lambda message, address: received.set()
+    receiver.start()
+    sender = AsyncP2PNode(port=5014, connect_timeout=0.5, queue_size=4)
+    sender.start()
+    sender.connect_to_peer('127.0.0.1', 5013)
+    sender.connect_to_peer('127.0.0.1', 5999) # Nothing listens here
+
+    start = time.perf_counter()
+    for _ in range(10):
+        sender.broadcast({"type": "ADMM_UPDATE", "theta": np.random.rand(64)})
+    elapsed = time.perf_counter() - start
+
+    # broadcast() only enqueues, so the dead peer cannot stall the caller
+    assert elapsed < 0.1, f"broadcast blocked for {elapsed:.3f}s"
+    assert received.wait(5), "Live peer never received an update"
+    print(f"10 broadcasts returned in {elapsed * 1000:.2f} ms; live peer served")
+
+    sender.stop()
+    receiver.stop()
+
+class StubMemory:
+    """In-process memory so the server test needs no vector store."""
+    def __init__(self):
+        self.context_calls = 0
+    def get_contexts(self, queries):
+        self.context_calls += 1
+        return ["" for _ in queries]
+    def get_context(self, query=""):
+        return ""
+    def reconcile(self, query, k=3):
+        return []
+    def add_to_stm(self, role, content):
+        pass
+
+class SilentNode:
+    """Networking layer with two known peers that never sends anything."""
+    def __init__(self):
+        self.host, self.port = '127.0.0.1', 5019
+        self.peers = [('127.0.0.1', 5998), ('127.0.0.1', 5999)]
+        self.on_message_received = None
+        self.sent = []
+    def start(self):
+        pass
+    def stop(self):
+        pass
+    def broadcast(self, message):
+        self.sent.append(message)
+
+def test_round_quorum_and_deadline():
+    print("--- Testing Consensus Round Protocol ---")
+    brain = HybridBrain(memory=StubMemory(), p2p_port=5019)
+    brain.codec_preferences = ["float64"]
+    brain.start_network(SilentNode())
+    brain.round_deadline_ms = 100.0
+
+    update = UpdateCodec("float64").encode(np.random.rand(64))
+    def peer_update(peer, round_id):
+        brain._handle_network_message(
+            {"type": "ADMM_UPDATE", "sender": f"127.0.0.1:{peer}", "round": round_id, "update": update}, None)
+
+    # Known members that never send to this node do not count: until a peer is
+    # heard from, our own update is the whole quorum
+    brain.process_request("first")
+    assert brain.admm.round == 1 and len(brain.p2p.sent) == 1
+
+    # Quorum is 2 of 2 participants once a peer sends: its update alone leaves round 1 open
+    peer_update(5998, 1)
+    assert brain.admm.round == 1 and brain.active_senders() == ["127.0.0.1:5998"]
+    brain.process_request("second")
+    assert brain.admm.round == 2 and len(brain.p2p.sent) == 2
+
+    # Requests never wait for the round, and contribute to it only once
+    brain.process_request("third")
+    brain.process_request("fourth")
+    assert brain.admm.round == 2 and len(brain.p2p.sent) == 3
+    # The silent peer's round closes on its deadline, from the timer, without another request
+    time.sleep(0.2)
+    telemetry = brain.get_round_telemetry()
+    print(f"Round telemetry: {telemetry}")
+    assert telemetry["round"] == 3 and telemetry["participants"] == 2
+    assert telemetry["closed_by_quorum"] == 2 and telemetry["closed_by_deadline"] == 1
+
+    # A straggler's update is carried into the open round within the staleness bound
+    peer_update(5999, 1)
+    assert brain.admm.stale_accepted == 1
+    peer_update(5999, 0)
+    assert brain.admm.stale_dropped == 1
+
+    # Undecodable updates are dropped without raising, and peers cannot grow the codec cache
+    cached, fresh = set(brain._codecs), brain.admm.fresh_updates()
+    corrupt = dict(UpdateCodec("float16+zlib").encode(np.random.rand(64)), data=b"not zlib")
+    chunk = UpdateCodec("float64").encode(np.random.rand(64))
+    chunk["seq"] = 1
+    for bad in [dict(update, codec="bogus"), dict(update, codec="float16+topk0.37"), corrupt,
+                {"codec": "float64"}, None, chunk]:
+        brain._handle_network_message(
+            {"type": "ADMM_UPDATE", "sender": "127.0.0.1:5999", "round": 3, "update": bad}, None)
+    assert set(brain._codecs) == cached and brain.admm.fresh_updates() == fresh
+    brain.stop_network()
+
+class BlockingMemory(StubMemory):
+    """Holds a tick in context retrieval until released."""
+    def __init__(self):
+        super().__init__()
+        self.entered, self.release = threading.Event(), threading.Event()
+    def get_contexts(self, queries):
+        self.entered.set()
+        self.release.wait(5)
+        return super().get_contexts(queries)
+
+def test_updates_received_during_tick():
+    print("--- Testing Network Updates During a Tick ---")
+    memory = BlockingMemory()
+    brain = HybridBrain(memory=memory, p2p_port=5018)
+    brain.start_network(SilentNode())
+    tick = threading.Thread(target=brain.process_request, args=("slow",))
+    tick.start()
+    assert memory.entered.wait(5)
+    # The network callback only waits for the ADMM state, not for the whole pipeline
+    start = time.perf_counter()
+    update = UpdateCodec("float64").encode(np.random.rand(64))
+    brain._handle_network_message(
+        {"type": "ADMM_UPDATE", "sender": "127.0.0.1:5998", "round": 0, "update": update}, None)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    print(f"Update handled in {elapsed_ms:.1f} ms while the tick was running")
+    assert elapsed_ms < 1000 and brain.admm.fresh_updates() == 1
+    memory.release.set()
+    tick.join()
+    assert brain.admm.round == 1
+    brain.stop_network()
+
+def test_micro_batched_serving():
+    print("--- Testing Micro-Batched Serving ---")
+    memory = StubMemory()
+    brain = HybridBrain(memory=memory, p2p_port=5015)
+    server = BrainServer(brain, port=0, max_batch_size=8, max_wait_ms=20)
+    server.start()
+    start_round = brain.admm.round
+
+    responses = []
+    def client(i):
+        body = json.dumps({"input": f"request {i}"}).encode()
+        req = urllib.request.Request(f"http://127.0.0.1:{server.port}/request", data=body, method="POST")
+        responses.append(json.loads(urllib.request.urlopen(req).read()))
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(24)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+
+    stats = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{server.port}/stats").read())["batching"]
+    print(f"{stats['requests']} requests in {stats['batches']} batches "
+          f"(mean batch {stats['mean_batch_size']:.1f})")
+    assert len(responses) == 24 and all("response" in r for r in responses)
+    # One context query and one consensus round per tick, not per request
+    assert memory.context_calls == stats["batches"] < 24
+    assert brain.admm.round - start_round == stats["batches"]
+
+    server.stop()
+    brain.stop_network()
+
+def test_gossip_membership_and_dissemination():
+    print("--- Testing Gossip Dissemination and Membership ---")
+    n = 6
+    nodes = [GossipNode(P2PNode(port=5020 + i), fanout=3, ttl=2, view_size=5,
+                        protocol_period=0.2, ping_timeout=0.3, suspect_timeout=1.0, seed=i)
+             for i in range(n)]
+    received = {i: [] for i in range(n)}
+    for i, node in enumerate(nodes):
+        node.on_message_received = lambda message, address, i=i: received[i].append(message["seq"])
+        node.start()
+    # Only the seed is configured; everyone else is discovered
+    for node in nodes[1:]:
+        node.connect_to_peer('127.0.0.1', 5020)
+    deadline = time.time() + 5
+    while time.time() < deadline and not all(len(node.peers) == n - 1 for node in nodes):
+        time.sleep(0.05)
+    assert all(len(node.peers) == n - 1 for node in nodes), [len(node.peers) for node in nodes]
+    # Without a fixed TTL, broadcasts get log_fanout(N) + ttl_margin hops
+    nodes[0].ttl = None
+    assert nodes[0].broadcast_ttl() == 2 + nodes[0].ttl_margin
+    nodes[0].ttl = 2
+
+    for seq in range(5):
+        nodes[5].broadcast({"type": "ADMM_UPDATE", "seq": seq})
+    deadline = time.time() + 5
+    while time.time() < deadline and not all(len(received[i]) == 5 for i in range(5)):
+        time.sleep(0.05)
+    # Every other node delivered each message exactly once, duplicates were absorbed
+    assert all(sorted(received[i]) == list(range(5)) for i in range(5)), received
+    assert received[5] == []
+    print(f"Duplicates absorbed: {sum(node.counters['duplicates'] for node in nodes)}")
+
+    # A crashed node (no leave announcement) is detected and declared dead
+    nodes[3].transport.stop()
+    crashed = "127.0.0.1:5023"
+    deadline = time.time() + 10
+    survivors = [node for i, node in enumerate(nodes) if i != 3]
+    while time.time() < deadline and not all(
+            node.members[crashed]["status"] == "dead" for node in survivors):
+        time.sleep(0.05)
+    assert all(node.members[crashed]["status"] == "dead" for node in survivors)
+    assert all(("127.0.0.1", 5023) not in node.peers for node in survivors)
+    print("Crashed member declared dead by all survivors")
+
+    nodes[3].running = False
+    for node in nodes:
+        node.stop()
+
+def test_cluster_simulator():
+    print("--- Testing Multi-Process Cluster Simulator ---")
+    ring = build_topology("ring", 5)
+    assert all(len(peers) == 2 for peers in ring.values())
+    assert sum(len(p) for p in build_topology("random", 8, degree=3).values()) // 2 == 12
+
+    sim = ClusterSimulator(
+        n_nodes=5, rounds=10, base_port=6200,
+        link=LinkProfile(latency_ms=5.0, jitter_ms=2.0, loss=0.1),
+        byzantine={4: "sign_flip+forge_fragment"},
+    )
+    report = sim.run()
+    print(f"Disagreement by round: {[round(d, 3) for d in report['disagreement']]}")
+    print(f"{report['messages_per_round']:.1f} msgs / {report['bytes_per_round']:.0f} bytes per round, "
+          f"{report['messages_dropped']} dropped, fragments rejected: {report['fragments_rejected']}")
+    assert len(report["disagreement"]) == 10
+    assert report["messages_dropped"] > 0
+    # Forged fragments are caught; honest ones all verify
+    assert report["fragments_rejected"]["byzantine"] > 0
+    assert report["fragments_rejected"]["honest"] == 0
+    assert all(n["cpu_s"] > 0 for n in report["per_node"])
+    # Expected failure: the median outvotes the faulty peer but is biased by it,
+    # so the honest nodes settle near, not on, the median of their targets
+    print(f"Consensus error with one faulty peer: {report['consensus_error']:.3f}")
+    assert not report["reached_consensus"]
+    assert 0.0 < report["consensus_error"] < 0.5
+
 if __name__ == "__main__":
+    test_large_payload_framing()
+    test_async_fanout_isolates_dead_peer()
+    test_round_quorum_and_deadline()
+    test_updates_received_during_tick()
+    test_micro_batched_serving()
+    test_gossip_membership_and_dissemination()
+    test_cluster_simulator()
     test_p2p_decentralization()
@@ -0,0 +1,40 @@
+import time
+from leo_core.brain.selc import OperatorRegistry, CircuitPlanner
+
+def _sleeping_op(ms):
+    def op(state):
+        time.sleep(ms / 1000.0)
+        state.setdefault("trace", []).append(ms)
+        return state
+    return op
+
+def test_cost_aware_circuit_planning():
+    print("--- Testing SELC Cost-Aware Planning ---")
+    registry = OperatorRegistry()
+    registry.register("ENC", _sleeping_op(1), required=True)
+    registry.register("MEM", _sleeping_op(5), priority=30)
+    registry.register("PLAN", _sleeping_op(20), priority=10)
+    registry.register("CONS", _sleeping_op(2), priority=40)
+    planner = CircuitPlanner(registry)
+    circuit = ["ENC", "MEM", "PLAN", "CONS"]
+
+    # Warm up the latency histograms with real executions
+    for _ in range(5):
+        state = {}
+        for op in circuit:
+            state = registry.execute(op, state)
+
+    telemetry = registry.telemetry()["operators"]
+    for name, stats in telemetry.items():
+        print(f"{name:>5}: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms over {stats['count']} calls")
+    assert telemetry["PLAN"]["p50_ms"] >= 20
+
+    assert planner.plan(circuit, None) == circuit
+    # PLAN is the lowest priority and alone blows a 15 ms budget
+    assert planner.plan(circuit, 15) == ["ENC", "MEM", "CONS"]
+    # Required operators survive even an impossible budget
+    assert planner.plan(circuit, 0) == ["ENC"]
+    print(f"Budget 15 ms -> {planner.plan(circuit, 15)} (estimated {planner.estimate_ms(planner.plan(circuit, 15)):.1f} ms)")
+
+if __name__ == "__main__":
+    test_cost_aware_circuit_planning()
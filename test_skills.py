@@ -0,0 +1,118 @@
+import os
+import tempfile
+import time
+from leo_core.skills.skill_loader import SkillLoader
+
+SLOW_SKILL = '''
+TIMEOUT_S = 0.2
+MAX_CONCURRENCY = 2
+import time
+
+def execute(seconds):
+    time.sleep(seconds)
+    return f"slept {seconds}"
+'''
+
+PROCESS_SKILL = '''
+EXECUTOR = "process"
+import os
+
+def execute(n):
+    return (os.getpid(), sum(range(n)))
+'''
+
+HUNG_PROCESS_SKILL = '''
+EXECUTOR = "process"
+TIMEOUT_S = 0.5
+MAX_CONCURRENCY = 4
+import os, time
+
+def execute(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+'''
+
+def _write(path, source, mtime=None):
+    with open(path, "w") as f:
+        f.write(source)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_lazy_load_and_hot_reload():
+    print("--- Testing Lazy Skill Import and Hot Reload ---")
+    with tempfile.TemporaryDirectory() as skills_dir:
+        path = os.path.join(skills_dir, "echo.py")
+        _write(path, "def execute(text):\n    return 'v1 ' + text\n", mtime=1000)
+        _write(os.path.join(skills_dir, "broken.py"), "def execute(:\n")
+        loader = SkillLoader(skills_dir)
+        loader.load_skills()
+        assert "broken" not in loader.skills
+        # Discovered but not imported until first use
+        assert not loader.get_stats()["echo"]["imported"]
+        assert loader.execute_skill("echo", "hi") == "v1 hi"
+        assert loader.get_stats()["echo"]["imported"]
+
+        _write(path, "def execute(text):\n    return 'v2 ' + text\n", mtime=2000)
+        assert loader.execute_skill("echo", "hi") == "v2 hi"
+        assert loader.get_stats()["echo"]["reloads"] == 1
+        assert loader.execute_skill("missing") == "Skill 'missing' not found."
+
+        # A hot edit that breaks the file is reported, and fixing it recovers the skill
+        _write(path, "def execute(text:\n", mtime=3000)
+        assert "could not be loaded" in loader.execute_skill("echo", "hi")
+        _write(path, "def execute(text):\n    return 'v3 ' + text\n", mtime=4000)
+        assert loader.execute_skill("echo", "hi") == "v3 hi"
+        loader.shutdown()
+
+def test_parallel_timeouts_and_limits():
+    print("--- Testing Parallel Skill Execution ---")
+    with tempfile.TemporaryDirectory() as skills_dir:
+        _write(os.path.join(skills_dir, "slow.py"), SLOW_SKILL)
+        _write(os.path.join(skills_dir, "crunch.py"), PROCESS_SKILL)
+        loader = SkillLoader(skills_dir)
+        loader.load_skills()
+
+        # Independent calls overlap instead of queueing behind each other
+        start = time.perf_counter()
+        results = loader.execute_skills([("slow", (0.1,), {}), ("slow", (0.1,), {}), ("crunch", (1000,), {})])
+        elapsed = time.perf_counter() - start
+        print(f"3 skills in {elapsed * 1000:.0f} ms: {results}")
+        assert results[:2] == ["slept 0.1", "slept 0.1"]
+        assert results[2][0] != os.getpid() and results[2][1] == sum(range(1000))
+
+        # A call over its TIMEOUT_S returns promptly with an error
+        start = time.perf_counter()
+        assert "timed out" in loader.execute_skill("slow", 1.0)
+        assert time.perf_counter() - start < 0.5
+        # The timed-out call still holds one of the two slots
+        loader.submit("slow", 0.5)
+        assert "concurrency limit" in loader.execute_skill("slow", 0.0)
+        stats = loader.get_stats()["slow"]
+        print(f"slow skill: {stats}")
+        assert stats["timeouts"] == 1 and stats["rejected"] == 1
+        loader.shutdown()
+
+def test_process_timeout_recycles_worker():
+    print("--- Testing Process Skill Timeouts ---")
+    with tempfile.TemporaryDirectory() as skills_dir:
+        _write(os.path.join(skills_dir, "hung.py"), HUNG_PROCESS_SKILL)
+        loader = SkillLoader(skills_dir, max_processes=2)
+        loader.load_skills()
+        # MAX_CONCURRENCY 4 is capped at half of the 2 process workers
+        assert loader.get_stats()["hung"]["concurrency"] == 1
+        pid = loader.execute_skill("hung", 0.0)
+
+        # The timed-out call's worker is killed, freeing its slot and its process at once
+        assert "timed out" in loader.execute_skill("hung", 30.0)
+        start = time.perf_counter()
+        replacement = loader.execute_skill("hung", 0.0)
+        print(f"Worker {pid} killed on timeout, replaced by {replacement} "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        assert isinstance(replacement, int) and replacement != pid
+        assert loader.get_stats()["hung"]["timeouts"] == 1
+        loader.shutdown()
+
+if __name__ == "__main__":
+    test_lazy_load_and_hot_reload()
+    test_parallel_timeouts_and_limits()
+    test_process_timeout_recycles_worker()
@@ -0,0 +1,93 @@
+import json
+import urllib.request
+from leo_core.brain.hybrid_brain import HybridBrain
+from leo_core.network.metrics_server import MetricsServer
+from leo_core.telemetry.metrics import REGISTRY, MetricsRegistry
+from leo_core.telemetry.tracing import TRACER, Tracer
+
+class StubMemory:
+    def get_contexts(self, queries):
+        return ["" for _ in queries]
+    def get_context(self, query=""):
+        return ""
+    def reconcile(self, query, k=3):
+        return []
+    def add_to_stm(self, role, content):
+        pass
+
+class LoopbackNode:
+    """Networking layer without peers or sockets."""
+    def __init__(self):
+        self.host, self.port = '127.0.0.1', 5030
+        self.peers = []
+        self.on_message_received = None
+    def start(self):
+        pass
+    def stop(self):
+        pass
+    def broadcast(self, message):
+        pass
+
+def test_prometheus_exposition():
+    print("--- Testing Metrics Registry ---")
+    registry = MetricsRegistry()
+    sent = registry.counter("leo_test_sent_total", "Messages sent", ["transport"])
+    sent.labels("thread").inc()
+    sent.labels(transport="thread").inc(2)
+    latency = registry.histogram("leo_test_seconds", "Latency", buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 3.0):
+        latency.observe(value)
+    size = registry.gauge("leo_test_size", "Store size")
+    size.set_function(lambda: 42)
+    # Registering the same name again returns the existing metric
+    assert registry.counter("leo_test_sent_total", "Messages sent", ["transport"]) is sent
+
+    text = registry.render()
+    print(text)
+    assert '# TYPE leo_test_sent_total counter' in text
+    assert 'leo_test_sent_total{transport="thread"} 3' in text
+    assert 'leo_test_seconds_bucket{le="0.01"} 2' in text
+    assert 'leo_test_seconds_bucket{le="0.1"} 3' in text
+    assert 'leo_test_seconds_bucket{le="+Inf"} 4' in text
+    assert 'leo_test_seconds_count 4' in text
+    assert 'leo_test_size 42' in text
+    assert latency.quantile(0.5) == 0.01
+
+def test_request_traces_and_endpoint():
+    print("--- Testing Request Tracing ---")
+    tracer = Tracer(max_traces=2, registry=MetricsRegistry())
+    with tracer.span("outer", user="a") as outer:
+        with tracer.span("inner"):
+            pass
+    (trace,) = tracer.recent()
+    inner = trace["spans"][1]
+    assert inner["parent_id"] == outer.span_id and trace["spans"][0]["attributes"] == {"user": "a"}
+
+    brain = HybridBrain(memory=StubMemory(), p2p_port=5030)
+    brain.codec_preferences = ["float64"]
+    brain.start_network(LoopbackNode())
+    brain.process_request("hello")
+    spans = [s["name"] for s in TRACER.recent(1)[0]["spans"]]
+    print(f"Spans: {spans}")
+    assert spans[:3] == ["brain.tick", "memory.get_contexts", "brain.request"]
+    assert "op.CONS" in spans and "op.ZKF" in spans
+    brain.stop_network()
+
+    server = MetricsServer(port=0)
+    server.start()
+    try:
+        response = urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics")
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = response.read().decode()
+        traces = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{server.port}/traces").read())["traces"]
+    finally:
+        server.stop()
+    for name in ("leo_brain_requests_total", "leo_admm_step_seconds_bucket", "leo_zkf_generate_seconds_count",
+                 "leo_p2p_bytes_sent_total", 'leo_span_seconds_count{span="op.ENC"}'):
+        assert name in text, name
+    assert traces and traces[-1]["spans"][0]["name"] == "brain.tick"
+    assert REGISTRY.get("leo_brain_requests_total").value >= 1
+
+if __name__ == "__main__":
+    test_prometheus_exposition()
+    test_request_traces_and_endpoint()
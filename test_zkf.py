@@ -1,6 +1,11 @@
+import os
+import tempfile
+import time
 import numpy as np
 from leo_core.brain.zkf_layer import ZKFLayer
 from leo_core.brain.admm_engine import ADMMEngine
+from leo_core.brain.merkle_commitment import MerkleCommitment, merkle_root
+from leo_core.brain.attestation_ledger import AttestationLedger, RECORD_DTYPE
 
 def test_zkf_flow():
     print("--- Testing ZKF Layer Flow ---")
@@ -38,5 +43,107 @@ def test_zkf_flow():
     is_bad_valid = zkf.verify_fragment(bad_fragment)
     print(f"ZKF Verification (Low Semantic Score) Result: {'SUCCESS' if is_bad_valid else 'FAILED (Expected)'}")
 
+def test_zkf_batch_verification():
+    print("--- Testing ZKF Batch Verification ---")
+    zkf = ZKFLayer(node_id="Test-Node-01")
+    dim, n = 64, 5000
+    states = [np.random.rand(dim) for _ in range(n)]
+    fragments = [
+        zkf.generate_fragment(np.zeros(dim), state, semantic_score=0.95)
+        for state in states
+    ]
+    # Corrupt a few fragments in different ways
+    fragments[1]["slmcs"] = 0.5
+    fragments[2]["lcs"] = 0
+    fragments[3]["noise"] = (np.ones(dim) * 0.5).tolist()
+    states[4] = states[4] + 1.0 # Commitment mismatch
+
+    start = time.perf_counter()
+    expected = np.array([zkf.verify_fragment(f, s) for f, s in zip(fragments, states)])
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = zkf.verify_batch(fragments, states)
+    batched = time.perf_counter() - start
+
+    print(f"Sequential: {sequential * 1000:.1f} ms | Batch: {batched * 1000:.1f} ms "
+          f"for {n} fragments (dim={dim})")
+    assert np.array_equal(batch, expected)
+    assert not batch[1:5].any() and batch[0] and batch[5:].all()
+    assert abs(zkf.aggregate_attestations(fragments) - (n - 3) / n) < 1e-12
+
+def test_merkle_commitments():
+    print("--- Testing Incremental Merkle Commitments ---")
+    dim, chunk_size = 1_000_000, 4096
+    state = np.random.rand(dim)
+    merkle = MerkleCommitment(chunk_size=chunk_size)
+
+    start = time.perf_counter()
+    root = merkle.commit(state)
+    full = time.perf_counter() - start
+
+    # Touch a handful of coordinates: only their chunks are re-hashed
+    touched = [10, 500_000, 999_999]
+    state[touched] += 1.0
+    start = time.perf_counter()
+    new_root = merkle.commit(state, changed=touched)
+    incremental = time.perf_counter() - start
+    print(f"Full commit: {full * 1000:.1f} ms | incremental: {incremental * 1000:.1f} ms "
+          f"({merkle.last_rehashed_chunks} chunks re-hashed)")
+    assert merkle.last_rehashed_chunks == 3
+    assert new_root != root and new_root == merkle_root(state, chunk_size)
+    # Without a hint, changed chunks are found by comparing against the cached copy
+    state[42] -= 1.0
+    assert merkle.commit(state) == merkle_root(state, chunk_size)
+    assert merkle.last_rehashed_chunks == 1
+
+    # Partial-state verification through the ZKF layer
+    zkf = ZKFLayer(node_id="Test-Node-01", commitment="merkle", merkle_chunk_size=chunk_size)
+    fragment = zkf.generate_fragment(np.zeros(dim), state, semantic_score=0.95)
+    assert zkf.verify_fragment(fragment, state)
+    chunk, proof = zkf.prove_chunk(122)
+    print(f"Inclusion proof for one chunk: {len(proof)} hashes")
+    assert zkf.verify_chunk(fragment, 122, chunk, proof)
+    assert not zkf.verify_chunk(fragment, 122, chunk + 1.0, proof)
+    assert not zkf.verify_chunk(fragment, 121, chunk, proof)
+
+def test_attestation_ledger():
+    print("--- Testing ZKF Attestation Ledger ---")
+    with tempfile.TemporaryDirectory() as path:
+        zkf = ZKFLayer(node_id="LEO-A", ledger=AttestationLedger(path, segment_records=16))
+        good = np.random.rand(32)
+        # 40 fragments from two peers; the second one discloses states that do not match
+        for i in range(40):
+            fragment = zkf.generate_fragment(np.zeros(32), good, 0.95)
+            forged = i % 2 == 1
+            state = good + 1e-3 if forged else good
+            assert zkf.attest(fragment, state, node="peer-b" if forged else "peer-a", round_id=i) != forged
+        ledger = zkf.ledger
+        assert len(ledger) == 40 and len(ledger.segments) == 3
+        assert os.path.exists(ledger.segments[0].index_path) and ledger.segments[2].index() is None
+        assert bytes(ledger.window(0.0)["com"][0]).hex() == fragment["com"]
+
+        rates = ledger.attestation_rates(60.0)
+        print(f"Attestation rates: {rates}")
+        assert rates["peer-a"]["valid_ratio"] == 1.0 and rates["peer-b"]["valid_ratio"] == 0.0
+        assert zkf.aggregate_attestations(window_s=60.0) == 0.5
+        # Nothing logged in the future, and windows are cut on logged_at
+        assert ledger.attestation_rates(60.0, now=time.time() + 3600) == {}
+        history = ledger.node_history("peer-b")
+        assert list(history["round"]) == list(range(1, 40, 2)) and not history["valid"].any()
+
+        # A torn final record is dropped on reopen; the index survives
+        ledger.close()
+        with open(ledger.segments[-1].log_path, "ab") as f:
+            f.write(b"\x00" * (RECORD_DTYPE.itemsize // 2))
+        reopened = AttestationLedger(path, segment_records=16)
+        assert len(reopened) == 40 and len(reopened.node_history("peer-a")) == 20
+        reopened.append(fragment, True, "peer-c")
+        assert reopened.attestation_rates(60.0)["peer-c"]["attestations"] == 1
+        reopened.close()
+
 if __name__ == "__main__":
     test_zkf_flow()
+    test_zkf_batch_verification()
+    test_merkle_commitments()
+    test_attestation_ledger()